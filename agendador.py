@@ -0,0 +1,107 @@
+import logging
+import threading
+import time
+
+import streamlit as st
+
+import sync
+from cache_compartilhado import dependentes
+
+# Intervalo (s) entre sincronizações de cada fonte. O que muda mais (pedidos, estoque)
+# roda mais vezes; Clarity e Analytics são cargas diárias na origem.
+CADENCIAS = {
+    "Shopify": 600,
+    "estoque": 300,
+    "vendas": 1800,
+    "metaAds": 900,
+    "Posts": 1800,
+    "stories": 900,
+    "googleAnalytics": 1800,
+    "scrollData": 3600,
+    "attentionData": 3600,
+}
+
+_log = logging.getLogger(__name__)
+
+
+class Agendador:
+    """Thread que mantém as fontes em dia, cada uma na sua cadência.
+
+    Em cada rodada sincroniza as fontes vencidas e, se a versão local mudou,
+    recarrega os loaders que as declararam (``compartilhado(fontes=...)``). A
+    recarga troca a entrada do cache de uma vez: as páginas leem o valor
+    anterior até o novo ficar pronto e nunca esperam pela rede.
+    """
+
+    def __init__(self, cadencias, cliente=None):
+        self.cadencias = dict(cadencias)
+        self.cliente = cliente
+        self.proxima = dict.fromkeys(self.cadencias, 0.0)
+        self.erros = {}
+        self._parar = threading.Event()
+        self._thread = threading.Thread(target=self._rodar, name="agendador", daemon=True)
+
+    def iniciar(self):
+        self._thread.start()
+        return self
+
+    def parar(self):
+        self._parar.set()
+        self._thread.join()
+
+    def atualizar(self, fonte):
+        versao = sync.versao(fonte)
+        try:
+            sync.sincronizar(fonte, cliente=self.cliente)
+        except Exception as erro:
+            # Fica com o último snapshot; tenta de novo na próxima rodada da fonte
+            self.erros[fonte] = erro
+            _log.warning("falha ao sincronizar %s: %s", fonte, erro)
+            return
+        self.erros.pop(fonte, None)
+        if sync.versao(fonte) != versao:
+            for recarregar in dependentes(fonte):
+                try:
+                    recarregar()
+                except Exception:
+                    _log.exception("falha ao recarregar um loader de %s", fonte)
+
+    def _rodar(self):
+        while not self._parar.is_set():
+            for fonte, intervalo in self.cadencias.items():
+                if self._parar.is_set():
+                    return
+                if time.monotonic() >= self.proxima[fonte]:
+                    self.atualizar(fonte)
+                    self.proxima[fonte] = time.monotonic() + intervalo
+            self._parar.wait(max(min(self.proxima.values()) - time.monotonic(), 1.0))
+
+
+@st.cache_resource(show_spinner=False)
+def iniciar():
+    """Sobe o agendador uma vez por processo do servidor (todas as sessões usam o mesmo)."""
+    return Agendador(CADENCIAS).iniciar()
+
+
+def _idade(segundos):
+    if segundos < 90:
+        return "agora há pouco"
+    if segundos < 5400:
+        return f"há {segundos / 60:.0f} min"
+    return f"há {segundos / 3600:.1f} h"
+
+
+def fontes_sidebar(*fontes):
+    """Garante o agendador rodando e mostra na barra lateral quando cada fonte da página foi atualizada."""
+    agendador = iniciar()
+    agora = time.time()
+    linhas = []
+    for fonte in fontes:
+        horario = sync.sincronizado_em(fonte)
+        texto = "ainda não sincronizado" if horario is None else (
+            f"{time.strftime('%d/%m %H:%M', time.localtime(horario))} ({_idade(agora - horario)})"
+        )
+        if fonte in agendador.erros:
+            texto += " · última tentativa falhou"
+        linhas.append(f"**{fonte}**: {texto}")
+    st.sidebar.caption("Dados atualizados em  \n" + "  \n".join(linhas))
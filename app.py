@@ -1,5 +1,8 @@
 import streamlit as st
 from auth import login
+from cache_compartilhado import estatisticas as estatisticas_cache
+from esquemas import relatorio_memoria
+from supabase_client import estatisticas_conexao
 
 st.set_page_config(
     page_title="Resumo Técnico · All Weather",
@@ -88,6 +91,20 @@ st.markdown("""
 - **Custo**: Plano gratuito com limite de horas; planos pagos sob demanda.
 """)
 
+conexoes = estatisticas_conexao()
+st.caption(
+    f"Supabase neste processo: {conexoes['requisicoes']} requisições, "
+    f"{conexoes['conexoes_novas']} conexões abertas, {conexoes['reutilizadas']} reaproveitadas."
+)
+cache = estatisticas_cache()
+st.caption(
+    f"Cache compartilhado: {cache['itens']} itens ({cache['MiB']} MiB), {cache['acertos']} acertos, "
+    f"{cache['vencidos']} servidos vencidos durante a recarga, {cache['cargas']} cargas, "
+    f"{cache['esperas']} esperas por carga em andamento, {cache['descartes']} descartes."
+)
+with st.expander("Memória das tabelas carregadas neste processo"):
+    st.dataframe(relatorio_memoria(), use_container_width=True, hide_index=True)
+
 st.markdown("---")
 
 st.caption("Projeto desenvolvido por Túlio · All Weather © 2025")
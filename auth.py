@@ -1,18 +1,9 @@
 import streamlit as st
-from supabase import create_client
-import os
-from dotenv import load_dotenv
-
-load_dotenv()
-
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
-
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+from supabase_client import cliente_sessao
 
 
 def _logout():
-    supabase.auth.sign_out()
+    cliente_sessao().auth.sign_out()
     st.session_state.pop("user", None)
 
 def login() -> bool:
@@ -28,7 +19,7 @@ def login() -> bool:
 
     if submitted:
         try:
-            user = supabase.auth.sign_in_with_password({"email": email, "password": password})
+            user = cliente_sessao().auth.sign_in_with_password({"email": email, "password": password})
             st.session_state["user"] = user
             st.sidebar.success("Bem-vindo!")
             st.sidebar.button("Logout", on_click=_logout)
@@ -0,0 +1,5 @@
+"""Benchmarks das otimizações, fora dos módulos do app.
+
+Rodam da raiz do repositório: ``python -m benchmarks <nome> [argumentos]``,
+com ``<nome>`` igual ao do módulo medido e argumentos inteiros na ordem de ``rodar``.
+"""
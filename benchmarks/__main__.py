@@ -0,0 +1,12 @@
+import importlib
+import sys
+
+NOMES = (
+    "cache_compartilhado", "carga_paralela", "chat_docs", "chat_retriever", "data_access", "demanda",
+    "embedding_pipeline", "esquemas", "estoque", "kpis", "vector_index",
+)
+
+if len(sys.argv) < 2 or sys.argv[1] not in NOMES:
+    print(f"Uso: python -m benchmarks <{'|'.join(NOMES)}> [argumentos]")
+    sys.exit(1)
+importlib.import_module(f"benchmarks.{sys.argv[1]}").rodar(*(int(a) for a in sys.argv[2:]))
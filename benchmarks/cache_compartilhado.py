@@ -0,0 +1,71 @@
+"""Sessões simultâneas no ``compartilhado`` contra a cópia por acerto do ``st.cache_data``."""
+import pickle
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from cache_compartilhado import CacheCompartilhado, _tamanho, compartilhado
+
+
+def rodar(sessoes=20, linhas=1_000_000):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "date": pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 365, linhas), unit="D"),
+        "sku": pd.Categorical(rng.choice([f"SKU{i:03d}" for i in range(300)], linhas)),
+        "price": rng.random(linhas) * 300,
+    })
+    cargas = []
+
+    def carregar():
+        # Ida ao Supabase simulada
+        cargas.append(1)
+        time.sleep(0.5)
+        return df
+
+    cache = CacheCompartilhado(limite_bytes=2**30)
+
+    @compartilhado(ttl=1, cache=cache)
+    def carregar_shopify():
+        return carregar()
+
+    def rodada():
+        latencias = [0.0] * sessoes
+
+        def sessao(i):
+            inicio = time.perf_counter()
+            carregar_shopify()
+            latencias[i] = time.perf_counter() - inicio
+
+        threads = [threading.Thread(target=sessao, args=(i,)) for i in range(sessoes)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        return max(latencias)
+
+    print(f"{sessoes} sessões simultâneas, DataFrame de {linhas:,} linhas, carga de 500 ms")
+    pior = rodada()
+    print(f"frio:          {len(cargas)} carga(s), pior latência {pior * 1000:6.1f} ms")
+    time.sleep(1.1)
+    cargas.clear()
+    pior = rodada()
+    time.sleep(0.6)
+    print(f"TTL vencido:   {len(cargas)} carga(s) em segundo plano, pior latência {pior * 1000:6.1f} ms")
+
+    # O que st.cache_data faz a cada acerto: desserializa uma cópia para a sessão
+    dados = pickle.dumps(df)
+    inicio = time.perf_counter()
+    for _ in range(sessoes):
+        pickle.loads(dados)
+    copia = (time.perf_counter() - inicio) / sessoes
+    inicio = time.perf_counter()
+    for _ in range(sessoes):
+        carregar_shopify()
+    compartilhada = (time.perf_counter() - inicio) / sessoes
+    print(
+        f"por acerto:    cópia pickle {copia * 1000:6.2f} ms e {_tamanho(df) / 2**20:.1f} MiB por sessão; "
+        f"compartilhado {compartilhada * 1000:6.3f} ms, sem cópia"
+    )
+    print(cache.estatisticas())
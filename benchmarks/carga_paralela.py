@@ -0,0 +1,32 @@
+"""Fontes carregadas em sequência contra ``carregar_paralelo``, com falha e timeout."""
+import time
+
+from carga_paralela import carregar_paralelo
+
+
+def rodar():
+    def fonte(segundos, falhar=False):
+        def carregar():
+            time.sleep(segundos)
+            if falhar:
+                raise ConnectionError("Supabase indisponível")
+            return segundos
+        return carregar
+
+    fontes = {"Shopify": fonte(0.8), "estoque": fonte(0.3), "vendas": fonte(0.5)}
+    inicio = time.perf_counter()
+    for carregar in fontes.values():
+        carregar()
+    print(f"em sequência:  {time.perf_counter() - inicio:5.2f} s (soma das fontes)")
+
+    inicio = time.perf_counter()
+    cargas = carregar_paralelo(fontes)
+    print(f"em paralelo:   {time.perf_counter() - inicio:5.2f} s (a fonte mais lenta)")
+
+    fontes = {**fontes, "vendas": fonte(0.2, falhar=True), "estoque": fonte(5)}
+    inicio = time.perf_counter()
+    cargas = carregar_paralelo(fontes, timeouts={"estoque": 1})
+    print(
+        f"com falhas:    {time.perf_counter() - inicio:5.2f} s, carregou {sorted(cargas.valores)}, "
+        f"falhou {({nome: str(erro) for nome, erro in cargas.erros.items()})}"
+    )
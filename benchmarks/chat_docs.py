@@ -0,0 +1,53 @@
+"""Documentos dos posts: ``iterrows`` com f-string contra os templates vetorizados de ``chat_docs``."""
+import time
+import tracemalloc
+
+from langchain_core.documents import Document
+
+from benchmarks.dados import instagram_sintetico
+from chat_docs import DOC_INSTAGRAM, documentos
+
+
+def _documentos_instagram_iterrows(df):
+    # Versão anterior (f-string por linha com iterrows), mantida só para comparação
+    docs = []
+    for _, row in df.iterrows():
+        texto = (
+            f"Post no dia {row.get('timestamp')}, "
+            f"tipo {row.get('media_type')}, "
+            f"legenda: {row.get('caption', 'sem legenda')}, "
+            f"alcance {row.get('reach', 0)}, "
+            f"curtidas {row.get('likes', 0)}, "
+            f"comentários {row.get('comments', 0)}, "
+            f"salvamentos {row.get('saved', 0)}, "
+            f"compartilhamentos {row.get('shares', 0)}, "
+            f"link: {row.get('permalink')}."
+        )
+        docs.append(Document(page_content=texto, metadata={"source": "instagram"}))
+    return docs
+
+
+def _medir(funcao):
+    # Tempo e memória em execuções separadas: o tracemalloc deixa a alocação bem mais lenta
+    inicio = time.perf_counter()
+    resultado = funcao()
+    tempo = time.perf_counter() - inicio
+    del resultado
+    tracemalloc.start()
+    resultado = funcao()
+    pico = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return resultado, tempo, pico / 2**20
+
+
+def rodar(posts=100_000):
+    df = instagram_sintetico(posts)
+
+    antigos, tempo_antigo, pico_antigo = _medir(lambda: _documentos_instagram_iterrows(df))
+
+    novos, tempo_novo, pico_novo = _medir(lambda: list(documentos(df, DOC_INSTAGRAM)))
+
+    assert [d.page_content for d in antigos] == [d.page_content for d in novos]
+    print(f"{posts:,} posts (textos idênticos)")
+    print(f"iterrows + f-string:        {tempo_antigo:6.2f} s  pico {pico_antigo:7.1f} MiB")
+    print(f"vetorizado:                 {tempo_novo:6.2f} s  pico {pico_novo:7.1f} MiB")
@@ -0,0 +1,41 @@
+"""Latência da busca do chat conforme o filtro de metadados estreita os candidatos.
+
+O corpus é o que o chat indexa (``documentos_chat``: posts e resumos, com os
+atributos do SKU nos resumos de vendas), sobre dados sintéticos.
+"""
+import time
+
+import faiss
+import numpy as np
+
+from benchmarks.dados import dados_chat
+from chat_allweather import documentos_chat
+from chat_retriever import IndiceMetadados, buscar, extrair_filtro
+from vector_index import EmbeddingFalso
+
+
+def rodar(posts=200_000, vendas=50_000, repeticoes=50):
+    docs = list(documentos_chat(dados_chat(posts, vendas)))
+    embeddings = EmbeddingFalso()
+    indice = faiss.IndexFlatL2(embeddings.dimensao)
+    indice.add(np.asarray(embeddings.embed_documents([d.page_content for d in docs]), dtype="float32"))
+    metadados = IndiceMetadados(d.metadata for d in docs)
+
+    print(f"{len(docs):,} documentos do chat ({posts:,} posts + resumos), índice flat, média de {repeticoes} buscas")
+    for pergunta in (
+        "como foram os resultados?",
+        "posts de 2024",
+        "reels de junho de 2024",
+        "vendas de shorts pretos",
+        "vendas de shorts pretos tamanho M",
+        "vendas de shorts pretos longos com compressão tamanho M",
+    ):
+        vetor = embeddings.embed_query(pergunta)
+        inicio = time.perf_counter()
+        for _ in range(repeticoes):
+            mascara = metadados.mascara(extrair_filtro(pergunta))
+            posicoes = buscar(indice, vetor, 4, mascara)
+        tempo = (time.perf_counter() - inicio) / repeticoes * 1000
+        candidatos = len(docs) if mascara is None else int(mascara.sum())
+        assert mascara is None or mascara[posicoes].all()
+        print(f"{candidatos:9,} candidatos  {tempo:7.2f} ms  {pergunta}")
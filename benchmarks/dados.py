@@ -0,0 +1,59 @@
+"""Dados sintéticos compartilhados pelos benchmarks."""
+import numpy as np
+import pandas as pd
+
+import rollups
+from chat_router import DadosChat
+from date_filter import indexar
+from sku import decodificar_skus
+
+
+def shopify_sintetico(linhas, semente=0):
+    """Linhas de venda sintéticas, já com os atributos do SKU."""
+    rng = np.random.default_rng(semente)
+    skus = [f"AW_ES_{t}_{c}_{s}" for t in ("LC", "CC", "LS", "CS") for c in ("PR", "AZ", "BR") for s in ("P", "M", "G")]
+    df = pd.DataFrame({
+        "id": np.arange(linhas),
+        "date": pd.to_datetime("2024-01-01") + pd.to_timedelta(rng.integers(0, 365, linhas), unit="D"),
+        "sku": rng.choice(skus + ["BRINDE"], linhas),
+        "price": rng.integers(100, 40000, linhas) / 100,
+        "order_number": rng.integers(1000, 90000, linhas),
+    })
+    return decodificar_skus(df, apenas_validos=False)
+
+
+def instagram_sintetico(posts, semente=0):
+    """Posts sintéticos com as mesmas colunas e o mesmo índice de ``carregar_dados_instagram``."""
+    rng = np.random.default_rng(semente)
+    produtos = ("shorts de corrida", "shorts de compressão", "camiseta dry", "kit treino", "bermuda de praia")
+    cores = ("preto", "azul", "branco", "verde")
+    chamadas = ("lançamento", "promoção", "bastidores", "depoimento", "dica de treino", "sorteio")
+    reach = rng.integers(300, 60_000, posts)
+    df = pd.DataFrame({
+        "id": np.arange(posts),
+        "timestamp": pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 365 * 86400, posts), unit="s"),
+        "media_type": pd.Categorical(rng.choice(["IMAGE", "VIDEO", "CAROUSEL_ALBUM"], posts)),
+        "caption": [
+            f"{chamadas[c]}: {produtos[p]} {cores[k]} #allweather #{i % 97}"
+            for i, (c, p, k) in enumerate(zip(rng.integers(0, 6, posts), rng.integers(0, 5, posts), rng.integers(0, 4, posts)))
+        ],
+        "permalink": [f"https://www.instagram.com/p/{i:011x}/" for i in range(posts)],
+        "reach": reach,
+        "likes": rng.binomial(reach, 0.04),
+        "comments": rng.binomial(reach, 0.004),
+        "saved": rng.binomial(reach, 0.006),
+        "shares": rng.binomial(reach, 0.003),
+    })
+    df["Data"] = df["timestamp"].dt.date
+    df["dia_semana"] = df["timestamp"].dt.day_name()
+    df["hora"] = df["timestamp"].dt.hour
+    return indexar(df, "timestamp")
+
+
+def dados_chat(posts, vendas, semente=0):
+    """``DadosChat`` sintético: posts, linhas de venda e o agregado diário delas."""
+    shopify = shopify_sintetico(vendas, semente)
+    diario = shopify.assign(date=shopify["date"].dt.normalize()).groupby("date").agg(
+        **rollups.ROLLUPS["Shopify"].medidas
+    ).reset_index()
+    return DadosChat(shopify=shopify, instagram=instagram_sintetico(posts, semente), diario_shopify=diario)
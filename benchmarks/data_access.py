@@ -0,0 +1,63 @@
+"""PostgREST local: JSON em dicts contra CSV direto para Arrow."""
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+from supabase import create_client
+
+from data_access import TAMANHO_PAGINA, Tabela, buscar_linhas, carregar_tabela, servidor_postgrest_falso, tipar
+
+
+def _shopify_bruto(linhas, semente=0):
+    # Linhas como o PostgREST devolve: datas e instantes em texto ISO
+    rng = np.random.default_rng(semente)
+    skus = [f"AW_ES_{t}_{c}_{s}" for t in ("LC", "CC", "LS", "CS") for c in ("PR", "AZ", "BR") for s in ("P", "M", "G")]
+    instantes = pd.Timestamp("2024-01-01", tz="UTC") + pd.to_timedelta(rng.integers(0, 365 * 86400, linhas), unit="s")
+    return pd.DataFrame({
+        "id": np.arange(1, linhas + 1),
+        "date": instantes.strftime("%Y-%m-%d"),
+        "created_at": instantes.strftime("%Y-%m-%dT%H:%M:%S+00:00"),
+        "sku": rng.choice(skus + ["BRINDE"], linhas),
+        "price": rng.integers(100, 40000, linhas) / 100,
+        "order_number": rng.integers(1000, 90000, linhas),
+        "customer_email": [f"cliente{i}@exemplo.com" for i in rng.integers(0, 50000, linhas)],
+    })
+
+
+def rodar(linhas=500_000):
+    tipos = {
+        "id": "bigint", "date": "date", "created_at": "timestamp with time zone", "sku": "text",
+        "price": "numeric", "order_number": "bigint", "customer_email": "text",
+    }
+    servidor = servidor_postgrest_falso({"Shopify": _shopify_bruto(linhas)}, {"Shopify": tipos})
+    cliente = create_client(servidor.url, "eyJhbGciOiJIUzI1NiJ9.e30.falsa")
+    tabela = Tabela(
+        "Shopify", colunas=("date", "created_at", "sku", "price", "order_number", "customer_email"),
+        datas={"date": "%Y-%m-%d", "created_at": None}, numeros=("price",),
+    )
+
+    def por_dicts():
+        # Caminho anterior: JSON -> lista de dicts -> DataFrame -> to_datetime/to_numeric
+        return tipar(pd.DataFrame(buscar_linhas(cliente, tabela), columns=list(tabela.colunas)), tabela)
+
+    def por_arrow():
+        return carregar_tabela(tabela, cliente)
+
+    print(f"Shopify sintético, {linhas:,} linhas em páginas de {TAMANHO_PAGINA} (servidor local, respostas prontas)")
+    resultados = {}
+    for rotulo, funcao in (("JSON -> dicts", por_dicts), ("CSV -> Arrow", por_arrow)):
+        funcao()  # aquece o cache de respostas do servidor
+        inicio = time.perf_counter()
+        df = funcao()
+        tempo = time.perf_counter() - inicio
+        # tracemalloc deixa a alocação lenta: o pico sai de uma segunda execução
+        tracemalloc.start()
+        funcao()
+        pico = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        resultados[rotulo] = df
+        print(f"{rotulo:14s} {tempo:6.2f} s  pico de objetos Python {pico / 2**20:7.1f} MiB  DataFrame {df.memory_usage(deep=True).sum() / 2**20:6.1f} MiB")
+    antes, depois = resultados.values()
+    assert (antes["created_at"] == depois["created_at"]).all() and (antes["price"] == depois["price"]).all()
+    servidor.shutdown()
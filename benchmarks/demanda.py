@@ -0,0 +1,19 @@
+"""Previsão de demanda num processo só contra o pool de processos (na primeira chamada e reaproveitado)."""
+import os
+import time
+
+import numpy as np
+
+from demanda import prever
+
+
+def rodar(skus=100, dias=540):
+    rng = np.random.default_rng(0)
+    series = {f"SKU{i:03d}": rng.poisson(rng.uniform(0.2, 5), dias).astype("float64") for i in range(skus)}
+    # Com uma CPU só o prever ajusta em série; aqui o pool roda mesmo assim, para medir o custo dele
+    processos = max(2, os.cpu_count() or 1)
+    print(f"{skus} SKUs x {dias} dias, {os.cpu_count()} CPUs")
+    for rotulo, n in (("1 processo", 1), (f"pool de {processos}, 1ª chamada", processos), ("pool reaproveitado", processos)):
+        inicio = time.perf_counter()
+        prever(series, processos=n)
+        print(f"{rotulo:24s}: {time.perf_counter() - inicio:6.2f} s")
@@ -0,0 +1,48 @@
+"""Vazão do pipeline de embedding por tamanho de lote e concorrência, e retomada pelos checkpoints."""
+import hashlib
+import os
+import shutil
+import tempfile
+import time
+
+import httpx
+
+from embedding_pipeline import ConfigPipeline, EmbeddingsHTTP, embed_com_checkpoint, limpar_checkpoints, servidor_falso
+
+
+def rodar(quantidade=20_000):
+    textos = {hashlib.sha256(str(i).encode()).hexdigest(): f"documento {i} " * (1 + i % 5) for i in range(quantidade)}
+    pasta = tempfile.mkdtemp()
+
+    print(f"{quantidade:,} textos, servidor com 50 ms + 0,5 ms/texto por requisição e no máximo 4 simultâneas")
+    for tamanho_lote, concorrencia in ((2048, 1), (256, 1), (256, 4), (256, 8)):
+        servidor = servidor_falso()
+        config = ConfigPipeline(tamanho_lote=tamanho_lote, concorrencia=concorrencia, espera_inicial=0.05)
+        contadores = {}
+        inicio = time.perf_counter()
+        embed_com_checkpoint(textos, EmbeddingsHTTP(servidor.url), os.path.join(pasta, "ckpt"), "falso", config, contadores)
+        tempo = time.perf_counter() - inicio
+        limpar_checkpoints(os.path.join(pasta, "ckpt"))
+        servidor.shutdown()
+        print(
+            f"lote {tamanho_lote:5d} · concorrência {concorrencia}: {quantidade / tempo:9,.0f} textos/s "
+            f"({servidor.requisicoes} requisições, {contadores['limite_taxa']} respostas 429)"
+        )
+
+    # Interrupção no meio: o servidor cai depois de 10 requisições e a segunda execução retoma
+    config = ConfigPipeline(tamanho_lote=256, concorrencia=1)
+    servidor = servidor_falso(falhar_apos=10)
+    try:
+        embed_com_checkpoint(textos, EmbeddingsHTTP(servidor.url), os.path.join(pasta, "ckpt"), "falso", config)
+    except httpx.HTTPStatusError as erro:
+        print(f"primeira execução interrompida: HTTP {erro.response.status_code}")
+    servidor.shutdown()
+    servidor = servidor_falso()
+    contadores = {}
+    vetores = embed_com_checkpoint(textos, EmbeddingsHTTP(servidor.url), os.path.join(pasta, "ckpt"), "falso", config, contadores)
+    servidor.shutdown()
+    print(
+        f"retomada: {contadores['reaproveitados']:,} textos vieram dos checkpoints, "
+        f"{servidor.requisicoes} requisições novas, {len(vetores):,} vetores no total"
+    )
+    shutil.rmtree(pasta, ignore_errors=True)
@@ -0,0 +1,45 @@
+"""Memória do metaAds antes e depois do esquema compacto de ``esquemas``."""
+import time
+
+import numpy as np
+import pandas as pd
+
+from data_access import Tabela, tipar
+from esquemas import _CONTAGENS_META, _TAXAS_META, memoria
+
+
+def _meta_sintetico(linhas, semente=0):
+    rng = np.random.default_rng(semente)
+    anuncios = rng.integers(0, 400, linhas)
+    df = pd.DataFrame({
+        "date_start": pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 365, linhas), unit="D"),
+        "ad_id": [f"2384{a:011d}" for a in anuncios],
+        "adset_id": [f"2385{a // 4:011d}" for a in anuncios],
+        "campaign_id": [f"2386{a // 40:011d}" for a in anuncios],
+        "ad_name": [f"AW | Criativo {a:03d} | Shorts" for a in anuncios],
+        "adset_name": [f"Conjunto {a // 4:03d} - Público amplo" for a in anuncios],
+        "campaign_name": [f"[CONV] Campanha {a // 40:02d}" for a in anuncios],
+        "spend": rng.gamma(2, 20, linhas).round(2),
+    })
+    for coluna in _CONTAGENS_META:
+        df[coluna] = rng.poisson(200, linhas).astype("float64")
+    for coluna in _TAXAS_META:
+        df[coluna] = rng.random(linhas)
+    return df
+
+
+def rodar(linhas=500_000):
+    bruto = _meta_sintetico(linhas)
+    tabela = Tabela("metaAds", datas={"date_start": None}, numeros=_CONTAGENS_META + _TAXAS_META + ("spend",))
+    # "Antes": só as conversões de data e número, como era até aqui
+    antes = tipar(bruto.copy(), Tabela("outra", datas=tabela.datas, numeros=tabela.numeros))
+    inicio = time.perf_counter()
+    depois = tipar(bruto.copy(), tabela)
+    tempo = time.perf_counter() - inicio
+
+    print(f"metaAds sintético, {linhas:,} linhas; esquema aplicado em {tempo * 1000:.0f} ms")
+    print(f"{'coluna':20s} {'antes':>10s} {'depois':>10s}  tipo")
+    por_coluna_antes, por_coluna_depois = antes.memory_usage(deep=True), depois.memory_usage(deep=True)
+    for coluna in bruto.columns:
+        print(f"{coluna:20s} {por_coluna_antes[coluna] / 2**20:9.2f}M {por_coluna_depois[coluna] / 2**20:9.2f}M  {depois[coluna].dtype}")
+    print(f"{'total':20s} {memoria(antes) / 2**20:9.2f}M {memoria(depois) / 2**20:9.2f}M")
@@ -0,0 +1,44 @@
+"""Saldo de estoque: ``groupby.last`` no histórico contra a tabela materializada e o índice por data."""
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from estoque import HistoricoEstoque, _ordenar, _ultimos
+
+
+def rodar(skus=100, dias=730, snapshots_por_dia=4):
+    rng = np.random.default_rng(0)
+    total = skus * dias * snapshots_por_dia
+    df = pd.DataFrame({
+        "timestamp": pd.Timestamp("2023-01-01", tz="UTC") + pd.to_timedelta(rng.integers(0, dias * 86400, total), unit="s"),
+        "sku": np.repeat([f"SKU{i:03d}" for i in range(skus)], dias * snapshots_por_dia),
+        "inventory_quantity": rng.integers(0, 500, total),
+    })
+
+    inicio = time.perf_counter()
+    antigo = df.sort_values("timestamp").groupby("sku", as_index=False).last()
+    tempo_antigo = time.perf_counter() - inicio
+
+    historico = _ordenar(df)
+    ultimos = _ultimos(historico)
+    caminho = os.path.join(tempfile.mkdtemp(), "atual.parquet")
+    ultimos.to_parquet(caminho, index=False)
+    inicio = time.perf_counter()
+    pd.read_parquet(caminho)
+    tempo_atual = time.perf_counter() - inicio
+    os.remove(caminho)
+    assert (antigo["inventory_quantity"].to_numpy() == ultimos["stock"].to_numpy()).all()
+
+    indice = HistoricoEstoque(historico)
+    inicio = time.perf_counter()
+    for dia in pd.date_range("2023-01-02", periods=50, freq="7D"):
+        indice.em(dia)
+    tempo_em = (time.perf_counter() - inicio) / 50
+
+    print(f"{total:,} snapshots ({skus} SKUs x {dias} dias x {snapshots_por_dia}/dia)")
+    print(f"sort + groupby.last no histórico: {tempo_antigo * 1000:8.1f} ms")
+    print(f"leitura da tabela 'atual':        {tempo_atual * 1000:8.1f} ms")
+    print(f"saldo numa data (índice):         {tempo_em * 1000:8.1f} ms")
@@ -0,0 +1,39 @@
+"""Métricas por linha com ``apply`` contra o motor vetorizado de ``kpis``."""
+import time
+
+import numpy as np
+import pandas as pd
+
+from kpis import KPIS_GA, calcular_kpis, serie_diaria
+
+
+def rodar(linhas=1_000_000):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "date": pd.to_datetime("2024-01-01") + pd.to_timedelta(rng.integers(0, 365, linhas), unit="D"),
+        "adCost": rng.gamma(2.0, 50.0, linhas),
+        "adClicks": rng.integers(0, 200, linhas).astype(float),
+        "adImpressions": rng.integers(0, 20000, linhas).astype(float),
+        "receitaCompras": rng.gamma(1.5, 120.0, linhas),
+    })
+    df.loc[rng.random(linhas) < 0.05, ["adCost", "adClicks", "adImpressions"]] = 0
+
+    inicio = time.perf_counter()
+    antigo = pd.DataFrame({
+        "ROAS": df.apply(lambda x: x['receitaCompras']/x['adCost'] if x['adCost'] > 0 else 0, axis=1),
+        "CTR": df.apply(lambda x: (x['adClicks']/x['adImpressions'])*100 if x['adImpressions'] > 0 else 0, axis=1),
+        "CPM": df.apply(lambda x: (x['adCost']/x['adImpressions'])*1000 if x['adImpressions'] > 0 else 0, axis=1),
+        "CPC": df.apply(lambda x: x['adCost']/x['adClicks'] if x['adClicks'] > 0 else 0, axis=1),
+    })
+    antigo.insert(0, "date", df["date"])
+    antigo.groupby("date").mean()
+    tempo_antigo = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    calcular_kpis(df, KPIS_GA)
+    serie_diaria(df, KPIS_GA)
+    tempo_novo = time.perf_counter() - inicio
+
+    print(f"{linhas:,} linhas")
+    print(f"apply por linha + média diária: {tempo_antigo:8.2f} s")
+    print(f"vetorizado + série ponderada:   {tempo_novo:8.2f} s  ({tempo_antigo / tempo_novo:,.0f}x)")
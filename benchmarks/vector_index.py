@@ -0,0 +1,64 @@
+"""Tamanho, construção, latência e recall@k de cada tipo de índice FAISS contra o flat.
+
+O corpus é o que o chat indexa (``documentos_chat``: um documento por post e os
+resumos), sobre dados sintéticos; ``posts`` define o tamanho.
+"""
+import os
+import shutil
+import tempfile
+import time
+
+import faiss
+import numpy as np
+
+from benchmarks.dados import dados_chat
+from chat_allweather import documentos_chat
+from vector_index import (
+    FLAGS_LEITURA, TIPOS_INDICE, EmbeddingFalso, _ajustar_nprobe, criar_indice_faiss, especificacao_indice,
+)
+
+
+def _textos(posts, vendas, semente=0):
+    return [doc.page_content for doc in documentos_chat(dados_chat(posts, vendas, semente))]
+
+
+def rodar(posts=20_000, vendas=50_000, consultas=200, k=4):
+    embeddings = EmbeddingFalso()
+    vetores = np.asarray(embeddings.embed_documents(_textos(posts, vendas)), "float32")
+    # Perguntas parecidas com o corpus, mas fora dele
+    perguntas = np.asarray(embeddings.embed_documents(_textos(consultas, 1_000, semente=1)[:consultas]), "float32")
+    pasta = tempfile.mkdtemp()
+
+    def medir(indice, referencia, nprobe=None):
+        if nprobe is not None:
+            _ajustar_nprobe(indice, nprobe)
+        inicio = time.perf_counter()
+        # Uma pergunta por vez, como no chat
+        vizinhos = np.vstack([indice.search(p[None, :], k)[1] for p in perguntas])
+        latencia = (time.perf_counter() - inicio) / consultas * 1000
+        # Distância exata de cada vizinho devolvido; empates com o k-ésimo do flat contam como acerto
+        distancias = ((vetores[vizinhos] - perguntas[:, None, :]) ** 2).sum(axis=2)
+        if referencia is None:
+            return distancias[:, -1], latencia, 1.0
+        return referencia, latencia, np.mean(distancias <= referencia[:, None] + 1e-5)
+
+    print(f"{len(vetores):,} documentos do chat ({posts:,} posts + resumos), {vetores.shape[1]} dimensões, "
+          f"{consultas} perguntas, recall@{k} contra o flat")
+    # ``referencia``: distância do k-ésimo vizinho exato de cada pergunta
+    referencia = None
+    for tipo in TIPOS_INDICE:
+        especificacao = especificacao_indice(tipo, len(vetores), embeddings.dimensao)
+        inicio = time.perf_counter()
+        indice = criar_indice_faiss(vetores, especificacao, embeddings.dimensao)
+        indice.add(vetores)
+        construcao = time.perf_counter() - inicio
+        caminho = os.path.join(pasta, f"{tipo}.faiss")
+        faiss.write_index(indice, caminho)
+        indice = faiss.read_index(caminho, FLAGS_LEITURA)
+        tamanho = os.path.getsize(caminho) / 2**20
+        for nprobe in ((1, 4, 16, 64) if especificacao.startswith("IVF") else (None,)):
+            referencia, latencia, recall = medir(indice, referencia, nprobe)
+            rotulo = especificacao + (f" nprobe={nprobe}" if nprobe else "")
+            print(f"{tipo:6s} {rotulo:24s} {tamanho:8.1f} MiB  construção {construcao:6.2f} s  "
+                  f"{latencia:7.3f} ms/busca  recall {recall:.3f}")
+    shutil.rmtree(pasta, ignore_errors=True)
@@ -0,0 +1,186 @@
+import functools
+import inspect
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+
+import pandas as pd
+
+# Teto do cache do processo; acima dele sai o item usado há mais tempo
+LIMITE_MB = float(os.getenv("CACHE_LIMITE_MB", "1024"))
+
+
+@dataclass
+class _Entrada:
+    valor: object
+    criado: float
+    tamanho: int
+
+
+def _tamanho(valor):
+    """Bytes aproximados de ``valor``: DataFrames (também dentro de tuplas/dataclasses) contam pelo conteúdo."""
+    if isinstance(valor, pd.DataFrame):
+        return int(valor.memory_usage(deep=True).sum())
+    if isinstance(valor, pd.Series):
+        return int(valor.memory_usage(deep=True))
+    if isinstance(valor, (tuple, list)):
+        return sum(_tamanho(v) for v in valor)
+    if hasattr(valor, "__dict__"):
+        return sum(_tamanho(v) for v in vars(valor).values())
+    return sys.getsizeof(valor)
+
+
+def _compartilhar(valor):
+    # Cópia rasa: os dados são os mesmos para todas as sessões e, com copy-on-write
+    # (padrão no pandas 3), quem altera o DataFrame recebido altera só a própria cópia
+    if isinstance(valor, (pd.DataFrame, pd.Series)):
+        return valor.copy(deep=False)
+    return valor
+
+
+class CacheCompartilhado:
+    """Cache do processo para os loaders pesados, o mesmo para todas as sessões.
+
+    - Uma carga por chave de cada vez: quem pede durante a carga espera o mesmo resultado.
+    - Com o TTL vencido, devolve o valor antigo na hora e recarrega em segundo plano.
+    - Limitado em bytes; estourou, descarta o item usado há mais tempo.
+    """
+
+    def __init__(self, limite_bytes, atualizadores=2):
+        self.limite_bytes = limite_bytes
+        self.bytes = 0
+        self._entradas = OrderedDict()
+        self._em_andamento = {}
+        self._trava = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=atualizadores, thread_name_prefix="cache")
+        self._contadores = {"acertos": 0, "vencidos": 0, "cargas": 0, "esperas": 0, "descartes": 0}
+
+    def obter(self, chave, carregar, ttl=None):
+        with self._trava:
+            entrada = self._entradas.get(chave)
+            if entrada is not None:
+                self._entradas.move_to_end(chave)
+                if ttl is None or time.monotonic() - entrada.criado < ttl:
+                    self._contadores["acertos"] += 1
+                    return entrada.valor
+                self._contadores["vencidos"] += 1
+                if chave not in self._em_andamento:
+                    futuro = self._em_andamento[chave] = Future()
+                    self._pool.submit(self._carregar, chave, carregar, futuro)
+                return entrada.valor
+            futuro = self._em_andamento.get(chave)
+            dono = futuro is None
+            if dono:
+                futuro = self._em_andamento[chave] = Future()
+            else:
+                self._contadores["esperas"] += 1
+        if dono:
+            self._carregar(chave, carregar, futuro)
+        return futuro.result()
+
+    def _carregar(self, chave, carregar, futuro):
+        try:
+            valor = carregar()
+        except BaseException as erro:
+            # Numa recarga em segundo plano o valor antigo continua valendo; o próximo pedido tenta de novo
+            with self._trava:
+                self._em_andamento.pop(chave, None)
+            futuro.set_exception(erro)
+            return
+        tamanho = _tamanho(valor)
+        with self._trava:
+            self._contadores["cargas"] += 1
+            antiga = self._entradas.pop(chave, None)
+            if antiga is not None:
+                self.bytes -= antiga.tamanho
+            self._entradas[chave] = _Entrada(valor, time.monotonic(), tamanho)
+            self.bytes += tamanho
+            self._em_andamento.pop(chave, None)
+            while self.bytes > self.limite_bytes and len(self._entradas) > 1:
+                _, descartada = self._entradas.popitem(last=False)
+                self.bytes -= descartada.tamanho
+                self._contadores["descartes"] += 1
+        futuro.set_result(valor)
+
+    def recarregar(self, chave, carregar):
+        """Carrega de novo mesmo que o valor esteja válido e troca a entrada de uma vez.
+
+        Quem lê durante a recarga continua recebendo o valor anterior; se já
+        houver uma carga da chave em andamento, só espera por ela.
+        """
+        with self._trava:
+            futuro = self._em_andamento.get(chave)
+            dono = futuro is None
+            if dono:
+                futuro = self._em_andamento[chave] = Future()
+        if dono:
+            self._carregar(chave, carregar, futuro)
+        return futuro.result()
+
+    def limpar(self, prefixo=None):
+        """Remove tudo, ou só as chaves de uma função (``prefixo`` = identificador da função)."""
+        with self._trava:
+            for chave in [c for c in self._entradas if prefixo is None or c[0] == prefixo]:
+                self.bytes -= self._entradas.pop(chave).tamanho
+
+    def estatisticas(self):
+        with self._trava:
+            return {**self._contadores, "itens": len(self._entradas), "MiB": round(self.bytes / 2**20, 1)}
+
+
+_cache = CacheCompartilhado(int(LIMITE_MB * 2**20))
+
+# Fonte (tabela do Supabase) -> {função: recarregar}; o agendador recarrega estes loaders
+# quando a fonte muda. Cada rerun da página troca a função registrada pela mais nova.
+_dependentes = {}
+_trava_dependentes = threading.Lock()
+
+
+def dependentes(fonte):
+    """Funções de recarga dos loaders que declararam ``fonte``."""
+    with _trava_dependentes:
+        return list(_dependentes.get(fonte, {}).values())
+
+
+def compartilhado(ttl=600, fontes=(), cache=None):
+    """Decorador no lugar de ``st.cache_data`` para loaders pesados (ver ``CacheCompartilhado``).
+
+    A chave é a função (arquivo + nome, estável entre reruns da página) e os
+    argumentos; como no ``st.cache_data``, argumentos com ``_`` na frente ficam
+    fora da chave. ``ttl=None`` não expira. O resultado não é copiado por
+    sessão: trate-o como somente leitura. ``fontes`` lista as tabelas de que o
+    loader depende; o agendador (``agendador.py``) o recarrega quando elas mudam.
+    """
+    def decorar(funcao):
+        assinatura = inspect.signature(funcao)
+        nome = (funcao.__code__.co_filename, funcao.__qualname__)
+
+        def chave(args, kwargs):
+            argumentos = assinatura.bind(*args, **kwargs)
+            argumentos.apply_defaults()
+            return nome, tuple((k, v) for k, v in argumentos.arguments.items() if not k.startswith("_"))
+
+        @functools.wraps(funcao)
+        def envolver(*args, **kwargs):
+            return _compartilhar((cache or _cache).obter(chave(args, kwargs), lambda: funcao(*args, **kwargs), ttl))
+
+        def recarregar(*args, **kwargs):
+            return _compartilhar((cache or _cache).recarregar(chave(args, kwargs), lambda: funcao(*args, **kwargs)))
+
+        envolver.clear = lambda: (cache or _cache).limpar(nome)
+        envolver.recarregar = recarregar
+        if fontes:
+            with _trava_dependentes:
+                for fonte in fontes:
+                    _dependentes.setdefault(fonte, {})[nome] = recarregar
+        return envolver
+    return decorar
+
+
+def estatisticas():
+    """Acertos, valores vencidos servidos, cargas, esperas por carga em andamento e descartes do cache do processo."""
+    return _cache.estatisticas()
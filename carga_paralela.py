@@ -0,0 +1,98 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as TempoEsgotado
+from dataclasses import dataclass, field
+
+import sync
+from data_access import Tabela, prazo
+
+# Espera máxima por fonte (s); quem passar disso sai como falha e a página segue com o resto
+TIMEOUT = 60
+
+# Pool do processo: as cargas são idas à rede, então threads bastam
+_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="carga")
+
+# Carga ainda em andamento de cada fonte: um rerun reaproveita a que ficou para trás em vez de
+# mandar outra, então cada fonte ocupa no máximo uma thread do pool
+_pendentes = {}
+_trava = threading.Lock()
+
+
+@dataclass
+class Cargas:
+    """Resultado de ``carregar_paralelo``: o que carregou, o que falhou e quanto cada fonte levou."""
+    valores: dict = field(default_factory=dict)
+    erros: dict = field(default_factory=dict)
+    tempos: dict = field(default_factory=dict)
+
+    def __getitem__(self, nome):
+        # Acessar uma fonte que falhou relança o erro dela
+        if nome in self.erros:
+            raise self.erros[nome]
+        return self.valores[nome]
+
+    def get(self, nome, padrao=None):
+        return self.valores.get(nome, padrao)
+
+
+def _identificar(nome, fonte):
+    # Mesma fonte entre reruns: o nome dado pela página mais a Tabela (pelo que ela lê)
+    # ou o código do loader (o da função envolvida, se decorado)
+    if isinstance(fonte, Tabela):
+        return nome, fonte.nome, fonte.colunas
+    codigo = getattr(fonte, "__wrapped__", fonte).__code__
+    return nome, codigo.co_filename, codigo.co_firstlineno
+
+
+def _enviar(nome, fonte, limite):
+    identificador = _identificar(nome, fonte)
+    with _trava:
+        futuro = _pendentes.get(identificador)
+        novo = futuro is None
+        if novo:
+            carregar = (lambda: sync.carregar(fonte)) if isinstance(fonte, Tabela) else fonte
+            futuro = _pendentes[identificador] = _pool.submit(_medir, carregar, limite)
+    if novo:
+        # Fora da trava: se a carga já acabou, o callback roda aqui mesmo
+        futuro.add_done_callback(lambda _: _liberar(identificador, futuro))
+    return futuro
+
+
+def _liberar(identificador, futuro):
+    with _trava:
+        if _pendentes.get(identificador) is futuro:
+            del _pendentes[identificador]
+
+
+def carregar_paralelo(fontes, timeout=TIMEOUT, timeouts=None):
+    """Carrega várias fontes independentes ao mesmo tempo e espera no máximo ``timeout`` por cada uma.
+
+    ``fontes`` mapeia nome -> ``Tabela`` (lida com ``sync.carregar``) ou uma
+    função sem argumentos (um loader da página). ``timeouts`` sobrepõe o
+    limite de fontes específicas. Uma fonte que falha ou estoura o limite vai
+    para ``erros`` sem derrubar as outras. As idas ao PostgREST da carga usam o
+    tempo que resta como timeout (``data_access.prazo``), então a thread é
+    liberada perto do limite; enquanto isso, pedir a mesma fonte de novo espera
+    essa carga em vez de abrir outra.
+    """
+    timeouts = timeouts or {}
+    inicio = time.monotonic()
+    futuros = {nome: _enviar(nome, fonte, inicio + timeouts.get(nome, timeout)) for nome, fonte in fontes.items()}
+    cargas = Cargas()
+    for nome, futuro in futuros.items():
+        restante = inicio + timeouts.get(nome, timeout) - time.monotonic()
+        try:
+            cargas.valores[nome], cargas.tempos[nome] = futuro.result(timeout=max(restante, 0))
+        except TempoEsgotado:
+            cargas.erros[nome] = TimeoutError(f"{nome}: sem resposta em {timeouts.get(nome, timeout)} s")
+        except Exception as erro:
+            cargas.erros[nome] = erro
+    return cargas
+
+
+def _medir(carregar, limite):
+    inicio = time.perf_counter()
+    with prazo(limite):
+        valor = carregar()
+    return valor, time.perf_counter() - inicio
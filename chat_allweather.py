@@ -1,134 +1,146 @@
 import streamlit as st
-import pandas as pd
-from supabase import create_client
-from langchain_openai import OpenAIEmbeddings, ChatOpenAI
-from langchain.vectorstores import FAISS
-from langchain.docstore.document import Document
-from langchain.chains import RetrievalQA
 from dotenv import load_dotenv
 from auth import login
+from agendador import fontes_sidebar
+from cache_compartilhado import compartilhado
+from carga_paralela import carregar_paralelo
+from chat_cache import CacheRespostas, chave_resposta
+from chat_docs import DOC_INSTAGRAM, documentos
+from chat_llm import Cronometro, criar_llm, nome_llm, transmitir
+from chat_resumos import resumos
+from chat_retriever import RetrieverFiltrado
+from chat_router import DadosChat, responder
+from data_access import Tabela
+from instagram import carregar_dados_instagram
+from sku import decodificar_skus
+import rollups
+from vector_index import IndiceVazio, carregar_ou_construir_indice, criar_embeddings
 import os
 
 load_dotenv()
 
 OPENAI_API_KEY = os.getenv("OPENAI_KEY")
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
 
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+# Vai como mensagem de sistema; a busca no índice usa só a pergunta
+INSTRUCOES = """\
+Você é um analista de dados sênior da AllWeather, uma marca de roupas masculinas premium.
+
+Seu papel:
+- Gerar respostas extremamente detalhadas, com tom profissional, consultivo e de alto nível analítico.
+- Sempre incluir dados concretos como números, datas, tendências, análises comparativas e insights baseados nos dados disponíveis.
+- Suas respostas devem ser claras, bem estruturadas, como se fossem parte de um relatório executivo ou de Business Intelligence.
+- Quando responder perguntas sobre Instagram, leve em conta dados como: tipo de post (carrossel, reels, feed), alcance, curtidas, comentários, dia da semana, hora de postagem, salvamentos e compartilhamentos (se disponíveis).
+- Quando responder perguntas sobre vendas, leve em conta dados como: tamanho, compressão, comprimento, cor, SKU, ticket médio, quantidade vendida, data da venda e SKU mais vendidos.
+- Se uma informação não estiver presente nos dados, informe claramente que ela não está disponível. Nunca invente dados.
+- Utilize sempre um tom formal, profissional e de consultoria de dados.
+"""
+
+SHOPIFY = Tabela("Shopify", colunas=("id", "date", "sku", "price", "order_number"), datas={"date": None}, numeros=("price",))
+
+
+# =============================
+# Carregar dados do Supabase
+# =============================
+
+@compartilhado(ttl=None, fontes=("Shopify", "Posts"))
+def carregar_dados():
+    # Atributos do SKU (cor, tamanho, ...) vêm do decodificador compartilhado com os dashboards;
+    # posts e receita diária são os mesmos dados que os dashboards usam. As três cargas vão em
+    # paralelo; o chat precisa de todas, então uma falha é relançada (e nada fica no cache)
+    cargas = carregar_paralelo({
+        "shopify": SHOPIFY,
+        "instagram": carregar_dados_instagram,
+        "diario_shopify": lambda: rollups.carregar("Shopify"),
+    })
+    return DadosChat(
+        shopify=decodificar_skus(cargas["shopify"], apenas_validos=False),
+        instagram=cargas["instagram"],
+        diario_shopify=cargas["diario_shopify"],
+    )
 
 
+def documentos_chat(dados):
+    """Um documento por post e os resumos (mês, SKU, tipo de mídia, dia da semana).
 
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+    Vendas entram só pelos resumos: um documento por linha de pedido não
+    responde bem a perguntas de total e custava a maior parte dos embeddings.
+    """
+    yield from documentos(dados.instagram, DOC_INSTAGRAM)
+    yield from resumos(dados.shopify, dados.instagram, dados.diario_shopify)
 
 
-def chat_page():
-    if not login():
-        st.stop()
-    st.title("Chat AllWeather")
+def gerar_documentos():
+    """Os documentos do chat (``documentos_chat``) sobre os dados carregados."""
+    yield from documentos_chat(carregar_dados())
 
-    # =============================
-    # Configurações
-    # ============================
+# =============================
+# Vector store persistente
+# =============================
 
-    supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+@st.cache_resource(show_spinner=False)
+def carregar_vectorstore(versoes):
+    # Os documentos só mudam quando os dados mudam: ``versoes`` (Shopify, Posts) é a chave.
+    # O índice fica em disco; aqui só evitamos reler o disco a cada rerun do mesmo processo
+    return carregar_ou_construir_indice(gerar_documentos(), criar_embeddings(OPENAI_API_KEY))
 
-    # =============================
-    # Funções auxiliares
-    # =============================
 
-    def dataframe_para_documentos_instagram(df):
-        documentos = []
-        for _, row in df.iterrows():
-            texto = (
-                f"Post no dia {row.get('timestamp')}, "
-                f"tipo {row.get('media_type')}, "
-                f"legenda: {row.get('caption', 'sem legenda')}, "
-                f"alcance {row.get('reach', 0)}, "
-                f"curtidas {row.get('likes', 0)}, "
-                f"comentários {row.get('comments', 0)}"
-            )
-            if 'saved' in df.columns:
-                texto += f", salvamentos {row.get('saved', 0)}"
-            if 'shares' in df.columns:
-                texto += f", compartilhamentos {row.get('shares', 0)}"
-            texto += f", link: {row.get('permalink')}."
-
-            documentos.append(Document(page_content=texto, metadata={"source": "instagram"}))
-        return documentos
-
-
-    def dataframe_para_documentos_shopify(df):
-        documentos = []
-        for _, row in df.iterrows():
-            texto = (
-                f"Venda na data {row.get('date')}, "
-                f"SKU {row.get('sku', 'indefinido')}, "
-                f"cor {row.get('cor', 'indefinida')}, "
-                f"tamanho {row.get('tamanho', 'indefinido')}, "
-                f"comprimento {row.get('comprimento', 'indefinido')}, "
-                f"compressao {row.get('compressao', 'indefinida')}, "
-                f"preço {row.get('price', 0)} reais, "
-                f"pedido número {row.get('order_number', 'N/A')}."
-            )
-            documentos.append(Document(page_content=texto, metadata={"source": "shopify"}))
-        return documentos
-    
-    # =============================
-    # Carregar dados do Supabase
-    # =============================
+@st.cache_resource(show_spinner=False)
+def carregar_retriever(versoes):
+    # Bitmaps dos metadados montados uma vez por versão dos dados, junto com o índice
+    return RetrieverFiltrado.de_vectorstore(carregar_vectorstore(versoes))
 
-    @st.cache_data
-    def carregar_dados():
-        shopify_data = supabase.table("Shopify").select("*").execute().data
-        instagram_data = supabase.table("Posts").select("*").execute().data
 
-        df_shopify = pd.DataFrame(shopify_data)
-        df_instagram = pd.DataFrame(instagram_data)
+def reconstruir_indice():
+    """Recalcula todos os embeddings e regrava o índice em disco."""
+    vectorstore = carregar_ou_construir_indice(
+        gerar_documentos(), criar_embeddings(OPENAI_API_KEY), reconstruir=True
+    )
+    carregar_vectorstore.clear()
+    carregar_retriever.clear()
+    return vectorstore.index.ntotal
 
-        df_shopify["date"] = pd.to_datetime(df_shopify["date"], errors="coerce")
-        df_instagram["timestamp"] = pd.to_datetime(df_instagram["timestamp"], errors="coerce")
-        df_instagram["dia_semana"] = df_instagram["timestamp"].dt.day_name()
-        df_instagram["hora"] = df_instagram["timestamp"].dt.hour
 
-        return df_shopify, df_instagram
+@st.cache_resource(show_spinner=False)
+def cache_respostas():
+    # Um cache por processo, compartilhado entre as sessões
+    return CacheRespostas(capacidade=256, ttl=6 * 3600)
 
 
-    df_shopify, df_instagram = carregar_dados()
+def chat_page():
+    if not login():
+        st.stop()
+    st.title("Chat AllWeather")
 
     # =============================
     # Gerar vector store
     # =============================
 
-    docs_instagram = dataframe_para_documentos_instagram(df_instagram)
-    docs_shopify = dataframe_para_documentos_shopify(df_shopify)
-
-    documentos = docs_instagram + docs_shopify
+    fontes_sidebar("Shopify", "Posts")
+    try:
+        if st.sidebar.button("Reconstruir índice"):
+            with st.spinner("Recalculando embeddings..."):
+                reconstruir_indice()
+
+        # Versões dos dados que o índice vai usar (os carregados), não as do disco, que podem estar à frente
+        dados = carregar_dados()
+        versoes = (dados.shopify.attrs["versao"], dados.instagram.attrs["versao"])
+        vectorstore = carregar_vectorstore(versoes)
+    except IndiceVazio:
+        st.info("Ainda não há dados de vendas nem posts para o chat consultar. Volte depois da primeira sincronização.")
+        st.stop()
 
     st.subheader("Documentos carregados")
-    st.write(f"Total de documentos: {len(documentos)}")
+    st.write(f"Total de documentos: {vectorstore.index.ntotal}")
 
-    embeddings = OpenAIEmbeddings(api_key=OPENAI_API_KEY)
-
-    vectorstore = FAISS.from_documents(documentos, embeddings)
-
-    retriever = vectorstore.as_retriever()
+    # Filtra por tema, período e atributos citados na pergunta antes da busca vetorial
+    retriever = carregar_retriever(versoes)
 
     # =============================
-    # LLM + QA Chain
+    # LLM (streaming) + cache de respostas
     # =============================
 
-    llm = ChatOpenAI(
-        model_name="gpt-4",
-        temperature=0.4,
-        api_key=OPENAI_API_KEY
-    )
-
-    qa = RetrievalQA.from_chain_type(
-        llm=llm,
-        retriever=retriever,
-        chain_type="stuff"
-    )
+    llm = criar_llm(OPENAI_API_KEY)
+    cache = cache_respostas()
 
     # =============================
     # Interface do Chat
@@ -141,33 +153,27 @@ def chat_page():
         with st.chat_message(msg["role"]):
             st.markdown(msg["content"])
     
-    contexto = """
-        Você é um analista de dados sênior da AllWeather, uma marca de roupas masculinas premium.
-
-        Seu papel:
-        - Gerar respostas extremamente detalhadas, com tom profissional, consultivo e de alto nível analítico.
-        - Sempre incluir dados concretos como números, datas, tendências, análises comparativas e insights baseados nos dados disponíveis.
-        - Suas respostas devem ser claras, bem estruturadas, como se fossem parte de um relatório executivo ou de Business Intelligence.
-        - Quando responder perguntas sobre Instagram, leve em conta dados como: tipo de post (carrossel, reels, feed), alcance, curtidas, comentários, dia da semana, hora de postagem, salvamentos e compartilhamentos (se disponíveis).
-        - Quando responder perguntas sobre vendas, leve em conta dados como: tamanho, compressão, comprimento, cor, SKU, ticket médio, quantidade vendida, data da venda e SKU mais vendidos.
-        - Se uma informação não estiver presente nos dados, informe claramente que ela não está disponível. Nunca invente dados.
-        - Utilize sempre um tom formal, profissional e de consultoria de dados.
-        """
     pergunta = st.chat_input("Digite sua pergunta...")
 
     if pergunta:
-        pergunta_com_contexto = contexto + "\n\n" + pergunta
-
         with st.chat_message("user"):
             st.markdown(pergunta)
 
         st.session_state.messages.append({"role": "user", "content": pergunta})
 
-        with st.spinner("Consultando dados..."):
-            resposta = qa.run(pergunta_com_contexto)
+        cronometro = Cronometro()
+        chave = chave_resposta(pergunta, versoes, nome_llm(llm))
 
         with st.chat_message("assistant"):
-            st.markdown(resposta)
+            # Perguntas numéricas conhecidas são respondidas direto dos dados; depois o cache; o resto vai para o LLM
+            resposta = responder(pergunta, carregar_dados()) or cache.obter(chave)
+            if resposta is not None:
+                st.markdown(resposta)
+                cronometro.marcar("total")
+            else:
+                resposta = st.write_stream(transmitir(llm, retriever, INSTRUCOES, pergunta, cronometro))
+                cache.guardar(chave, resposta)
+            st.caption(cronometro.resumo())
 
         st.session_state.messages.append({"role": "assistant", "content": resposta})
 
@@ -0,0 +1,54 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from chat_router import normalizar
+
+
+def normalizar_pergunta(pergunta):
+    """Minúsculas, sem acentos, espaços colapsados e sem pontuação no fim."""
+    return re.sub(r"\s+", " ", normalizar(pergunta)).strip(" ?!.")
+
+
+def chave_resposta(pergunta, versao_dados, modelo):
+    """A mesma pergunta só reaproveita a resposta com os mesmos dados e o mesmo modelo."""
+    return normalizar_pergunta(pergunta), versao_dados, modelo
+
+
+class CacheRespostas:
+    """Cache LRU de respostas do chat, com validade (``ttl``, em segundos).
+
+    Compartilhado entre sessões do mesmo processo; ao passar de ``capacidade``
+    descarta a resposta usada há mais tempo.
+    """
+
+    def __init__(self, capacidade=256, ttl=3600, relogio=time.monotonic):
+        self.capacidade = capacidade
+        self.ttl = ttl
+        self.relogio = relogio
+        self.acertos = 0
+        self.faltas = 0
+        self._itens = OrderedDict()
+        self._trava = threading.Lock()
+
+    def obter(self, chave):
+        with self._trava:
+            item = self._itens.get(chave)
+            if item is None or item[1] <= self.relogio():
+                self._itens.pop(chave, None)
+                self.faltas += 1
+                return None
+            self._itens.move_to_end(chave)
+            self.acertos += 1
+            return item[0]
+
+    def guardar(self, chave, resposta):
+        with self._trava:
+            self._itens[chave] = (resposta, self.relogio() + self.ttl)
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.capacidade:
+                self._itens.popitem(last=False)
+
+    def __len__(self):
+        return len(self._itens)
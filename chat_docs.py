@@ -0,0 +1,98 @@
+import hashlib
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+from langchain_core.documents import Document
+
+# Linhas montadas por vez; cada bloco vira texto em operações de coluna inteira
+TAMANHO_BLOCO = 10_000
+
+
+@dataclass(frozen=True)
+class Template:
+    """Texto de um documento, montado coluna a coluna.
+
+    ``partes`` é uma sequência de (texto fixo, coluna, padrão). O padrão
+    substitui valores ausentes; sem padrão, o ausente sai como ``nan``.
+    ``tema`` e ``metadados`` (chave, coluna) vão para os metadados de cada
+    documento; a coluna ``data`` vira o intervalo ``data_inicio``/``data_fim``.
+    """
+    fonte: str
+    partes: tuple
+    fim: str = "."
+    tema: str = None
+    metadados: tuple = ()
+
+
+DOC_INSTAGRAM = Template("instagram", (
+    ("Post no dia ", "timestamp", None),
+    (", tipo ", "media_type", None),
+    (", legenda: ", "caption", None),
+    (", alcance ", "reach", None),
+    (", curtidas ", "likes", None),
+    (", comentários ", "comments", None),
+    (", salvamentos ", "saved", None),
+    (", compartilhamentos ", "shares", None),
+    (", link: ", "permalink", None),
+), tema="instagram", metadados=(("data", "timestamp"), ("media_type", "media_type")))
+
+def _texto_coluna(serie, padrao):
+    # Formata cada valor distinto uma vez só (datas e categorias se repetem muito) e espalha pelos códigos
+    codigos, distintos = pd.factorize(serie, use_na_sentinel=False)
+    distintos = np.asarray(distintos, dtype=object)
+    if padrao is not None:
+        distintos = np.where(pd.isna(distintos), padrao, distintos)
+    return distintos.astype(str)[codigos]
+
+
+def montar_textos(df, template):
+    """Um texto por linha de ``df``, concatenando colunas inteiras (sem laço por linha)."""
+    textos = np.full(len(df), "", dtype=str)
+    for fixo, coluna, padrao in template.partes:
+        textos = np.strings.add(np.strings.add(textos, fixo), _texto_coluna(df[coluna], padrao))
+    return np.strings.add(textos, template.fim).tolist()
+
+
+def hash_texto(texto):
+    return hashlib.sha256(texto.encode("utf-8")).hexdigest()
+
+
+def documento(fonte, id_linha, texto, **metadados):
+    """Document com fonte, id estável (``fonte:id``), hash do texto e os ``metadados`` não ausentes."""
+    return Document(page_content=texto, metadata={
+        "source": fonte,
+        "id": f"{fonte}:{id_linha}",
+        "hash": hash_texto(texto),
+        **{chave: valor for chave, valor in metadados.items() if not pd.isna(valor)},
+    })
+
+
+def _metadados_bloco(bloco, template):
+    # Uma lista por chave, com os valores já como str (datas em ISO, dia do fuso da coluna)
+    colunas = {"tema": [template.tema] * len(bloco)}
+    for chave, coluna in template.metadados:
+        if chave == "data":
+            datas = pd.to_datetime(bloco[coluna]).dt.strftime("%Y-%m-%d").to_numpy(dtype=object)
+            colunas["data_inicio"] = colunas["data_fim"] = datas
+        else:
+            valores = bloco[coluna].to_numpy(dtype=object)
+            colunas[chave] = np.where(pd.isna(valores), None, valores.astype(str))
+    return [dict(zip(colunas, valores)) for valores in zip(*colunas.values())]
+
+
+def documentos(df, template, tamanho_bloco=TAMANHO_BLOCO):
+    """Documents de ``df``, com os textos montados um bloco de linhas por vez.
+
+    O bloco limita os arrays de texto intermediários, não o conjunto: o índice
+    do chat (``vector_index``) lê todos os documentos antes do primeiro
+    embedding. Cada documento leva nos metadados a fonte, um id estável da linha
+    (``fonte:id`` da tabela, ou a posição quando não há coluna ``id``), o hash
+    do texto, o tema e os metadados estruturados do template (data, atributos).
+    """
+    ids = df["id"].to_numpy() if "id" in df.columns else np.arange(len(df))
+    for inicio in range(0, len(df), tamanho_bloco):
+        bloco = df.iloc[inicio:inicio + tamanho_bloco]
+        linhas = zip(ids[inicio:inicio + tamanho_bloco], montar_textos(bloco, template), _metadados_bloco(bloco, template))
+        for id_linha, texto, metadados in linhas:
+            yield documento(template.fonte, id_linha, texto, **metadados)
@@ -0,0 +1,62 @@
+import os
+import time
+
+from langchain_core.messages import HumanMessage, SystemMessage
+
+MODELO = "gpt-4"
+
+
+def criar_llm(api_key=None):
+    """ChatOpenAI por padrão; CHAT_LLM=falso usa um modelo local de respostas fixas, sem rede.
+
+    CHAT_LLM_ATRASO (segundos por caractere) simula a latência do streaming no modo falso.
+    """
+    if os.getenv("CHAT_LLM", "").lower() == "falso":
+        from langchain_core.language_models.fake_chat_models import FakeListChatModel
+        return FakeListChatModel(
+            responses=["Resposta de teste gerada localmente a partir dos documentos recuperados."],
+            sleep=float(os.getenv("CHAT_LLM_ATRASO", "0")) or None,
+        )
+    from langchain_openai import ChatOpenAI
+    return ChatOpenAI(model_name=MODELO, temperature=0.4, api_key=api_key)
+
+
+def nome_llm(llm):
+    return getattr(llm, "model_name", None) or type(llm).__name__
+
+
+def mensagens(instrucoes, documentos, pergunta):
+    """Instruções no papel de sistema e os documentos recuperados junto da pergunta (prompt "stuff")."""
+    dados = "\n".join(f"- {doc.page_content}" for doc in documentos)
+    return [
+        SystemMessage(content=instrucoes),
+        HumanMessage(content=f"Dados disponíveis:\n{dados}\n\nPergunta: {pergunta}"),
+    ]
+
+
+class Cronometro:
+    """Tempo desde a criação até cada etapa marcada (a primeira marcação de cada etapa vale)."""
+
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.etapas = {}
+
+    def marcar(self, etapa):
+        self.etapas.setdefault(etapa, time.perf_counter() - self.inicio)
+
+    def resumo(self):
+        return " · ".join(f"{etapa}: {segundos * 1000:.0f} ms" for etapa, segundos in self.etapas.items())
+
+
+def transmitir(llm, retriever, instrucoes, pergunta, cronometro):
+    """Busca os documentos e devolve a resposta do LLM pedaço a pedaço, marcando as etapas.
+
+    Só a pergunta vai para o retriever; as instruções fixas entram apenas no prompt.
+    """
+    documentos = retriever.invoke(pergunta)
+    cronometro.marcar("recuperação")
+    for pedaco in llm.stream(mensagens(instrucoes, documentos, pergunta)):
+        if pedaco.content:
+            cronometro.marcar("primeiro token")
+            yield pedaco.content
+    cronometro.marcar("total")
@@ -0,0 +1,137 @@
+import pandas as pd
+
+from chat_docs import documento
+from instagram import AGREGADOS, MEDIAS
+import rollups
+
+DIAS_PT = {
+    'Monday': 'segunda-feira', 'Tuesday': 'terça-feira', 'Wednesday': 'quarta-feira',
+    'Thursday': 'quinta-feira', 'Friday': 'sexta-feira', 'Saturday': 'sábado', 'Sunday': 'domingo',
+}
+MESES_PT = (
+    'janeiro', 'fevereiro', 'março', 'abril', 'maio', 'junho',
+    'julho', 'agosto', 'setembro', 'outubro', 'novembro', 'dezembro',
+)
+TIPOS_MIDIA_PT = {'IMAGE': 'imagem', 'VIDEO': 'vídeo/reels', 'CAROUSEL_ALBUM': 'carrossel'}
+DIMENSOES_SKU = {'cor': 'cor', 'tamanho': 'tamanho', 'comprimento': 'comprimento', 'compressao': 'compressão'}
+
+
+def reais(valor):
+    return f"R$ {valor:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+
+
+def inteiro(valor):
+    return f"{valor:,.0f}".replace(",", ".")
+
+
+def nome_mes(mes):
+    return f"{MESES_PT[mes.month - 1]} de {mes.year}"
+
+
+def _metricas_posts(linha):
+    return (
+        f"alcance médio {inteiro(linha['reach'])}, curtidas médias {linha['likes']:.1f}, "
+        f"comentários médios {linha['comments']:.1f}, compartilhamentos médios {linha['shares']:.1f}, "
+        f"interação {linha['Interação (%)']:.2f}%"
+    )
+
+
+def resumos_mensais(diario):
+    """Um documento por mês, a partir do agregado diário da Shopify (o mesmo dos dashboards)."""
+    for _, linha in rollups.por_mes(diario).iterrows():
+        ticket = linha['receita'] / linha['itens'] if linha['itens'] > 0 else 0
+        texto = (
+            f"Resumo de vendas de {nome_mes(linha['mes'])} ({linha['mes']:%m/%Y}): "
+            f"receita {reais(linha['receita'])}, {inteiro(linha['pedidos'])} pedidos, "
+            f"{inteiro(linha['itens'])} itens vendidos, ticket médio {reais(ticket)}."
+        )
+        fim = linha['mes'] + pd.offsets.MonthEnd(0)
+        yield documento(
+            "resumo", f"mes:{linha['mes']:%Y-%m}", texto,
+            tema="vendas", data_inicio=f"{linha['mes']:%Y-%m-%d}", data_fim=f"{fim:%Y-%m-%d}",
+        )
+
+
+def _vendas(linha, total):
+    ticket = linha['sum'] / linha['size']
+    return (
+        f"{inteiro(linha['size'])} itens ({linha['size'] / total:.1%}), "
+        f"receita {reais(linha['sum'])}, ticket médio {reais(ticket)}"
+    )
+
+
+def resumos_sku(df_sku):
+    """Documentos das vendas por atributo do SKU e um com os SKUs mais vendidos.
+
+    Por dimensão (cor, tamanho, ...) sai um documento com todos os valores e
+    um por valor; por SKU, um com os seus atributos. Os por valor e por SKU
+    levam os atributos nos metadados, para o filtro do retriever.
+    """
+    total = len(df_sku)
+    if total == 0:
+        return
+    for coluna, nome in DIMENSOES_SKU.items():
+        vendas = df_sku.groupby(coluna, observed=True)['price'].agg(['size', 'sum']).sort_values('size', ascending=False)
+        partes = [
+            f"{valor}: {inteiro(linha['size'])} itens ({linha['size'] / total:.1%}), receita {reais(linha['sum'])}"
+            for valor, linha in vendas.iterrows()
+        ]
+        yield documento(
+            "resumo", f"sku:{coluna}", f"Vendas por {nome} do produto: " + "; ".join(partes) + ".",
+            tema="vendas", dimensao=coluna,
+        )
+        for valor, linha in vendas.iterrows():
+            yield documento(
+                "resumo", f"sku:{coluna}:{valor}", f"Vendas de produtos com {nome} {valor}: {_vendas(linha, total)}.",
+                tema="vendas", dimensao=coluna, **{coluna: str(valor)},
+            )
+
+    atributos = list(DIMENSOES_SKU)
+    por_sku = df_sku.groupby(['sku', *atributos], observed=True)['price'].agg(['size', 'sum'])
+    for (sku, *valores), linha in por_sku.sort_values('size', ascending=False).iterrows():
+        descricao = ", ".join(f"{DIMENSOES_SKU[coluna]} {valor}" for coluna, valor in zip(atributos, valores))
+        yield documento(
+            "resumo", f"sku:{sku}", f"Vendas do SKU {sku} ({descricao}): {_vendas(linha, total)}.",
+            tema="vendas", sku=sku, **{coluna: str(valor) for coluna, valor in zip(atributos, valores)},
+        )
+
+    top = df_sku['sku'].value_counts().head(10)
+    partes = [f"{sku} ({inteiro(qtd)} itens, {qtd / total:.1%})" for sku, qtd in top.items()]
+    yield documento("resumo", "sku:top10", "SKUs mais vendidos: " + "; ".join(partes) + ".", tema="vendas")
+
+
+def resumos_instagram(df):
+    """Documentos por tipo de mídia, por dia da semana e por tipo x dia, com as médias do dashboard."""
+    for _, linha in AGREGADOS["tipo"](df).iterrows():
+        tipo = TIPOS_MIDIA_PT.get(linha['media_type'], linha['media_type'])
+        yield documento(
+            "resumo", f"midia:{linha['media_type']}",
+            f"Desempenho médio dos posts do tipo {tipo} ({linha['media_type']}): {_metricas_posts(linha)}.",
+            tema="instagram", media_type=linha['media_type'],
+        )
+
+    for _, linha in AGREGADOS["dia"](df).dropna(subset=['reach']).iterrows():
+        yield documento(
+            "resumo", f"dia:{linha['dia_semana']}",
+            f"Desempenho médio dos posts publicados em {DIAS_PT[linha['dia_semana']]}: {_metricas_posts(linha)}.",
+            tema="instagram", dia_semana=linha['dia_semana'],
+        )
+
+    por_tipo_dia = df.groupby(['media_type', 'dia_semana'], observed=True).agg(MEDIAS)
+    for tipo, grupo in por_tipo_dia.groupby(level='media_type'):
+        grupo = grupo.droplevel('media_type').sort_values('reach', ascending=False)
+        partes = [f"{DIAS_PT[dia]} (alcance médio {inteiro(linha['reach'])})" for dia, linha in grupo.iterrows()]
+        yield documento(
+            "resumo", f"midia_dia:{tipo}",
+            f"Melhores dias da semana para posts do tipo {TIPOS_MIDIA_PT.get(tipo, tipo)}, "
+            f"do maior para o menor alcance médio: " + ", ".join(partes) + ".",
+            tema="instagram", media_type=tipo,
+        )
+
+
+def resumos(df_shopify, df_instagram, diario_shopify):
+    """Todos os documentos-resumo do chat (dezenas, no lugar de um por linha de pedido)."""
+    yield from resumos_mensais(diario_shopify)
+    # Só SKUs no padrão têm atributos
+    yield from resumos_sku(df_shopify[df_shopify['cor'].notna()])
+    yield from resumos_instagram(df_instagram)
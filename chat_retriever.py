@@ -0,0 +1,179 @@
+import re
+from dataclasses import dataclass
+
+import faiss
+import numpy as np
+import pandas as pd
+from langchain_community.vectorstores import FAISS
+from langchain_core.retrievers import BaseRetriever
+
+from chat_router import TIPOS_MIDIA, normalizar, periodo_pergunta
+
+# Chaves dos metadados com bitmap; o documento sem a chave vale para qualquer valor dela
+CHAVES = ("tema", "media_type", "cor", "tamanho", "comprimento", "compressao")
+
+# Nomes das cores nos códigos do SKU (AW_ES_<tipo>_<cor>_<tamanho>)
+CORES = {
+    "preto": "PR", "pretos": "PR", "preta": "PR", "pretas": "PR",
+    "azul": "AZ", "azuis": "AZ",
+    "branco": "BR", "brancos": "BR", "branca": "BR", "brancas": "BR",
+}
+ATRIBUTOS = (
+    ("cor", r"\bcor (\w{2})\b", str.upper),
+    ("tamanho", r"\btamanhos? (\w{1,3})\b", str.upper),
+    ("comprimento", r"\b(long|curt)[oa]s?\b", lambda m: {"long": "Longo", "curt": "Curto"}[m]),
+    ("compressao", r"\b(com|sem) compressao\b", str.capitalize),
+)
+TEMAS = {
+    "vendas": r"\b(vend\w*|receita|fatur\w*|pedidos?|skus?|ticket|shorts?|produtos?|compras?)\b",
+    "instagram": r"\b(instagram|post\w*|publica\w*|reels?|carross\w*|curtidas?|comentarios?|alcance|"
+                 r"engajamento|seguidores|stories|story|legendas?)\b",
+}
+
+
+@dataclass(frozen=True)
+class Filtro:
+    """O que a pergunta restringe: tema (fonte), ano/mês e atributos (chave, valor)."""
+    tema: str = None
+    ano: int = None
+    mes: int = None
+    atributos: tuple = ()
+
+    @property
+    def vazio(self):
+        return self.tema is None and self.ano is None and self.mes is None and not self.atributos
+
+
+def extrair_filtro(pergunta):
+    """Filtro de metadados citado na pergunta ("vendas de shorts pretos em junho")."""
+    pergunta = normalizar(pergunta)
+    atributos = {}
+    palavras = re.findall(r"\w+", pergunta)
+    cor = next((CORES[p] for p in palavras if p in CORES), None)
+    if cor is not None:
+        atributos["cor"] = cor
+    for chave, padrao, converter in ATRIBUTOS:
+        encontrado = re.search(padrao, pergunta)
+        if encontrado and chave not in atributos:
+            atributos[chave] = converter(encontrado.group(1))
+    midia = next((TIPOS_MIDIA[p] for p in palavras if p in TIPOS_MIDIA), None)
+    if midia is not None:
+        atributos["media_type"] = midia
+
+    temas = {tema for tema, padrao in TEMAS.items() if re.search(padrao, pergunta)}
+    if set(atributos) - {"media_type"}:
+        temas.add("vendas")
+    if midia is not None:
+        temas.add("instagram")
+    ano, mes = periodo_pergunta(pergunta)
+    # Pergunta que mistura os dois temas busca em tudo
+    tema = temas.pop() if len(temas) == 1 else None
+    return Filtro(tema=tema, ano=ano, mes=mes, atributos=tuple(sorted(atributos.items())))
+
+
+class IndiceMetadados:
+    """Índice lateral dos metadados, na ordem das posições do índice FAISS.
+
+    Um bitmap por (chave, valor) e as datas de início/fim de cada documento;
+    um filtro vira um AND de bitmaps, sem tocar nos vetores.
+    """
+
+    def __init__(self, metadados):
+        df = pd.DataFrame.from_records(list(metadados))
+        self.total = len(df)
+        self.bitmaps, self.ausentes = {}, {}
+        for chave in CHAVES:
+            codigos, valores = pd.factorize(df[chave]) if chave in df else (np.full(self.total, -1), [])
+            self.ausentes[chave] = codigos < 0
+            self.bitmaps[chave] = {valor: codigos == i for i, valor in enumerate(valores)}
+
+        def datas(coluna):
+            if coluna not in df:
+                return np.full(self.total, np.datetime64("NaT"), dtype="datetime64[D]")
+            return pd.to_datetime(df[coluna]).to_numpy().astype("datetime64[D]")
+
+        # Documentos sem data (resumos do período todo) passam por qualquer filtro de período
+        self.inicio, self.fim = datas("data_inicio"), datas("data_fim")
+
+    @classmethod
+    def de_vectorstore(cls, vectorstore):
+        docs = vectorstore.docstore
+        ids = vectorstore.index_to_docstore_id
+        return cls(docs.search(ids[posicao]).metadata for posicao in range(vectorstore.index.ntotal))
+
+    def _valor(self, chave, valor):
+        return self.bitmaps[chave].get(valor, np.zeros(self.total, dtype=bool)) | self.ausentes[chave]
+
+    def _intervalo(self, ano, mes):
+        if mes is not None and ano is None:
+            # Mês sem ano: o ano mais recente com documentos nesse mês
+            datados = self.inicio[~np.isnat(self.inicio)]
+            anos = datados.astype("datetime64[Y]")[datados.astype("datetime64[M]").astype(int) % 12 == mes - 1]
+            if len(anos) == 0:
+                return None
+            ano = int(anos.max().astype(int)) + 1970
+        if ano is None:
+            return None
+        if mes is None:
+            return np.datetime64(f"{ano}-01-01"), np.datetime64(f"{ano}-12-31")
+        inicio = np.datetime64(f"{ano}-{mes:02d}", "M")
+        return inicio.astype("datetime64[D]"), (inicio + 1).astype("datetime64[D]") - 1
+
+    def mascara(self, filtro):
+        """Posições que passam no filtro; ``None`` quando não há o que filtrar."""
+        if filtro.vazio:
+            return None
+        mascara = np.ones(self.total, dtype=bool)
+        if filtro.tema is not None:
+            mascara &= self.bitmaps["tema"].get(filtro.tema, np.zeros(self.total, dtype=bool))
+        for chave, valor in filtro.atributos:
+            mascara &= self._valor(chave, valor)
+        intervalo = self._intervalo(filtro.ano, filtro.mes)
+        if intervalo is not None:
+            inicio, fim = intervalo
+            # NaT nunca compara verdadeiro, então documentos sem data ficam
+            mascara &= ~(self.fim < inicio) & ~(self.inicio > fim)
+        return mascara
+
+
+def buscar(indice, vetor, k, mascara=None):
+    """Posições dos ``k`` vizinhos de ``vetor``, considerando só as posições da ``mascara``.
+
+    O filtro vai para o FAISS como bitmap: só os documentos selecionados têm a
+    distância calculada, então a busca fica mais barata quanto mais estreito o filtro.
+    """
+    vetor = np.asarray(vetor, dtype="float32").reshape(1, -1)
+    if mascara is None:
+        return indice.search(vetor, k)[1][0]
+    seletor = faiss.IDSelectorBitmap(np.packbits(mascara, bitorder="little"))
+    ivf = faiss.try_extract_index_ivf(indice)
+    if ivf is None:
+        parametros = faiss.SearchParameters(sel=seletor)
+    else:
+        # Filtro estreito deixa poucos candidatos por lista: visita proporcionalmente mais listas
+        nprobe = min(ivf.nlist, int(np.ceil(ivf.nprobe * len(mascara) / max(int(mascara.sum()), 1))))
+        parametros = faiss.SearchParametersIVF(sel=seletor, nprobe=nprobe)
+    return indice.search(vetor, k, params=parametros)[1][0]
+
+
+class RetrieverFiltrado(BaseRetriever):
+    """Retriever do chat: filtra por tema, período e atributos da pergunta antes da busca vetorial.
+
+    Se o filtro não deixa nenhum documento, busca em todos.
+    """
+    vectorstore: FAISS
+    metadados: IndiceMetadados
+    k: int = 4
+
+    @classmethod
+    def de_vectorstore(cls, vectorstore, k=4):
+        return cls(vectorstore=vectorstore, metadados=IndiceMetadados.de_vectorstore(vectorstore), k=k)
+
+    def _get_relevant_documents(self, query, *, run_manager=None):
+        mascara = self.metadados.mascara(extrair_filtro(query))
+        if mascara is not None and not mascara.any():
+            mascara = None
+        vetor = self.vectorstore.embedding_function.embed_query(query)
+        posicoes = buscar(self.vectorstore.index, vetor, self.k, mascara)
+        ids = self.vectorstore.index_to_docstore_id
+        return [self.vectorstore.docstore.search(ids[p]) for p in posicoes if p >= 0]
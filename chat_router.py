@@ -0,0 +1,144 @@
+import re
+import unicodedata
+from dataclasses import dataclass
+
+import pandas as pd
+
+from chat_resumos import DIAS_PT, MESES_PT, TIPOS_MIDIA_PT, DIMENSOES_SKU, inteiro, nome_mes, reais
+
+
+@dataclass(frozen=True)
+class DadosChat:
+    """Bases que o roteador consulta direto, sem passar pelo LLM."""
+    shopify: pd.DataFrame          # linhas de venda com atributos do SKU
+    instagram: pd.DataFrame        # posts com dia_semana e hora (horário de Brasília)
+    diario_shopify: pd.DataFrame   # agregado diário da Shopify (receita, itens, pedidos)
+
+
+def normalizar(texto):
+    sem_acento = unicodedata.normalize("NFKD", texto.lower())
+    return "".join(c for c in sem_acento if not unicodedata.combining(c))
+
+
+MESES = {normalizar(nome): numero for numero, nome in enumerate(MESES_PT, start=1)}
+TIPOS_MIDIA = {
+    "reels": "VIDEO", "reel": "VIDEO", "video": "VIDEO", "videos": "VIDEO",
+    "carrossel": "CAROUSEL_ALBUM", "carrosseis": "CAROUSEL_ALBUM", "carousel": "CAROUSEL_ALBUM",
+    "imagem": "IMAGE", "imagens": "IMAGE", "foto": "IMAGE", "fotos": "IMAGE",
+}
+METRICAS_POSTS = {
+    "curtida": ("likes", "curtidas médias"),
+    "comentario": ("comments", "comentários médios"),
+    "compartilhamento": ("shares", "compartilhamentos médios"),
+    "salvamento": ("saved", "salvamentos médios"),
+    "alcance": ("reach", "alcance médio"),
+}
+
+
+def periodo_pergunta(pergunta):
+    """(ano, mês) citados na pergunta; cada um pode ser None."""
+    ano = re.search(r"\b(20\d{2})\b", pergunta)
+    ano = int(ano.group(1)) if ano else None
+    numerico = re.search(r"\b(0?[1-9]|1[0-2])/(20\d{2})\b", pergunta)
+    if numerico:
+        return int(numerico.group(2)), int(numerico.group(1))
+    for nome, numero in MESES.items():
+        if re.search(rf"\b{nome}\b", pergunta):
+            return ano, numero
+    return ano, None
+
+
+def _filtrar_periodo(df, coluna, ano, mes):
+    """Filtra por ano/mês; mês sem ano usa o ano mais recente que tem esse mês nos dados."""
+    datas = df[coluna]
+    if mes is not None and ano is None:
+        anos = datas[datas.dt.month == mes].dt.year
+        ano = int(anos.max()) if not anos.empty else None
+    mascara = pd.Series(True, index=df.index)
+    if ano is not None:
+        mascara &= datas.dt.year == ano
+    if mes is not None:
+        mascara &= datas.dt.month == mes
+    return df[mascara], ano
+
+
+def _descrever_periodo(ano, mes):
+    if mes is not None and ano is not None:
+        return nome_mes(pd.Timestamp(year=ano, month=mes, day=1))
+    if ano is not None:
+        return str(ano)
+    return "todo o período disponível"
+
+
+def _vendas(pergunta, dados):
+    if not re.search(r"\b(receita|faturamento|faturou|faturamos|ticket|pedidos)\b", pergunta):
+        return None
+    ano, mes = periodo_pergunta(pergunta)
+    dias, ano = _filtrar_periodo(dados.diario_shopify, "date", ano, mes)
+    periodo = _descrever_periodo(ano, mes)
+    if dias.empty:
+        return f"Não há vendas registradas em {periodo}."
+    receita, itens, pedidos = dias["receita"].sum(), dias["itens"].sum(), dias["pedidos"].sum()
+    ticket = receita / itens if itens > 0 else 0
+    return (
+        f"**Vendas em {periodo}** (Shopify)\n\n"
+        f"- Receita: **{reais(receita)}**\n"
+        f"- Pedidos: {inteiro(pedidos)}\n"
+        f"- Itens vendidos: {inteiro(itens)}\n"
+        f"- Ticket médio: {reais(ticket)}"
+    )
+
+
+def _mais_vendido(pergunta, dados):
+    if not re.search(r"mais vendid|vende mais|vendeu mais|vendem mais|venderam mais", pergunta):
+        return None
+    coluna = next((c for c in DIMENSOES_SKU if re.search(rf"\b{c[:6]}", pergunta)), "sku")
+    ano, mes = periodo_pergunta(pergunta)
+    vendas, ano = _filtrar_periodo(dados.shopify, "date", ano, mes)
+    vendas = vendas[vendas["cor"].notna()]
+    periodo = _descrever_periodo(ano, mes)
+    if vendas.empty:
+        return f"Não há vendas registradas em {periodo}."
+    contagem = vendas[coluna].value_counts().head(5)
+    nome = DIMENSOES_SKU.get(coluna, "SKU")
+    linhas = [f"{i}. **{valor}**: {inteiro(qtd)} itens ({qtd / len(vendas):.1%})" for i, (valor, qtd) in enumerate(contagem.items(), 1)]
+    return f"**Mais vendidos por {nome} em {periodo}**\n\n" + "\n".join(linhas)
+
+
+def _melhor_momento(pergunta, dados):
+    por_hora = re.search(r"\b(horario|hora)\b", pergunta)
+    if not (re.search(r"\bmelhor(es)?\b", pergunta) and (por_hora or re.search(r"\bdias?\b", pergunta))):
+        return None
+    posts = dados.instagram
+    tipo = next((TIPOS_MIDIA[p] for p in re.findall(r"\w+", pergunta) if p in TIPOS_MIDIA), None)
+    if tipo is not None:
+        posts = posts[posts["media_type"] == tipo]
+    if posts.empty:
+        return "Não há posts desse tipo nos dados."
+
+    coluna, rotulo = next((m for chave, m in METRICAS_POSTS.items() if chave in pergunta), ("reach", "alcance médio"))
+    grupo = "hora" if por_hora else "dia_semana"
+    medias = posts.groupby(grupo)[coluna].mean().sort_values(ascending=False)
+    nomear = (lambda h: f"{int(h)}h") if por_hora else DIAS_PT.get
+    publico = f"posts do tipo {TIPOS_MIDIA_PT[tipo]}" if tipo else "posts"
+    # Os 7 primeiros: a semana inteira, ou as melhores horas
+    linhas = [f"{i}. {nomear(valor)}: {inteiro(media)}" for i, (valor, media) in enumerate(medias.head(7).items(), 1)]
+    return (
+        f"**Melhor {'horário' if por_hora else 'dia da semana'} para {publico}**: "
+        f"{nomear(medias.index[0])} ({rotulo} {inteiro(medias.iloc[0])}).\n\n"
+        f"Ranking por {rotulo} ({inteiro(len(posts))} posts):\n\n" + "\n".join(linhas)
+    )
+
+
+# Ordem importa: "mais vendido" antes de vendas/receita
+ROTAS = (_mais_vendido, _vendas, _melhor_momento)
+
+
+def responder(pergunta, dados):
+    """Responde direto com pandas perguntas numéricas conhecidas; ``None`` manda para o LLM."""
+    pergunta = normalizar(pergunta)
+    for rota in ROTAS:
+        resposta = rota(pergunta, dados)
+        if resposta is not None:
+            return resposta
+    return None
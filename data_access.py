@@ -0,0 +1,511 @@
+import csv
+import io
+import json
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from urllib.parse import parse_qsl, urlsplit
+
+import httpx
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+
+from esquemas import ESQUEMAS, compactar
+from supabase_client import obter_cliente
+
+# Limite padrão de linhas por resposta do PostgREST (max-rows do Supabase)
+TAMANHO_PAGINA = 1000
+
+# Tipo Arrow de cada tipo do Postgres (campo "format" das colunas no OpenAPI do PostgREST).
+# O que não está aqui (json, arrays...) chega como texto.
+TIPOS_POSTGRES = {
+    "bigint": pa.int64(), "integer": pa.int64(), "smallint": pa.int64(),
+    "numeric": pa.float64(), "double precision": pa.float64(), "real": pa.float64(),
+    "boolean": pa.bool_(),
+    "date": pa.date32(),
+    "timestamp with time zone": pa.timestamp("us", tz="UTC"),
+    "timestamp without time zone": pa.timestamp("us"),
+}
+
+
+@dataclass(frozen=True)
+class Tabela:
+    """Descreve o que uma página precisa de uma tabela do Supabase.
+
+    ``colunas`` vazio significa todas as colunas. ``datas`` mapeia coluna ->
+    formato (ou None para inferir) e ``numeros`` lista as colunas numéricas;
+    as conversões são feitas uma única vez, ao montar o DataFrame. Os tipos
+    compactos (category, int32...) vêm de ``esquemas.ESQUEMAS``, por nome da tabela.
+    """
+    nome: str
+    colunas: tuple = ()
+    chave: str = "id"
+    datas: dict = field(default_factory=dict)
+    numeros: tuple = ()
+
+
+def _coluna_sql(coluna):
+    # Colunas com espaço, acento ou símbolo ("Scroll depth", "% drop off") precisam de aspas
+    return coluna if re.fullmatch(r"[A-Za-z_][A-Za-z0-9_]*", coluna) else f'"{coluna}"'
+
+
+def _select(tabela):
+    if not tabela.colunas:
+        return "*"
+    colunas = list(tabela.colunas)
+    if tabela.chave not in colunas:
+        colunas.append(tabela.chave)
+    return ",".join(_coluna_sql(c) for c in colunas)
+
+
+def _buscar_faixa(cliente, tabela, inicio=None, fim=None, tamanho_pagina=TAMANHO_PAGINA, desde=None):
+    """Pagina por keyset (``chave > última chave vista``) dentro de [inicio, fim).
+
+    Só para quando a página vem vazia: assim um max-rows menor que
+    ``tamanho_pagina`` no servidor não trunca o resultado em silêncio.
+    ``desde=(coluna, valor)`` restringe a busca a ``coluna >= valor``.
+    """
+    linhas = []
+    ultimo = None
+    while True:
+        consulta = cliente.table(tabela.nome).select(_select(tabela)).order(tabela.chave)
+        if desde is not None:
+            consulta = consulta.gte(*desde)
+        if ultimo is not None:
+            consulta = consulta.gt(tabela.chave, ultimo)
+        elif inicio is not None:
+            consulta = consulta.gte(tabela.chave, inicio)
+        if fim is not None:
+            consulta = consulta.lt(tabela.chave, fim)
+        pagina = consulta.limit(tamanho_pagina).execute().data or []
+        if not pagina:
+            return linhas
+        linhas.extend(pagina)
+        ultimo = pagina[-1][tabela.chave]
+
+
+def _extremo_chave(cliente, tabela, desc):
+    resp = (
+        cliente.table(tabela.nome).select(tabela.chave)
+        .order(tabela.chave, desc=desc).limit(1).execute()
+    )
+    return resp.data[0][tabela.chave] if resp.data else None
+
+
+def _faixas(minimo, maximo, particoes):
+    # Divide [minimo, maximo] em intervalos [inicio, fim) contíguos; o último fica aberto
+    passo = (maximo - minimo + 1) / particoes
+    cortes = [minimo + int(passo * i) for i in range(1, particoes)]
+    inicios = [minimo] + cortes
+    fins = cortes + [None]
+    return list(zip(inicios, fins))
+
+
+def buscar_linhas(cliente, tabela, particoes=1, tamanho_pagina=TAMANHO_PAGINA, desde=None):
+    """Linhas cruas (lista de dicts) da tabela, paginadas e opcionalmente em paralelo.
+
+    Com ``desde`` (busca incremental, poucas linhas) a paginação é sempre sequencial.
+    """
+    if particoes <= 1 or desde is not None:
+        return _buscar_faixa(cliente, tabela, tamanho_pagina=tamanho_pagina, desde=desde)
+
+    minimo = _extremo_chave(cliente, tabela, desc=False)
+    maximo = _extremo_chave(cliente, tabela, desc=True)
+    if not isinstance(minimo, int) or not isinstance(maximo, int):
+        # Chave não numérica (ou tabela vazia): não dá para particionar, segue sequencial
+        return _buscar_faixa(cliente, tabela, tamanho_pagina=tamanho_pagina)
+
+    with ThreadPoolExecutor(max_workers=particoes) as pool:
+        partes = pool.map(
+            lambda faixa: _buscar_faixa(cliente, tabela, faixa[0], faixa[1], tamanho_pagina),
+            _faixas(minimo, maximo, particoes),
+        )
+        return [linha for parte in partes for linha in parte]
+
+
+def tipar(df, tabela):
+    """Aplica as conversões de data e número declaradas na Tabela e os tipos compactos de ``ESQUEMAS``.
+
+    Uma passada pelas colunas: cada uma é convertida e já gravada no tipo
+    final, sem passar por um DataFrame intermediário.
+    """
+    esquema = ESQUEMAS.get(tabela.nome, {})
+    for coluna in df.columns:
+        serie = df[coluna]
+        if coluna in tabela.datas:
+            serie = pd.to_datetime(serie, format=tabela.datas[coluna], errors="coerce")
+        elif coluna in tabela.numeros:
+            serie = pd.to_numeric(serie, errors="coerce")
+        if coluna in esquema:
+            serie = compactar(serie, esquema[coluna])
+        if serie is not df[coluna]:
+            df[coluna] = serie
+    return df
+
+
+@dataclass(frozen=True)
+class _SessaoPostgrest:
+    """GETs direto no PostgREST do cliente: URL base e cabeçalhos (apikey, Authorization) dele, no pool HTTP dele.
+
+    O httpx compartilhado (``supabase_client.criar_http``) não tem URL base nem
+    cabeçalhos próprios; o supabase-py os passa a cada requisição, e aqui também.
+    """
+    http: object
+    url: str
+    cabecalhos: tuple
+    # Instante (time.monotonic) em que a carga desiste; fora da igualdade, para não mudar a chave dos tipos guardados
+    prazo: float = field(default=None, compare=False)
+
+    def get(self, caminho, params=None, headers=None):
+        return self.http.get(
+            f"{self.url}/{caminho}", params=params, headers={**dict(self.cabecalhos), **(headers or {})},
+            timeout=self._timeout(),
+        )
+
+    def _timeout(self):
+        if self.prazo is None:
+            return httpx.USE_CLIENT_DEFAULT
+        restante = self.prazo - time.monotonic()
+        if restante <= 0:
+            raise TimeoutError("prazo da carga esgotado")
+        padrao = self.http.timeout
+        return httpx.Timeout(**{
+            fase: restante if getattr(padrao, fase) is None else min(getattr(padrao, fase), restante)
+            for fase in ("connect", "read", "write", "pool")
+        })
+
+
+_local = threading.local()
+
+
+@contextmanager
+def prazo(instante):
+    """Dentro do bloco, as idas ao PostgREST feitas por esta thread desistem em ``instante`` (``time.monotonic``).
+
+    Cada requisição recebe como timeout o tempo que falta, e uma paginação que
+    passa do prazo para com ``TimeoutError``: quem desistiu de esperar a carga
+    (``carga_paralela``) não fica com a thread presa nela.
+    """
+    anterior = getattr(_local, "prazo", None)
+    _local.prazo = instante
+    try:
+        yield
+    finally:
+        _local.prazo = anterior
+
+
+def _sessao_postgrest(cliente):
+    # None no SupabaseLocal, que não fala HTTP
+    postgrest = getattr(cliente, "postgrest", None)
+    if postgrest is None:
+        return None
+    return _SessaoPostgrest(
+        postgrest.session, str(postgrest.base_url).rstrip("/"), tuple(postgrest.headers.items()),
+        getattr(_local, "prazo", None),
+    )
+
+
+# Tipos do OpenAPI por sessão (URL e cabeçalhos do PostgREST); só leituras que deram certo entram
+_tipos = {}
+
+
+def _tipos_postgrest(sessao):
+    """Tabela -> {coluna: tipo Arrow}, lido uma vez por processo do OpenAPI do PostgREST.
+
+    Só a leitura que deu certo fica guardada. Se o OpenAPI não estiver
+    acessível, as colunas desta carga chegam como texto e ``tipar`` converte o
+    que a Tabela declara, como antes; a próxima carga tenta ler de novo. O
+    ``TimeoutError`` do ``prazo`` da carga sobe: quem esperava já desistiu.
+    """
+    if sessao in _tipos:
+        return _tipos[sessao]
+    try:
+        resposta = sessao.get("", headers={"Accept": "application/openapi+json"})
+        resposta.raise_for_status()
+        definicoes = resposta.json().get("definitions", {})
+    except TimeoutError:
+        raise
+    except Exception:
+        return {}
+    _tipos[sessao] = {
+        nome: {
+            coluna: TIPOS_POSTGRES.get(propriedade.get("format"), pa.string())
+            for coluna, propriedade in definicao.get("properties", {}).items()
+        }
+        for nome, definicao in definicoes.items()
+    }
+    return _tipos[sessao]
+
+
+def ler_csv(conteudo, tipos):
+    """Decodifica uma resposta CSV do PostgREST direto numa tabela Arrow.
+
+    Os tipos vêm do banco (``tipos``: coluna -> tipo Arrow), não de inferência:
+    um SKU "00123" continua texto. Nulos chegam como campo vazio. Se alguma data
+    fugir do formato, a página é relida com datas e booleanos como texto.
+    """
+    if not conteudo.strip():
+        return None
+    if b"\n" not in conteudo:
+        # Só o cabeçalho (resposta sem linhas), sem quebra de linha: o leitor do pyarrow exige uma
+        conteudo += b"\n"
+    cabecalho = conteudo[:conteudo.find(b"\n")].rstrip(b"\r")
+    nomes = next(csv.reader([cabecalho.decode("utf-8")]))
+    colunas = {nome: tipos.get(nome, pa.string()) for nome in nomes}
+
+    def ler(colunas):
+        return pa_csv.read_csv(io.BytesIO(conteudo), convert_options=pa_csv.ConvertOptions(
+            column_types=colunas, strings_can_be_null=True, true_values=["t", "true"], false_values=["f", "false"],
+        ))
+
+    try:
+        return ler(colunas)
+    except pa.ArrowInvalid:
+        return ler({
+            nome: pa.string() if pa.types.is_temporal(tipo) or pa.types.is_boolean(tipo) else tipo
+            for nome, tipo in colunas.items()
+        })
+
+
+def _buscar_faixa_arrow(sessao, tabela, tipos, inicio=None, fim=None, tamanho_pagina=TAMANHO_PAGINA, desde=None):
+    """Mesma paginação por keyset de ``_buscar_faixa``, pedindo cada página em CSV."""
+    paginas = []
+    ultimo = None
+    while True:
+        parametros = [("select", _select(tabela)), ("order", tabela.chave), ("limit", tamanho_pagina)]
+        if desde is not None:
+            parametros.append((desde[0], f"gte.{desde[1]}"))
+        if ultimo is not None:
+            parametros.append((tabela.chave, f"gt.{ultimo}"))
+        elif inicio is not None:
+            parametros.append((tabela.chave, f"gte.{inicio}"))
+        if fim is not None:
+            parametros.append((tabela.chave, f"lt.{fim}"))
+        resposta = sessao.get(tabela.nome, params=parametros, headers={"Accept": "text/csv"})
+        resposta.raise_for_status()
+        pagina = ler_csv(resposta.content, tipos)
+        if pagina is None or pagina.num_rows == 0:
+            return paginas
+        paginas.append(pagina)
+        ultimo = pagina.column(tabela.chave)[-1].as_py()
+
+
+def _esquema(tabela, tipos):
+    # Colunas pedidas (com a chave, como no select) nos tipos do banco; sem projeção, todas as do OpenAPI
+    colunas = list(tabela.colunas) or list(tipos)
+    if colunas and tabela.chave not in colunas:
+        colunas.append(tabela.chave)
+    return pa.schema([(coluna, tipos.get(coluna, pa.string())) for coluna in colunas])
+
+
+def _juntar(paginas, esquema):
+    if not paginas:
+        # Nenhuma linha: tabela vazia, mas com as colunas, para o Parquet gravado servir a leituras projetadas
+        return esquema.empty_table()
+    try:
+        return pa.concat_tables(paginas, promote_options="permissive")
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # Alguma página caiu no texto (ver ``ler_csv``): a coluna fica texto em todas
+        texto = {f.name for p in paginas for f in p.schema if pa.types.is_string(f.type)}
+        return pa.concat_tables([
+            p.cast(pa.schema([pa.field(f.name, pa.string()) if f.name in texto else f for f in p.schema]))
+            for p in paginas
+        ], promote_options="permissive")
+
+
+def buscar_arrow(cliente, tabela, particoes=1, tamanho_pagina=TAMANHO_PAGINA, desde=None):
+    """Linhas da tabela como uma tabela Arrow, sem passar por um dict Python por linha.
+
+    As páginas vêm em CSV e são decodificadas em colunas com os tipos do banco.
+    Paginação, partições e ``desde`` funcionam como em ``buscar_linhas``. Com um
+    cliente sem PostgREST HTTP (``SupabaseLocal``) usa ``buscar_linhas`` e converte.
+    """
+    sessao = _sessao_postgrest(cliente)
+    if sessao is None:
+        linhas = buscar_linhas(cliente, tabela, particoes, tamanho_pagina, desde)
+        return pa.Table.from_pandas(pd.DataFrame(linhas), preserve_index=False)
+    tipos = _tipos_postgrest(sessao).get(tabela.nome, {})
+    esquema = _esquema(tabela, tipos)
+    if particoes <= 1 or desde is not None:
+        return _juntar(_buscar_faixa_arrow(sessao, tabela, tipos, tamanho_pagina=tamanho_pagina, desde=desde), esquema)
+
+    minimo = _extremo_chave(cliente, tabela, desc=False)
+    maximo = _extremo_chave(cliente, tabela, desc=True)
+    if not isinstance(minimo, int) or not isinstance(maximo, int):
+        return _juntar(_buscar_faixa_arrow(sessao, tabela, tipos, tamanho_pagina=tamanho_pagina), esquema)
+
+    with ThreadPoolExecutor(max_workers=particoes) as pool:
+        partes = pool.map(
+            lambda faixa: _buscar_faixa_arrow(sessao, tabela, tipos, faixa[0], faixa[1], tamanho_pagina),
+            _faixas(minimo, maximo, particoes),
+        )
+        return _juntar([pagina for parte in partes for pagina in parte], esquema)
+
+
+def para_pandas(dados):
+    """DataFrame a partir de uma tabela Arrow: números e datas sem cópia quando não há nulos,
+    texto em ``str`` apoiado em Arrow (pandas 3) e datas como datetime64, não ``date`` por linha."""
+    return dados.to_pandas(date_as_object=False)
+
+
+def carregar_tabela(tabela, cliente=None, particoes=1, tamanho_pagina=TAMANHO_PAGINA):
+    """Carrega a tabela inteira (só as colunas pedidas) e devolve um DataFrame tipado.
+
+    ``particoes > 1`` divide a faixa da chave e busca cada parte em paralelo.
+    """
+    cliente = cliente or obter_cliente()
+    dados = buscar_arrow(cliente, tabela, particoes, tamanho_pagina)
+    if tabela.colunas and dados.num_columns:
+        # A chave usada só na paginação fica de fora
+        dados = dados.select(list(tabela.colunas))
+    return tipar(para_pandas(dados), tabela)
+
+
+class SupabaseLocal:
+    """Substituto em memória do cliente Supabase, para rodar loaders e sync offline.
+
+    Implementa só o subconjunto do query builder usado aqui:
+    ``table().select().order().gt/gte/lt().limit().execute()``.
+    """
+
+    def __init__(self, tabelas):
+        self.tabelas = {nome: pd.DataFrame(dados) for nome, dados in tabelas.items()}
+        self.requisicoes = 0
+
+    def table(self, nome):
+        return _ConsultaLocal(self, nome)
+
+
+class _ConsultaLocal:
+    def __init__(self, cliente, nome):
+        self._cliente = cliente
+        self._df = cliente.tabelas[nome]
+        self._colunas = None
+        self._ordem = None
+        self._limite = None
+
+    def select(self, *colunas):
+        texto = ",".join(colunas)
+        if texto != "*":
+            self._colunas = [c.strip().strip('"') for c in re.findall(r'"[^"]*"|[^,]+', texto)]
+        return self
+
+    def order(self, coluna, desc=False):
+        self._ordem = (coluna, desc)
+        return self
+
+    def _filtrar(self, mascara):
+        self._df = self._df[mascara]
+        return self
+
+    def gt(self, coluna, valor):
+        return self._filtrar(self._df[coluna] > valor)
+
+    def gte(self, coluna, valor):
+        return self._filtrar(self._df[coluna] >= valor)
+
+    def lt(self, coluna, valor):
+        return self._filtrar(self._df[coluna] < valor)
+
+    def limit(self, n):
+        self._limite = n
+        return self
+
+    def execute(self):
+        self._cliente.requisicoes += 1
+        df = self._df
+        if self._ordem:
+            df = df.sort_values(self._ordem[0], ascending=not self._ordem[1])
+        if self._limite is not None:
+            df = df.head(self._limite)
+        if self._colunas:
+            df = df[self._colunas]
+        return SimpleNamespace(data=df.to_dict("records"))
+
+
+class _PostgrestFalso(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, tabelas, tipos):
+        super().__init__(("127.0.0.1", 0), _HandlerPostgrest)
+        self.tabelas = tabelas
+        self.tipos = tipos
+        self.respostas = {}
+        self.requisicoes = 0
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class _HandlerPostgrest(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def _responder(self, corpo, tipo):
+        self.send_response(200)
+        self.send_header("Content-Type", tipo)
+        self.send_header("Content-Length", str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def _renderizar(self, nome, parametros, csv_):
+        df = self.server.tabelas[nome]
+        colunas, ordem, limite = None, None, None
+        for chave, valor in parametros:
+            if chave == "select":
+                colunas = None if valor == "*" else valor.split(",")
+            elif chave == "order":
+                ordem = valor
+            elif chave == "limit":
+                limite = int(valor)
+            else:
+                operador, valor = valor.split(".", 1)
+                valor = type(df[chave].iloc[0].item() if hasattr(df[chave].iloc[0], "item") else df[chave].iloc[0])(valor)
+                df = df[{"gt": df[chave] > valor, "gte": df[chave] >= valor, "lt": df[chave] < valor}[operador]]
+        if ordem is not None:
+            coluna, _, direcao = ordem.partition(".")
+            df = df.sort_values(coluna, ascending=direcao != "desc")
+        if limite is not None:
+            df = df.head(limite)
+        if colunas is not None:
+            df = df[colunas]
+        if csv_:
+            return df.to_csv(index=False).encode("utf-8") if len(df) else b""
+        return df.to_json(orient="records").encode("utf-8")
+
+    def do_GET(self):
+        servidor = self.server
+        servidor.requisicoes += 1
+        partes = urlsplit(self.path)
+        nome = partes.path.removeprefix("/rest/v1").strip("/")
+        if not nome:
+            definicoes = {
+                tabela: {"properties": {c: {"format": f} for c, f in tipos.items()}}
+                for tabela, tipos in servidor.tipos.items()
+            }
+            return self._responder(json.dumps({"definitions": definicoes}).encode("utf-8"), "application/openapi+json")
+        csv_ = "text/csv" in self.headers.get("Accept", "")
+        chave = (partes.query, csv_)
+        if chave not in servidor.respostas:
+            # Respostas guardadas: na medição o servidor só devolve bytes prontos
+            servidor.respostas[chave] = self._renderizar(nome, parse_qsl(partes.query), csv_)
+        self._responder(servidor.respostas[chave], "text/csv" if csv_ else "application/json")
+
+
+def servidor_postgrest_falso(tabelas, tipos):
+    """Sobe numa thread um PostgREST local com o subconjunto usado aqui (select, order, gt/gte/lt, limit).
+
+    ``tabelas`` mapeia nome -> DataFrame (datas como texto, como no JSON do
+    PostgREST) e ``tipos`` mapeia nome -> {coluna: tipo Postgres} para o OpenAPI.
+    Responde JSON ou, com ``Accept: text/csv``, CSV.
+    """
+    servidor = _PostgrestFalso(tabelas, tipos)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor
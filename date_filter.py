@@ -0,0 +1,68 @@
+import datetime
+
+import pandas as pd
+import streamlit as st
+
+UM_DIA = pd.Timedelta(days=1)
+
+
+def indexar(df, coluna):
+    """Devolve ``df`` ordenado por ``coluna`` e indexado por ela (datetime64, sem fuso).
+
+    Datas com fuso ficam no horário local do próprio fuso, igual ao que ``.dt.date``
+    mostraria. Linhas sem data saem, como já saíam de qualquer filtro por período.
+    Feito uma vez no carregamento; depois cada filtro é só uma busca binária.
+    """
+    datas = pd.to_datetime(df[coluna])
+    if datas.dt.tz is not None:
+        datas = datas.dt.tz_localize(None)
+    validas = datas.notna()
+    if not validas.all():
+        df, datas = df[validas], datas[validas]
+    df = df.set_axis(pd.DatetimeIndex(datas).rename(None))
+    if not df.index.is_monotonic_increasing:
+        df = df.sort_index(kind="stable")
+    return df
+
+
+def fatiar(df, inicio, fim):
+    """Linhas de ``df`` (já indexado) com data entre ``inicio`` e ``fim``, dias inteiros.
+
+    Duas buscas binárias no índice e um ``iloc`` por posição: nada de máscara
+    booleana nem cópia dos dados.
+    """
+    i, j = df.index.searchsorted([pd.Timestamp(inicio), pd.Timestamp(fim) + UM_DIA])
+    return df.iloc[i:j]
+
+
+def limites(*dfs):
+    """Primeira e última data (``date``) entre os DataFrames indexados não vazios."""
+    indices = [df.index for df in dfs if not df.empty]
+    if not indices:
+        return None
+    return min(i[0] for i in indices).date(), max(i[-1] for i in indices).date()
+
+
+def _intervalo(valor):
+    # date_input devolve uma data, ou uma tupla com 1 item enquanto o usuário escolhe o fim
+    if isinstance(valor, datetime.date):
+        return valor, valor
+    valor = tuple(valor)
+    return valor[0], valor[-1]
+
+
+def periodo_sidebar(*dfs, rotulo="Período", padrao=None, key=None):
+    """Seletor de período na sidebar, limitado às datas dos DataFrames (já indexados).
+
+    Devolve ``(inicio, fim)``; o padrão é o período inteiro disponível. Sem
+    nenhum dado, avisa e interrompe a página.
+    """
+    extremos = limites(*dfs)
+    if extremos is None:
+        st.warning("Não há dados disponíveis para o período.")
+        st.stop()
+    minimo, maximo = extremos
+    valor = st.sidebar.date_input(
+        rotulo, padrao or [minimo, maximo], min_value=minimo, max_value=maximo, key=key
+    )
+    return _intervalo(valor)
@@ -0,0 +1,116 @@
+import json
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from scipy.stats import norm
+
+import rollups
+import sync
+from demanda_ajuste import ajustar_lote
+
+PASTA_DEMANDA = os.path.join(sync.PASTA_DADOS, "demanda")
+
+# Dias cobertos pela reposição, prazo do fornecedor e nível de serviço do estoque de segurança
+HORIZONTE = 120
+PRAZO_ENTREGA = 30
+NIVEL_SERVICO = 0.95
+
+# Abaixo disto o ajuste em série (~20 ms por SKU) sai mais barato que mandar lotes ao pool
+MINIMO_SKUS_POOL = 50
+
+# O forkserver já sobe com o principal e o módulo do ajuste (e o statsmodels) importados:
+# cada processo novo do pool é um fork dele, sem importar nada
+_CONTEXTO = multiprocessing.get_context("forkserver")
+_CONTEXTO.set_forkserver_preload(["__main__", "demanda_ajuste"])
+_pools = {}
+_trava = threading.Lock()
+
+
+def series_diarias(diario):
+    """Itens vendidos por dia de cada SKU (dias sem venda = 0), do primeiro dia do SKU ao último dos dados.
+
+    ``diario`` é o agregado ``ShopifySku`` (date, sku, itens).
+    """
+    diario = diario[diario["sku"].notna() & ~diario["sku"].isin(["", "None", "nan"])]
+    if diario.empty:
+        return {}
+    fim = diario["date"].max()
+    tabela = diario.pivot_table(index="date", columns="sku", values="itens", aggfunc="sum")
+    tabela = tabela.reindex(pd.date_range(diario["date"].min(), fim, freq="D"))
+    primeiro = diario.groupby("sku")["date"].min()
+    return {
+        sku: tabela[sku].loc[primeiro[sku]:].fillna(0).to_numpy(dtype="float64")
+        for sku in tabela.columns
+    }
+
+
+def _pool(processos):
+    # Um pool por processo do app (e por tamanho), criado no primeiro uso e reaproveitado depois
+    with _trava:
+        if processos not in _pools:
+            _pools[processos] = ProcessPoolExecutor(max_workers=processos, mp_context=_CONTEXTO)
+        return _pools[processos]
+
+
+def prever(series, horizonte=HORIZONTE, processos=None):
+    """Previsão de todos os SKUs, ajustando em paralelo num pool de processos.
+
+    ``series`` mapeia SKU -> vendas diárias. Cada processo recebe alguns lotes
+    de SKUs. Com uma CPU só (ou ``processos=1``) ou menos de
+    ``MINIMO_SKUS_POOL`` SKUs, ajusta tudo no processo atual: mandar os lotes
+    custaria mais que o ajuste. O pool é do processo, reaproveitado entre as
+    chamadas; os processos saem de um forkserver, não de um fork do servidor
+    do Streamlit: o fork copiaria travas seguras pelas outras threads
+    (agendador, cache, cargas).
+    """
+    processos = processos or os.cpu_count() or 1
+    itens = list(series.items())
+    if processos < 2 or len(itens) < max(MINIMO_SKUS_POOL, 2 * processos):
+        linhas = ajustar_lote(itens, horizonte)
+    else:
+        lotes = [itens[i::processos * 4] for i in range(processos * 4)]
+        partes = _pool(processos).map(ajustar_lote, lotes, [horizonte] * len(lotes))
+        linhas = [linha for parte in partes for linha in parte]
+    colunas = ["sku", "dias", "modelo", "alpha", "beta", "phi", "demanda", "desvio"]
+    return pd.DataFrame(linhas, columns=colunas).sort_values("sku", ignore_index=True)
+
+
+def carregar(horizonte=HORIZONTE, cliente=None, pasta=PASTA_DEMANDA):
+    """Previsão por SKU a partir das vendas da Shopify, reajustada só quando os dados mudam.
+
+    Os modelos ajustados ficam em disco com a versão da tabela Shopify; na
+    mesma versão, só lê o resultado.
+    """
+    diario = rollups.carregar("ShopifySku", cliente=cliente)
+    # A versão do agregado que vai ser ajustado, não a do disco, que pode já ter avançado
+    versao = diario.attrs["versao"]
+    caminho = os.path.join(pasta, f"previsao_{horizonte}d.parquet")
+    caminho_estado = caminho.replace(".parquet", ".json")
+    if os.path.exists(caminho) and os.path.exists(caminho_estado):
+        with open(caminho_estado, encoding="utf-8") as f:
+            if json.load(f).get("versao") == versao:
+                return pd.read_parquet(caminho)
+
+    previsao = prever(series_diarias(diario), horizonte)
+    sync.gravar_atomico(caminho, lambda temporario: previsao.to_parquet(temporario, index=False))
+    sync.gravar_json(caminho_estado, {"versao": versao})
+    return previsao
+
+
+def reposicao(previsao, estoque, prazo_entrega=PRAZO_ENTREGA, nivel_servico=NIVEL_SERVICO):
+    """Estoque de segurança e quantidade a pedir por SKU.
+
+    ``estoque`` tem o saldo atual por SKU (sku, stock). Segurança = z do nível
+    de serviço x desvio diário x √prazo; o pedido cobre a demanda do horizonte
+    mais a segurança, descontado o estoque atual.
+    """
+    df = previsao.merge(estoque[["sku", "stock"]], on="sku", how="left")
+    df["estoque_atual"] = df["stock"].fillna(0).astype(int)
+    df["estoque_seguranca"] = np.ceil(norm.ppf(nivel_servico) * df["desvio"] * np.sqrt(prazo_entrega)).astype(int)
+    df["demanda"] = df["demanda"].round().astype(int)
+    df["reorder_qty"] = (df["demanda"] + df["estoque_seguranca"] - df["estoque_atual"]).clip(lower=0)
+    return df.drop(columns="stock").sort_values("reorder_qty", ascending=False, ignore_index=True)
@@ -0,0 +1,48 @@
+"""Ajuste Holt por SKU, separado de ``demanda`` para os processos do pool.
+
+Os processos importam só este módulo (numpy e statsmodels): importar ``demanda``
+traria ``rollups``, ``sync`` e o cliente do Supabase, com o Streamlit junto.
+"""
+import warnings
+
+import numpy as np
+from statsmodels.tsa.holtwinters import ExponentialSmoothing
+
+# Com menos dias de histórico não há o que ajustar: a previsão é a média diária
+MINIMO_DIAS = 28
+# Só o último ano entra no ajuste: basta para 120 dias à frente e mantém o ajuste rápido
+HISTORICO = 365
+
+
+def ajustar(serie, horizonte):
+    """Ajusta um SKU e devolve parâmetros, demanda prevista no horizonte e desvio diário.
+
+    Holt com tendência amortecida (suavização exponencial); séries curtas ou
+    sem variação ficam com a média diária.
+    """
+    serie = serie[-HISTORICO:]
+    if len(serie) < MINIMO_DIAS or np.ptp(serie) == 0:
+        media = float(serie.mean()) if len(serie) else 0.0
+        return {
+            "modelo": "media", "alpha": np.nan, "beta": np.nan, "phi": np.nan,
+            "demanda": media * horizonte, "desvio": float(serie.std()) if len(serie) > 1 else 0.0,
+        }
+    with warnings.catch_warnings():
+        # Séries intermitentes geram avisos de convergência sem afetar a previsão
+        warnings.simplefilter("ignore")
+        ajuste = ExponentialSmoothing(
+            serie, trend="add", damped_trend=True, initialization_method="estimated"
+        ).fit(use_brute=False)
+    return {
+        "modelo": "holt",
+        "alpha": ajuste.params["smoothing_level"],
+        "beta": ajuste.params["smoothing_trend"],
+        "phi": ajuste.params["damping_trend"],
+        "demanda": float(np.clip(ajuste.forecast(horizonte), 0, None).sum()),
+        "desvio": float(np.std(ajuste.resid)),
+    }
+
+
+def ajustar_lote(lote, horizonte):
+    """Ajusta uma lista de (SKU, série); é o que cada processo do pool recebe."""
+    return [{"sku": sku, "dias": len(serie), **ajustar(serie, horizonte)} for sku, serie in lote]
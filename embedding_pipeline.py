@@ -0,0 +1,237 @@
+import asyncio
+import functools
+import glob
+import hashlib
+import json
+import os
+import random
+import shutil
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+
+@dataclass(frozen=True)
+class ConfigPipeline:
+    """Tamanho dos lotes, requisições simultâneas e política de nova tentativa em 429."""
+    tamanho_lote: int = 256
+    concorrencia: int = 4
+    tentativas: int = 8
+    espera_inicial: float = 1.0
+    espera_maxima: float = 60.0
+
+
+class EmbeddingsHTTP(Embeddings):
+    """Cliente de um endpoint de embeddings no formato da OpenAI (``POST {url}/embeddings``).
+
+    Útil para servidores compatíveis e para medir o pipeline contra um servidor
+    local. Erros HTTP (inclusive 429) sobem como ``httpx.HTTPStatusError``.
+    """
+
+    def __init__(self, url, model="text-embedding-3-small", api_key=None, timeout=60.0):
+        self.url = url.rstrip("/")
+        self.model = model
+        self.api_key = api_key
+        self.timeout = timeout
+
+    async def aembed_documents(self, texts):
+        cabecalhos = {"Authorization": f"Bearer {self.api_key}"} if self.api_key else {}
+        async with httpx.AsyncClient(timeout=self.timeout, headers=cabecalhos) as cliente:
+            resposta = await cliente.post(f"{self.url}/embeddings", json={"model": self.model, "input": texts})
+            resposta.raise_for_status()
+        dados = sorted(resposta.json()["data"], key=lambda d: d["index"])
+        return [d["embedding"] for d in dados]
+
+    async def aembed_query(self, text):
+        return (await self.aembed_documents([text]))[0]
+
+    def embed_documents(self, texts):
+        return asyncio.run(self.aembed_documents(texts))
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+# =============================
+# Checkpoints
+# =============================
+
+def _ler_checkpoints(pasta, modelo):
+    """Vetores de lotes já concluídos (hash -> vetor); descarta checkpoints de outro modelo."""
+    caminho_modelo = os.path.join(pasta, "modelo.json")
+    if os.path.exists(caminho_modelo):
+        with open(caminho_modelo, encoding="utf-8") as f:
+            if json.load(f).get("modelo") != modelo:
+                shutil.rmtree(pasta, ignore_errors=True)
+    os.makedirs(pasta, exist_ok=True)
+    with open(caminho_modelo, "w", encoding="utf-8") as f:
+        json.dump({"modelo": modelo}, f)
+
+    feitos = {}
+    for caminho in sorted(glob.glob(os.path.join(pasta, "lote_*.npz"))):
+        with np.load(caminho) as lote:
+            feitos.update(zip(lote["hashes"].tolist(), lote["vetores"]))
+    return feitos
+
+
+def _gravar_checkpoint(pasta, hashes, vetores):
+    nome = hashlib.sha256("\n".join(hashes).encode("utf-8")).hexdigest()[:16]
+    caminho = os.path.join(pasta, f"lote_{nome}.npz")
+    # np.savez acrescenta .npz se o nome não terminar assim
+    temporario = caminho + ".tmp.npz"
+    np.savez(temporario, hashes=np.array(hashes), vetores=np.asarray(vetores, dtype="float32"))
+    os.replace(temporario, caminho)
+
+
+def limpar_checkpoints(pasta):
+    shutil.rmtree(pasta, ignore_errors=True)
+
+
+# =============================
+# Pipeline
+# =============================
+
+def _status(erro):
+    resposta = getattr(erro, "response", None)
+    return getattr(erro, "status_code", None) or getattr(resposta, "status_code", None)
+
+
+def _retry_after(erro):
+    resposta = getattr(erro, "response", None)
+    try:
+        return float(resposta.headers.get("retry-after"))
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+async def _com_nova_tentativa(chamada, config, contadores):
+    """Repete ``chamada`` em 429 com espera exponencial (com jitter) ou a do Retry-After."""
+    for tentativa in range(config.tentativas):
+        try:
+            return await chamada()
+        except Exception as erro:
+            if _status(erro) != 429 or tentativa == config.tentativas - 1:
+                raise
+            contadores["limite_taxa"] += 1
+            espera = _retry_after(erro)
+            if espera is None:
+                espera = min(config.espera_maxima, config.espera_inicial * 2 ** tentativa) * random.uniform(0.5, 1.0)
+            await asyncio.sleep(espera)
+
+
+async def _embed(textos, embeddings, pasta, modelo, config, contadores):
+    feitos = _ler_checkpoints(pasta, modelo)
+    faltantes = [h for h in textos if h not in feitos]
+    contadores["reaproveitados"] = len(textos) - len(faltantes)
+    semaforo = asyncio.Semaphore(config.concorrencia)
+
+    async def processar(lote):
+        async with semaforo:
+            vetores = await _com_nova_tentativa(
+                lambda: embeddings.aembed_documents([textos[h] for h in lote]), config, contadores
+            )
+            contadores["lotes"] += 1
+        # Cada lote concluído vai para o disco: uma interrupção perde no máximo os lotes em andamento
+        _gravar_checkpoint(pasta, lote, vetores)
+        feitos.update(zip(lote, np.asarray(vetores, dtype="float32")))
+
+    lotes = [faltantes[i:i + config.tamanho_lote] for i in range(0, len(faltantes), config.tamanho_lote)]
+    await asyncio.gather(*(processar(lote) for lote in lotes))
+    return {h: feitos[h] for h in textos}
+
+
+def embed_com_checkpoint(textos, embeddings, pasta, modelo, config=None, contadores=None):
+    """Embeddings de ``textos`` (hash -> texto) em lotes concorrentes, retomáveis.
+
+    Cada lote concluído fica salvo em ``pasta``; se a execução for interrompida,
+    a próxima chamada só envia os lotes que faltam. Quem chama apaga os
+    checkpoints (``limpar_checkpoints``) depois de guardar o resultado final.
+    """
+    config = config or ConfigPipeline()
+    contadores = contadores if contadores is not None else {}
+    contadores.update(lotes=0, limite_taxa=0, reaproveitados=0)
+    return asyncio.run(_embed(textos, embeddings, pasta, modelo, config, contadores))
+
+
+# =============================
+# Servidor de embeddings local (benchmark)
+# =============================
+
+@functools.lru_cache(maxsize=None)
+def _vetor_falso(semente, dimensao):
+    return np.random.default_rng(semente).random(dimensao).round(6).tolist()
+
+
+class _ServidorFalso(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 64
+
+    def __init__(self, latencia, latencia_por_texto, limite_simultaneas, falhar_apos, dimensao=16):
+        super().__init__(("127.0.0.1", 0), _HandlerFalso)
+        self.latencia = latencia
+        self.latencia_por_texto = latencia_por_texto
+        self.limite_simultaneas = limite_simultaneas
+        self.falhar_apos = falhar_apos
+        self.dimensao = dimensao
+        self.trava = threading.Lock()
+        self.em_andamento = 0
+        self.requisicoes = 0
+        self.recusadas = 0
+
+    def vetor(self, texto):
+        # Vetor determinístico pelo tamanho do texto; o servidor não deve ser o gargalo da medição
+        return _vetor_falso(len(texto), self.dimensao)
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class _HandlerFalso(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def _responder(self, status, corpo, cabecalhos=()):
+        dados = json.dumps(corpo).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(dados)))
+        for nome, valor in cabecalhos:
+            self.send_header(nome, valor)
+        self.end_headers()
+        self.wfile.write(dados)
+
+    def do_POST(self):
+        servidor = self.server
+        entrada = json.loads(self.rfile.read(int(self.headers["Content-Length"])))["input"]
+        with servidor.trava:
+            servidor.requisicoes += 1
+            if servidor.falhar_apos is not None and servidor.requisicoes > servidor.falhar_apos:
+                return self._responder(503, {"error": "indisponível"})
+            if servidor.em_andamento >= servidor.limite_simultaneas:
+                servidor.recusadas += 1
+                return self._responder(429, {"error": "rate limit"}, [("Retry-After", "0.05")])
+            servidor.em_andamento += 1
+        try:
+            time.sleep(servidor.latencia + servidor.latencia_por_texto * len(entrada))
+            dados = [{"index": i, "embedding": servidor.vetor(texto)} for i, texto in enumerate(entrada)]
+            self._responder(200, {"data": dados})
+        finally:
+            with servidor.trava:
+                servidor.em_andamento -= 1
+
+
+def servidor_falso(latencia=0.05, latencia_por_texto=0.0005, limite_simultaneas=4, falhar_apos=None):
+    """Sobe um servidor de embeddings local numa thread; devolve o servidor (``.url``, contadores).
+
+    Cada requisição demora ``latencia`` mais ``latencia_por_texto`` por texto; acima
+    de ``limite_simultaneas`` requisições ao mesmo tempo responde 429.
+    """
+    servidor = _ServidorFalso(latencia, latencia_por_texto, limite_simultaneas, falhar_apos)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor
@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+
+# Tipo compacto de cada coluna, por tabela do Supabase. Vale para qualquer Tabela
+# com esse nome (o que a Tabela não projeta é ignorado). Valores:
+#   "category"                       texto repetido (ids, nomes, tipos, SKUs), já sem espaços nas pontas
+#   "int32"                          contagens; com ausentes vira o inteiro anulável "Int32"
+#   "float32"                        razões e taxas que só são exibidas
+#   "datetime64[ns, <fuso>]"         instantes; sem fuso na origem são lidos como UTC
+# Valores em dinheiro (price, spend, adCost...) ficam em float64: são somados em muitas linhas.
+_IDS_META = ("ad_id", "adset_id", "campaign_id", "ad_name", "campaign_name", "adset_name")
+_CONTAGENS_META = (
+    "impressions", "reach", "clicks", "video_view_30s", "video_view_3s", "video_p25", "video_p50",
+    "video_p75", "video_p95", "video_p100", "add_to_cart", "initiate_checkout", "purchase",
+)
+_TAXAS_META = ("frequency", "cpc", "cpm", "cpp", "ctr", "hook_rate")
+
+ESQUEMAS = {
+    "metaAds": {
+        **dict.fromkeys(_IDS_META, "category"),
+        **dict.fromkeys(_CONTAGENS_META, "int32"),
+        **dict.fromkeys(_TAXAS_META, "float32"),
+    },
+    "Posts": {
+        "timestamp": "datetime64[ns, America/Sao_Paulo]",
+        "media_type": "category",
+        **dict.fromkeys(("reach", "likes", "comments", "saved", "shares"), "int32"),
+    },
+    "stories": {
+        "media_type": "category",
+        **dict.fromkeys(("reach", "replies", "interactions"), "int32"),
+    },
+    "Shopify": {"sku": "category"},
+    "estoque": {"sku": "category", "inventory_quantity": "int32"},
+    "googleAnalytics": dict.fromkeys(("adClicks", "conversoes", "adImpressions"), "int32"),
+}
+
+
+def compactar(serie, tipo):
+    """Converte ``serie`` para o tipo compacto declarado no esquema.
+
+    Aceita tanto a coluna crua (texto/objeto) quanto já convertida em
+    ``tipar``; valores que não convertem viram ausentes.
+    """
+    dtype = pd.api.types.pandas_dtype(tipo)
+    if isinstance(dtype, pd.CategoricalDtype):
+        if isinstance(serie.dtype, pd.CategoricalDtype):
+            return serie
+        # Ids numéricos viram texto, como nas páginas (astype(str) + strip)
+        return serie.where(serie.isna(), serie.astype(str).str.strip()).astype("category")
+    if isinstance(dtype, pd.DatetimeTZDtype):
+        if not pd.api.types.is_datetime64_any_dtype(serie):
+            return pd.to_datetime(serie, errors="coerce", utc=True).dt.tz_convert(dtype.tz)
+        if serie.dt.tz is None:
+            serie = serie.dt.tz_localize("UTC")
+        return serie.dt.tz_convert(dtype.tz)
+    if not pd.api.types.is_numeric_dtype(serie):
+        serie = pd.to_numeric(serie, errors="coerce")
+    if dtype.kind == "i":
+        valores = serie.to_numpy(dtype="float64", na_value=np.nan)
+        ausentes = np.isnan(valores)
+        if (valores[~ausentes] % 1 != 0).any():
+            # Casas decimais onde se esperava contagem: não trunca
+            return serie.astype("float32")
+        return serie.astype(dtype.name.capitalize() if ausentes.any() else dtype)
+    return serie.astype(dtype)
+
+
+def memoria(df):
+    """Bytes ocupados por ``df`` (incluindo o conteúdo dos textos)."""
+    return int(df.memory_usage(deep=True, index=True).sum())
+
+
+# Último DataFrame tipado de cada (tabela, colunas) neste processo
+_cargas = {}
+
+
+def registrar(nome, df):
+    _cargas[(nome, tuple(df.columns))] = (len(df), memoria(df))
+
+
+def relatorio_memoria():
+    """Memória das tabelas lidas neste processo: uma linha por (tabela, projeção de colunas)."""
+    linhas = [
+        {"tabela": nome, "colunas": len(colunas), "linhas": n, "MiB": round(total / 2**20, 2)}
+        for (nome, colunas), (n, total) in sorted(_cargas.items())
+    ]
+    return pd.DataFrame(linhas, columns=["tabela", "colunas", "linhas", "MiB"])
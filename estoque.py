@@ -0,0 +1,167 @@
+import json
+import os
+import threading
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+import sync
+from data_access import Tabela
+
+ESTOQUE = Tabela(
+    "estoque",
+    colunas=("timestamp", "sku", "inventory_quantity"),
+    datas={"timestamp": None},
+    numeros=("inventory_quantity",),
+)
+PASTA_ESTOQUE = os.path.join(sync.PASTA_DADOS, "estoque")
+
+# Uma atualização de cada vez: carregar_estoque, ``em`` e o agendador chegam aqui juntos
+_trava = threading.Lock()
+
+
+def _caminho(nome, pasta):
+    return os.path.join(pasta, f"{nome}.parquet")
+
+
+def _ler_estado(pasta):
+    caminho = os.path.join(pasta, "estado.json")
+    if not os.path.exists(caminho):
+        return {}
+    with open(caminho, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _ordenar(df):
+    # Ordem (sku, timestamp): o histórico de cada SKU fica contíguo e em ordem de tempo
+    return df.sort_values(["sku", "timestamp"], kind="stable", ignore_index=True)
+
+
+def _ultimos(historico):
+    """Último snapshot de cada SKU: a última linha de cada bloco do histórico ordenado."""
+    fim_bloco = historico["sku"].ne(historico["sku"].shift(-1)).to_numpy()
+    return historico[fim_bloco].rename(columns={"inventory_quantity": "stock"}).reset_index(drop=True)
+
+
+def _intercalar(historico, delta):
+    """Intercala ``delta`` (ordenado, só instantes depois dos do histórico) no histórico ordenado por (sku, timestamp).
+
+    Cada linha do delta vai para o fim do bloco do seu SKU: uma busca binária
+    por linha e uma cópia do histórico, sem reordenar tudo.
+    """
+    skus = historico["sku"].to_numpy(dtype=str)
+    posicoes = np.searchsorted(skus, delta["sku"].to_numpy(dtype=str), side="right")
+    ordem = np.empty(len(historico) + len(delta), dtype=np.int64)
+    ordem[posicoes + np.arange(len(delta))] = len(historico) + np.arange(len(delta))
+    ordem[np.arange(len(historico)) + np.searchsorted(posicoes, np.arange(len(historico)), side="right")] = np.arange(len(historico))
+    juntos = pd.concat([historico, delta], ignore_index=True)
+    return juntos.take(ordem).reset_index(drop=True).astype({"sku": "category"})
+
+
+def atualizar(pasta=PASTA_ESTOQUE, pasta_dados=sync.PASTA_DADOS):
+    """Atualiza o histórico ordenado e a tabela de saldo atual por SKU a partir do armazenamento local.
+
+    Só roda quando a tabela ``estoque`` mudou. Depois de uma sincronização
+    incremental, lê do Parquet só os snapshots a partir do último já visto,
+    intercala-os no histórico e troca o saldo só dos SKUs que vieram; depois
+    de uma recarga completa, refaz tudo.
+    """
+    with _trava:
+        fonte = sync.estado(ESTOQUE.nome, pasta_dados)
+        estado = _ler_estado(pasta)
+        caminho_historico = _caminho("historico", pasta)
+        if estado.get("versao_fonte") == fonte.get("versao") and os.path.exists(caminho_historico):
+            return False
+
+        incremental = (
+            estado.get("ultimo") is not None
+            and estado.get("versao_fonte", 0) >= fonte.get("carga_completa", 0)
+            and os.path.exists(caminho_historico)
+        )
+        if incremental:
+            # O delta repete o último instante visto: esse instante sai do histórico e volta pelo delta
+            desde = pd.Timestamp(estado["ultimo"])
+            # Como nos rollups: o filtro do Parquet poda com um dia de folga, o corte exato é no pandas
+            filtros = sync.filtro_desde(ESTOQUE, "timestamp", desde - pd.Timedelta(days=1), pasta_dados)
+            delta = sync.ler(ESTOQUE, pasta_dados, filtros=filtros).dropna(subset=["sku", "timestamp"])
+            delta = _ordenar(delta[delta["timestamp"] >= desde])
+            anterior = pd.read_parquet(caminho_historico)
+            historico = _intercalar(anterior[anterior["timestamp"] < desde], delta)
+            novos = _ultimos(delta)
+            saldo = pd.read_parquet(_caminho("atual", pasta))
+            saldo = pd.concat(
+                [saldo[~saldo["sku"].astype(str).isin(novos["sku"].astype(str))], novos], ignore_index=True,
+            ).sort_values("sku", key=lambda s: s.astype(str), ignore_index=True)
+        else:
+            historico = _ordenar(sync.ler(ESTOQUE, pasta_dados).dropna(subset=["sku", "timestamp"]))
+            saldo = _ultimos(historico)
+
+        for nome, tabela in (("historico", historico), ("atual", saldo)):
+            sync.gravar_atomico(_caminho(nome, pasta), lambda temporario: tabela.to_parquet(temporario, index=False))
+        sync.gravar_json(os.path.join(pasta, "estado.json"), {
+            "versao_fonte": fonte.get("versao"),
+            "ultimo": str(historico["timestamp"].max()) if not historico.empty else None,
+        })
+        return True
+
+
+def atual(cliente=None, pasta=PASTA_ESTOQUE):
+    """Saldo mais recente de cada SKU (sku, stock, timestamp), sem reler o histórico."""
+    sync.garantir(ESTOQUE.nome, cliente=cliente)
+    atualizar(pasta)
+    return pd.read_parquet(_caminho("atual", pasta))
+
+
+class HistoricoEstoque:
+    """Histórico de estoque com um índice ordenado por tempo para cada SKU.
+
+    Os snapshots ficam em arrays ordenados por (sku, timestamp), e ``inicios``
+    marca onde começa o bloco de cada SKU. O saldo numa data sai de uma busca
+    binária dentro de cada bloco.
+    """
+
+    def __init__(self, historico):
+        historico = _ordenar(historico)
+        self.skus, inicios = np.unique(historico["sku"].to_numpy(dtype=str), return_index=True)
+        self.inicios = np.append(inicios, len(historico))
+        self.tempos = historico["timestamp"]
+        self.fuso = self.tempos.dt.tz
+        # Instantes com fuso viram UTC sem fuso, para a busca binária comparar datetime64 puros
+        self.instantes = (self.tempos.dt.tz_convert(None) if self.fuso is not None else self.tempos).to_numpy()
+        self.quantidades = historico["inventory_quantity"].to_numpy()
+
+    def _instante(self, momento):
+        momento = pd.Timestamp(momento)
+        if momento.tz is None and self.fuso is not None:
+            # Data sem fuso é lida no fuso do histórico
+            momento = momento.tz_localize(self.fuso)
+        if momento.tz is not None:
+            momento = momento.tz_convert(None)
+        return momento.to_datetime64()
+
+    def em(self, momento):
+        """Saldo de cada SKU no último snapshot até ``momento`` (inclusive).
+
+        SKUs sem snapshot até lá ficam de fora.
+        """
+        instante = self._instante(momento)
+        linhas = []
+        for sku, inicio, fim in zip(self.skus, self.inicios[:-1], self.inicios[1:]):
+            posicao = inicio + np.searchsorted(self.instantes[inicio:fim], instante, side="right") - 1
+            if posicao >= inicio:
+                linhas.append((sku, self.quantidades[posicao], self.tempos.iloc[posicao]))
+        return pd.DataFrame(linhas, columns=["sku", "stock", "timestamp"])
+
+
+@lru_cache(maxsize=2)
+def _historico(caminho, versao):
+    return HistoricoEstoque(pd.read_parquet(caminho))
+
+
+def em(momento, pasta=PASTA_ESTOQUE):
+    """Saldo de cada SKU em ``momento``, a partir do histórico local (rode ``atual`` ou ``atualizar`` antes).
+
+    O índice é montado uma vez por versão do histórico.
+    """
+    return _historico(_caminho("historico", pasta), _ler_estado(pasta).get("versao_fonte")).em(momento)
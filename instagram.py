@@ -1,58 +1,44 @@
+import time
+
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-from supabase import create_client
-from dotenv import load_dotenv
 from auth import login
-import os
-
-load_dotenv()
-
-
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
-
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
-
-def instagram_page():
-    if not login():
-        st.stop()
-    st.title('Dashboard Instagram - All Weather')
+from agendador import fontes_sidebar
+from cache_compartilhado import compartilhado
+from data_access import Tabela
+from date_filter import fatiar, indexar, periodo_sidebar
+import sync
 
-    @st.cache_data(ttl=600)
-    def carregar_dados_instagram():
-        response = supabase.table("Posts").select("*").execute()
-        df = pd.DataFrame(response.data)
+TABELA_POSTS = Tabela(
+    "Posts",
+    colunas=("id", "timestamp", "media_type", "caption", "permalink", "reach", "likes", "comments", "saved", "shares"),
+    numeros=("reach", "likes", "comments", "saved", "shares"),
+)
 
-        # Conversão de timestamp
-        df["timestamp"] = pd.to_datetime(df["timestamp"])
+ORDEM_DIAS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+MEDIAS = {'reach': 'mean', 'likes': 'mean', 'comments': 'mean', 'shares': 'mean'}
 
-        if df["timestamp"].dt.tz is None:
-            # Se não tiver timezone, assume UTC e converte
-            df["timestamp"] = df["timestamp"].dt.tz_localize('UTC').dt.tz_convert('America/Sao_Paulo')
-        else:
-            # Se já tiver timezone, apenas converte
-            df["timestamp"] = df["timestamp"].dt.tz_convert('America/Sao_Paulo')
 
-        # Criar colunas auxiliares
-        df["Data"] = df["timestamp"].dt.date
-        df["dia_semana"] = df["timestamp"].dt.day_name()
-        df["hora"] = df["timestamp"].dt.hour
+@compartilhado(ttl=600, fontes=("Posts",))
+def carregar_dados_instagram():
+    # timestamp já chega no horário de Brasília (sem fuso na origem = UTC), pelo esquema da tabela
+    df = sync.carregar(TABELA_POSTS)
 
-        # Garantir que as métricas são numéricas
-        df[["reach", "likes", "comments", "saved", "shares"]] = df[["reach", "likes", "comments", "saved", "shares"]].apply(pd.to_numeric, errors='coerce')
+    # Criar colunas auxiliares
+    df["Data"] = df["timestamp"].dt.date
+    df["dia_semana"] = df["timestamp"].dt.day_name()
+    df["hora"] = df["timestamp"].dt.hour
 
-        return df
+    # Índice por data (horário de Brasília) para os filtros de período
+    return indexar(df, "timestamp")
 
 
-    df = carregar_dados_instagram()
+def _interacao(df):
+    return ((df['likes'] + df['comments'] + df['shares']) / df['reach'] * 100).round(2)
 
-    # Filtros
-    start_date = st.sidebar.date_input("Data inicial", df['Data'].min())
-    end_date = st.sidebar.date_input("Data final", df['Data'].max())
-    filtro = df[(df['Data'] >= start_date) & (df['Data'] <= end_date)]
 
-    # KPIs
+def mostrar_kpis(filtro):
     total_reach = filtro['reach'].sum()
     total_likes = filtro['likes'].sum()
     total_comments = filtro['comments'].sum()
@@ -72,9 +58,15 @@ def instagram_page():
     col6.metric("Compartilhamentos", f"{total_shares}")
     col7.metric("Total Posts", f"{len(filtro)}")
 
-    # Tabela organizada
-    st.subheader("Tabela de Dados")
-    tabela = pd.DataFrame({
+
+# =============================
+# Agregados de cada seção
+# =============================
+
+def _tabela(filtro):
+    # Posts mais recentes primeiro
+    filtro = filtro.iloc[::-1]
+    return pd.DataFrame({
         "Data": filtro["Data"],
         "Tipo de Post": filtro["media_type"],
         "Tema/Descrição": filtro["caption"],
@@ -85,40 +77,84 @@ def instagram_page():
         "Comentários": filtro["comments"],
         "Salvamentos": filtro["saved"],
         "Compartilhamentos": filtro["shares"],
-        "Interação / Impressões (%)": (
-            ((filtro["likes"] + filtro["comments"] + filtro["shares"]) / filtro["reach"]) * 100
-        ).round(2)
+        "Interação / Impressões (%)": _interacao(filtro),
     })
-    st.dataframe(tabela)
 
-    # Evolução das métricas
-    st.subheader("Evolução Diária")
-    agrupado = filtro.groupby('Data').sum(numeric_only=True).reset_index()
 
+def _evolucao(filtro):
+    return filtro.groupby('Data').sum(numeric_only=True).reset_index()
+
+
+def _por_tipo(filtro):
+    agrupado = filtro.groupby('media_type', observed=True).agg(MEDIAS).reset_index()
+    agrupado['Interação (%)'] = _interacao(agrupado)
+    return agrupado
+
+
+def _por_dia(filtro):
+    agrupado = filtro.groupby('dia_semana').agg(MEDIAS).reindex(ORDEM_DIAS).reset_index()
+    agrupado['Interação (%)'] = _interacao(agrupado)
+    return agrupado
+
+
+def _por_hora(filtro):
+    agrupado = filtro.groupby('hora').agg(MEDIAS).reset_index()
+    agrupado['Interação (%)'] = _interacao(agrupado)
+    return agrupado
+
+
+def _top10(filtro):
+    top_alcance = filtro.sort_values(by="reach", ascending=False).head(10).copy()
+    top_alcance["Link"] = "[Abrir Post](" + top_alcance["permalink"].astype(str) + ")"
+    return top_alcance
+
+
+AGREGADOS = {
+    "tabela": _tabela,
+    "evolucao": _evolucao,
+    "tipo": _por_tipo,
+    "dia": _por_dia,
+    "hora": _por_hora,
+    "top10": _top10,
+}
+
+
+@st.cache_data(ttl=600, show_spinner=False)
+def agregado_secao(secao, inicio, fim, versao, _filtro):
+    """Agregado de uma seção, memoizado por (seção, período, versão dos dados).
+
+    O DataFrame filtrado não entra na chave do cache (prefixo ``_``): ele é
+    determinado pelo período e pela versão dos dados. ``versao`` tem de ser a
+    do DataFrame carregado (``df.attrs["versao"]``), não a do disco.
+    """
+    return AGREGADOS[secao](_filtro)
+
+
+# =============================
+# Seções
+# =============================
+
+def _secao_tabela(agregado):
+    st.subheader("Tabela de Dados")
+    st.dataframe(agregado("tabela"))
+
+
+def _secao_evolucao(agregado):
+    st.subheader("Evolução Diária")
     fig = px.line(
-        agrupado, 
-        x='Data', 
+        agregado("evolucao"),
+        x='Data',
         y=['reach', 'likes', 'comments', 'saved', 'shares'],
         markers=True,
         title="Evolução das Métricas"
     )
     st.plotly_chart(fig)
 
-    # Performance média por tipo de post
+
+def _secao_tipo(agregado):
     st.subheader("Performance Média por Tipo de Post")
-    agrupado_tipo = filtro.groupby('media_type').agg({
-        'reach': 'mean',
-        'likes': 'mean',
-        'comments': 'mean',
-        'shares': 'mean'
-    }).reset_index()
-
-    agrupado_tipo['Interação (%)'] = (
-        (agrupado_tipo['likes'] + agrupado_tipo['comments'] + agrupado_tipo['shares']) / agrupado_tipo['reach'] * 100
-    ).round(2)
-
-    fig_perf_tipo = px.bar(
-        agrupado_tipo.melt(id_vars='media_type'),
+    fig = px.bar(
+        agregado("tipo").melt(id_vars='media_type'),
         x='media_type',
         y='value',
         color='variable',
@@ -126,25 +162,13 @@ def instagram_page():
         title="Métricas Médias por Tipo de Post",
         labels={"media_type": "Tipo de Post", "value": "Média", "variable": "Métrica"}
     )
-    st.plotly_chart(fig_perf_tipo)
-
-    # Performance média por dia da semana
-    st.subheader("Performance Média por Dia da Semana")
-    ordem_dias = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-
-    agrupado_dia = filtro.groupby('dia_semana').agg({
-        'reach': 'mean',
-        'likes': 'mean',
-        'comments': 'mean',
-        'shares': 'mean'
-    }).reindex(ordem_dias).reset_index()
+    st.plotly_chart(fig)
 
-    agrupado_dia['Interação (%)'] = (
-        (agrupado_dia['likes'] + agrupado_dia['comments'] + agrupado_dia['shares']) / agrupado_dia['reach'] * 100
-    ).round(2)
 
-    fig_perf_dia = px.bar(
-        agrupado_dia.melt(id_vars='dia_semana'),
+def _secao_dia(agregado):
+    st.subheader("Performance Média por Dia da Semana")
+    fig = px.bar(
+        agregado("dia").melt(id_vars='dia_semana'),
         x='dia_semana',
         y='value',
         color='variable',
@@ -152,24 +176,13 @@ def instagram_page():
         title="Métricas Médias por Dia da Semana",
         labels={"dia_semana": "Dia da Semana", "value": "Média", "variable": "Métrica"}
     )
-    st.plotly_chart(fig_perf_dia)
+    st.plotly_chart(fig)
 
 
-    # Performance média por horário de postagem
+def _secao_hora(agregado):
     st.subheader("Performance Média por Horário de Postagem")
-    agrupado_hora = filtro.groupby('hora').agg({
-        'reach': 'mean',
-        'likes': 'mean',
-        'comments': 'mean',
-        'shares': 'mean'
-    }).reset_index()
-
-    agrupado_hora['Interação (%)'] = (
-        (agrupado_hora['likes'] + agrupado_hora['comments'] + agrupado_hora['shares']) / agrupado_hora['reach'] * 100
-    ).round(2)
-
-    fig_hora = px.bar(
-        agrupado_hora.melt(id_vars='hora'),
+    fig = px.bar(
+        agregado("hora").melt(id_vars='hora'),
         x='hora',
         y='value',
         color='variable',
@@ -177,15 +190,13 @@ def instagram_page():
         title="Métricas Médias por Horário de Postagem",
         labels={"hora": "Hora do Dia", "value": "Média", "variable": "Métrica"}
     )
-    st.plotly_chart(fig_hora)
+    st.plotly_chart(fig)
 
 
-    # Top 5 Posts por Alcance
+def _secao_top10(agregado):
+    top_alcance = agregado("top10")
 
     st.subheader("Top 10 Posts - Alcance vs Curtidas (Tamanho = Comentários)")
-
-    top_alcance = filtro.sort_values(by="reach", ascending=False).head(10).copy()
-
     fig = px.scatter(
         top_alcance,
         x="reach",
@@ -198,8 +209,6 @@ def instagram_page():
 
     # Tabela com links clicáveis
     st.subheader("Links dos Top 10 Posts")
-
-    top_alcance["Link"] = top_alcance["permalink"].apply(lambda x: f"[Abrir Post]({x})")
     st.markdown(
         top_alcance[["Link", "reach", "likes", "comments"]]
         .rename(columns={
@@ -212,5 +221,40 @@ def instagram_page():
     )
 
 
+SECOES = {
+    "Tabela": _secao_tabela,
+    "Evolução Diária": _secao_evolucao,
+    "Por Tipo de Post": _secao_tipo,
+    "Por Dia da Semana": _secao_dia,
+    "Por Horário": _secao_hora,
+    "Top 10 Posts": _secao_top10,
+}
+
+
+def mostrar_secoes(filtro, inicio, fim, versao):
+    """Renderiza só a seção escolhida.
+
+    ``st.tabs`` executa o conteúdo de todas as abas a cada rerun; com o seletor
+    apenas a seção aberta calcula seu agregado e monta seus gráficos.
+    """
+    secao = st.radio("Seção", list(SECOES), horizontal=True, label_visibility="collapsed")
+    SECOES[secao](lambda nome: agregado_secao(nome, inicio, fim, versao, filtro))
+
+
+def instagram_page():
+    inicio_render = time.perf_counter()
+    if not login():
+        st.stop()
+    st.title('Dashboard Instagram - All Weather')
+
+    df = carregar_dados_instagram()
+
+    # Filtros
+    start_date, end_date = periodo_sidebar(df)
+    fontes_sidebar("Posts")
+    filtro = fatiar(df, start_date, end_date)
 
+    mostrar_kpis(filtro)
+    mostrar_secoes(filtro, start_date, end_date, df.attrs["versao"])
 
+    st.sidebar.caption(f"Página renderizada em {(time.perf_counter() - inicio_render) * 1000:.0f} ms")
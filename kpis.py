@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+
+# KPI -> (numerador, denominador, escala)
+KPIS_GA = {
+    "ROAS": ("receitaCompras", "adCost", 1),
+    "CTR": ("adClicks", "adImpressions", 100),
+    "CPM": ("adCost", "adImpressions", 1000),
+    "CPC": ("adCost", "adClicks", 1),
+}
+
+KPIS_META = {
+    "CTR (%)": ("clicks", "impressions", 100),
+    "CPC (R$)": ("spend", "clicks", 1),
+    "CPM (R$)": ("spend", "impressions", 1000),
+    "CPA (R$)": ("spend", "add_to_cart", 1),
+    "CPP (R$)": ("spend", "purchase", 1),
+    "CVR (%)": ("purchase", "clicks", 100),
+    "Hook Rate (%)": ("video_view_3s", "impressions", 100),
+    "Hold Rate (%)": ("video_p100", "video_view_3s", 100),
+    "ROAS Real": ("purchase", "spend", 1),
+    "AOV Estimado": ("purchase", "add_to_cart", 1),
+}
+
+
+def dividir(numerador, denominador, escala=1, padrao=0.0):
+    """Divisão vetorizada que devolve ``padrao`` onde o denominador é zero/ausente."""
+    num = np.asarray(numerador, dtype="float64")
+    den = np.asarray(denominador, dtype="float64")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        resultado = num / den * escala
+    resultado = np.where(np.isfinite(resultado), resultado, padrao)
+    if isinstance(numerador, pd.Series):
+        return pd.Series(resultado, index=numerador.index)
+    return resultado
+
+
+def calcular_kpis(df, kpis, casas=None):
+    """Uma coluna por KPI, linha a linha, em operações de coluna inteira."""
+    resultado = pd.DataFrame(index=df.index)
+    for nome, (numerador, denominador, escala) in kpis.items():
+        resultado[nome] = dividir(df[numerador], df[denominador], escala)
+    return resultado.round(casas) if casas is not None else resultado
+
+
+def _bases(kpis):
+    return list(dict.fromkeys(c for num, den, _ in kpis.values() for c in (num, den)))
+
+
+def agregar(df, kpis, por=(), medidas=(), rotulos=(), casas=None):
+    """Somas das medidas-base e KPIs recalculados a partir delas, no grão ``por``.
+
+    ``por`` vazio dá uma linha com o total; com colunas (campanha, conjunto,
+    anúncio, dia...) dá uma linha por grupo. Tudo sai de um único groupby:
+    os numeradores e denominadores dos ``kpis`` e as ``medidas`` extras são
+    somados, os ``rotulos`` ficam com o último valor do grupo, e só então as
+    razões são calculadas, com divisão segura.
+    """
+    somadas = list(dict.fromkeys([*_bases(kpis), *medidas]))
+    por = [por] if isinstance(por, str) else list(por)
+    if por:
+        resultado = df.groupby(por, observed=True, sort=False).agg(
+            **{r: (r, "last") for r in rotulos},
+            **{m: (m, "sum") for m in somadas},
+        )
+    else:
+        resultado = df[somadas].sum().to_frame().T
+    resultado[list(kpis)] = calcular_kpis(resultado, kpis, casas)
+    return resultado
+
+
+def totais(df, kpis):
+    """KPIs do período inteiro: razão das somas, não média das razões."""
+    total = agregar(df, kpis).iloc[0]
+    return {nome: float(total[nome]) for nome in kpis}
+
+
+def serie_diaria(df, kpis, coluna_data="date"):
+    """KPIs por dia, recalculados a partir das somas diárias de numeradores e denominadores."""
+    return agregar(df, kpis, por=coluna_data).sort_index()[list(kpis)]
@@ -1,71 +1,77 @@
 import streamlit as st
-import pandas as pd
 import plotly.express as px
-from dotenv import load_dotenv
-from supabase import create_client
-import os
 from auth import login
+from agendador import fontes_sidebar
+from cache_compartilhado import compartilhado
+from data_access import Tabela
+from date_filter import fatiar, indexar, periodo_sidebar
+import sync
+import rollups
 
 # Configuração da página
 st.set_page_config(page_title="Instagram Stories", layout="wide")
 st.title("Desempenho de Stories · Instagram")
 
-# Conexão com Supabase
-load_dotenv()
-SUPABASE_URL  = os.getenv("SUPABASE_URL")
-SUPABASE_KEY  = os.getenv("SUPABASE_KEY")
-supabase      = create_client(SUPABASE_URL, SUPABASE_KEY)
+TABELA_STORIES = Tabela(
+    "stories",
+    colunas=("timestamp", "date", "media_type", "reach", "replies", "interactions"),
+    datas={"timestamp": None, "date": None},
+    numeros=("reach", "replies", "interactions"),
+)
 
 if not login():
     st.stop()
 
-@st.cache_data(ttl=600)
+@compartilhado(ttl=600, fontes=("stories",))
 def carregar_stories():
-    resp = supabase.table("stories").select("*").execute()
-    df = pd.DataFrame(resp.data or [])
+    df = sync.carregar(TABELA_STORIES)
 
-    df["timestamp"] = pd.to_datetime(df["timestamp"], errors="coerce")
-    df["date"] = pd.to_datetime(df["date"], errors="coerce").dt.date
-    df["media_type"] = df["media_type"].astype(str).str.upper()
+    df["date"] = df["date"].dt.date
+    df["media_type"] = df["media_type"].astype(str).str.upper().astype("category")
 
     for col in ["reach", "replies", "interactions"]:
-        df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0).astype(int)
+        df[col] = df[col].fillna(0).astype("int32")
+
+    return indexar(df, "date")
 
-    return df
+@compartilhado(ttl=600, fontes=("stories",))
+def carregar_stories_diario():
+    return indexar(rollups.carregar("stories"), "date")
 
 df = carregar_stories()
+diario = carregar_stories_diario()
 
 # Filtro por data
 st.sidebar.header("Filtro por período")
-start, end = st.sidebar.date_input(
-    "Intervalo", [df["date"].min(), df["date"].max()],
-    min_value=df["date"].min(), max_value=df["date"].max()
-)
-filtrados = df[(df["date"] >= start) & (df["date"] <= end)]
+start, end = periodo_sidebar(df, rotulo="Intervalo")
+fontes_sidebar("stories")
+filtrados = fatiar(df, start, end)
+dias = fatiar(diario, start, end)
 
 if filtrados.empty:
     st.warning("Nenhum story no intervalo selecionado.")
     st.stop()
 
-# Métricas gerais
-alc_medio = filtrados["reach"].mean()
-melhor_dia = filtrados.groupby("date")["reach"].sum().idxmax()
-melhor_valor = filtrados.groupby("date")["reach"].sum().max()
+# Métricas gerais (a partir do agregado diário)
+alc_medio = dias["reach"].sum() / dias["stories"].sum()
+melhor = dias.loc[dias["reach"].idxmax()]
+melhor_dia = melhor["date"].date()
+melhor_valor = melhor["reach"]
 
 col1, col2, col3 = st.columns(3)
-col1.metric("Total de Stories", len(filtrados))
+col1.metric("Total de Stories", int(dias["stories"].sum()))
 col2.metric("Alcance médio por Story", f"{alc_medio:.1f}")
 col3.metric("Melhor dia (alcance)", f"{melhor_dia} · {melhor_valor} alcances")
 
 # Gráfico 1 — Alcance médio por dia
 st.subheader("Alcance médio por dia")
-media_diaria = filtrados.groupby("date")["reach"].mean().reset_index()
+media_diaria = dias.assign(reach=dias["reach"] / dias["stories"])[["date", "reach"]]
 fig = px.line(media_diaria, x="date", y="reach", title="Alcance médio diário")
 st.plotly_chart(fig, use_container_width=True)
 
 # Gráfico 2 — Interações por tipo de mídia
 st.subheader("Interações por tipo de mídia")
-mídia = filtrados.groupby("media_type")[["reach", "interactions", "replies"]].sum().reset_index()
+mídia = filtrados.groupby("media_type", observed=True)[["reach", "interactions", "replies"]].sum().reset_index()
 fig = px.bar(mídia.melt(id_vars="media_type", var_name="Métrica", value_name="Total"),
              x="media_type", y="Total", color="Métrica", barmode="group")
 st.plotly_chart(fig, use_container_width=True)
@@ -77,7 +83,7 @@ st.plotly_chart(fig, use_container_width=True)
 
 # Gráfico 4 — Respostas por dia
 st.subheader("Respostas recebidas por dia")
-respostas = filtrados.groupby("date")["replies"].sum().reset_index()
+respostas = dias[["date", "replies"]]
 fig = px.bar(respostas, x="date", y="replies", title="Respostas totais por dia")
 st.plotly_chart(fig, use_container_width=True)
 
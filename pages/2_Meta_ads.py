@@ -1,170 +1,209 @@
-import os
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-from dotenv import load_dotenv
-from supabase import create_client
 from auth import login
+from agendador import fontes_sidebar
+from cache_compartilhado import compartilhado
+from data_access import Tabela
+from date_filter import fatiar, indexar, periodo_sidebar
+from kpis import KPIS_META, agregar, dividir
+import sync
+import rollups
 
 # Configuração inicial da página
 st.set_page_config(page_title="Meta Ads Dashboard", layout="wide")
 st.title("Meta Ads Dashboard · All Weather")
 
-# Conexão Supabase
-load_dotenv()
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+id_cols = ["ad_id", "adset_id", "campaign_id", "ad_name", "campaign_name", "adset_name"]
+num_cols = [
+    "impressions", "reach", "frequency", "clicks", "spend", "cpc", "cpm", "cpp", "ctr",
+    "video_view_30s", "video_view_3s", "video_p25", "video_p50",
+    "video_p75", "video_p95", "video_p100", "hook_rate",
+    "add_to_cart", "initiate_checkout", "purchase"
+]
+META_ADS = Tabela(
+    "metaAds",
+    colunas=tuple(["date_start", "date_stop"] + id_cols + num_cols),
+    datas={"date_start": None, "date_stop": None},
+    numeros=tuple(num_cols),
+)
 
 if not login():
     st.stop()
 
-@st.cache_data(ttl=600)
+@compartilhado(ttl=600, fontes=("metaAds",))
 def load_data():
-    resp = supabase.table("metaAds").select("*").execute()
-    df = pd.DataFrame(resp.data or [])
+    df = sync.carregar(META_ADS)
 
-    # Datas e identificadores
-    df["date_start"] = pd.to_datetime(df["date_start"], errors="coerce")
-    df["date_stop"] = pd.to_datetime(df["date_stop"], errors="coerce")
+    # Identificadores já chegam categóricos e sem espaços (esquemas.ESQUEMAS)
     df["date"] = df["date_start"].dt.date
-    for col in ["ad_id", "adset_id", "campaign_id", "ad_name", "campaign_name", "adset_name"]:
-        df[col] = df[col].astype(str).str.strip()
-
-    # Conversão de numéricos
-    num_cols = [
-        "impressions", "reach", "frequency", "clicks", "spend", "cpc", "cpm", "cpp", "ctr",
-        "video_view_30s", "video_view_3s", "video_p25", "video_p50",
-        "video_p75", "video_p95", "video_p100", "hook_rate",
-        "add_to_cart", "initiate_checkout", "purchase"
-    ]
-    df[num_cols] = df[num_cols].apply(pd.to_numeric, errors="coerce").fillna(0)
-
-    # Métricas derivadas
-    df["CTR (%)"] = (df["clicks"] / df["impressions"] * 100).round(2)
-    df["CPC (R$)"] = (df["spend"] / df["clicks"]).replace([float("inf"), pd.NA], 0).round(2)
-    df["CPM (R$)"] = (df["spend"] / df["impressions"] * 1000).replace([float("inf"), pd.NA], 0).round(2)
-    df["CPA (R$)"] = (df["spend"] / df["add_to_cart"]).replace([float("inf"), pd.NA], 0).round(2)
-    df["CPP (R$)"] = (df["spend"] / df["purchase"]).replace([float("inf"), pd.NA], 0).round(2)
-    df["CVR (%)"] = (df["purchase"] / df["clicks"] * 100).replace([float("inf"), pd.NA], 0).round(2)
-    df["Hook Rate (%)"] = (df["video_view_3s"] / df["impressions"] * 100).replace([float("inf"), pd.NA], 0).round(2)
-    df["Hold Rate (%)"] = (df["video_p100"] / df["video_view_3s"] * 100).replace([float("inf"), pd.NA], 0).round(2)
-    df["ROAS Real"] = (df["purchase"] / df["spend"]).replace([float("inf"), pd.NA], 0).round(2)
-    df["AOV Estimado"] = (df["purchase"] / df["add_to_cart"]).replace([float("inf"), pd.NA], 0).round(2)
-    df["ROAS Estimado"] = ((df["add_to_cart"] * df["AOV Estimado"]) / df["spend"]).replace([float("inf"), pd.NA], 0).round(2)
-
-    # Link clicável para Biblioteca de Anúncios
-    df["Ver Anúncio"] = df["ad_id"].apply(
-        lambda x: f"[Ver Anúncio](https://www.facebook.com/ads/library/?id={x})"
-    )
 
-    return df
+    # Numéricos já chegam convertidos; só zera os ausentes.
+    # Só medidas-base ficam aqui: as razões são calculadas depois de agregar, no grão de cada visão
+    df[num_cols] = df[num_cols].fillna(0)
+
+    return indexar(df, "date_start")
+
+@compartilhado(ttl=600, fontes=("metaAds",))
+def load_daily():
+    return indexar(rollups.carregar("metaAds"), "date")
+
+# Medidas somáveis além das bases dos KPIs (contagens de vídeo do funil)
+MEDIDAS_VIDEO = ["reach", "video_view_30s", "video_p25", "video_p50", "video_p75", "video_p95"]
+
+# Níveis de detalhe: coluna de agrupamento e rótulo exibido
+NIVEIS = {
+    "Campanha": ("campaign_id", ("campaign_name",)),
+    "Conjunto de anúncios": ("adset_id", ("adset_name", "campaign_name")),
+    "Anúncio": ("ad_id", ("ad_name", "campaign_name")),
+    "Dia": ("date", ()),
+}
+
+@st.cache_data(ttl=600, show_spinner=False)
+def agregar_anuncios(inicio, fim, campanhas, versao, _df):
+    """Uma linha por ad_id com as somas do período, memoizada por (período, campanhas, versão).
+
+    O DataFrame filtrado não entra na chave do cache (prefixo ``_``): ele é
+    determinado pelos outros argumentos, com ``versao`` sendo a do DataFrame
+    carregado (``df.attrs["versao"]``), não a do disco.
+    """
+    return agregar(_df, KPIS_META, por="ad_id", medidas=MEDIDAS_VIDEO, rotulos=("ad_name", "campaign_name"), casas=2)
+
+
+def link_anuncio(ad_ids):
+    # Link clicável para a Biblioteca de Anúncios
+    return "[Ver Anúncio](https://www.facebook.com/ads/library/?id=" + ad_ids.astype(str) + ")"
 
 # Carregar dados
 df = load_data()
+daily = load_daily()
 
 # Filtros
 st.sidebar.header("Filtros")
-min_date, max_date = df["date"].min(), df["date"].max()
-start_date, end_date = st.sidebar.date_input("Período", [min_date, max_date], min_value=min_date, max_value=max_date)
-campaigns = st.sidebar.multiselect("Campanhas", df["campaign_name"].unique(), default=df["campaign_name"].unique())
-df = df[(df["date"] >= start_date) & (df["date"] <= end_date) & (df["campaign_name"].isin(campaigns))]
+start_date, end_date = periodo_sidebar(df)
+opcoes_campanhas = df["campaign_name"].dropna().unique().tolist()
+campaigns = st.sidebar.multiselect("Campanhas", opcoes_campanhas, default=opcoes_campanhas)
+fontes_sidebar("metaAds")
+df = fatiar(df, start_date, end_date)
+df = df[df["campaign_name"].isin(campaigns)]
+daily = fatiar(daily, start_date, end_date)
+daily = daily[daily["campaign_name"].isin(campaigns)]
+anuncios = agregar_anuncios(start_date, end_date, tuple(campaigns), df.attrs["versao"], df)
+
+# KPIs (razão das somas do período, não média das razões por linha)
+total = agregar(df, KPIS_META).iloc[0]
+roas_estimado = float(dividir(total["add_to_cart"] * total["AOV Estimado"], total["spend"]))
 
-# KPIs
 st.subheader("Métricas Principais")
 col1, col2, col3, col4 = st.columns(4)
-col1.metric("Impressões", f"{int(df['impressions'].sum()):,}")
-col2.metric("Cliques", f"{int(df['clicks'].sum()):,}")
-col3.metric("Compras", f"{int(df['purchase'].sum()):,}")
-col4.metric("Gasto Total", f"R$ {df['spend'].sum():,.2f}")
+col1.metric("Impressões", f"{int(total['impressions']):,}")
+col2.metric("Cliques", f"{int(total['clicks']):,}")
+col3.metric("Compras", f"{int(total['purchase']):,}")
+col4.metric("Gasto Total", f"R$ {total['spend']:,.2f}")
 
 col1, col2, col3, col4 = st.columns(4)
-col1.metric("CTR (%)", f"{df['CTR (%)'].mean():.2f}")
-col2.metric("CPC (R$)", f"R$ {df['CPC (R$)'].mean():.2f}")
-col3.metric("CPP (R$)", f"R$ {df['CPP (R$)'].mean():.2f}")
-col4.metric("ROAS Real", f"{df['ROAS Real'].mean():.2f}")
+col1.metric("CTR (%)", f"{total['CTR (%)']:.2f}")
+col2.metric("CPC (R$)", f"R$ {total['CPC (R$)']:.2f}")
+col3.metric("CPP (R$)", f"R$ {total['CPP (R$)']:.2f}")
+col4.metric("ROAS Real", f"{total['ROAS Real']:.2f}")
 
 col1, col2, col3, col4 = st.columns(4)
-col1.metric("Hook Rate", f"{df['Hook Rate (%)'].mean():.2f}%")
-col2.metric("Hold Rate", f"{df['Hold Rate (%)'].mean():.2f}%")
-col3.metric("CVR", f"{df['CVR (%)'].mean():.2f}%")
-col4.metric("ROAS Estimado", f"{df['ROAS Estimado'].mean():.2f}")
+col1.metric("Hook Rate", f"{total['Hook Rate (%)']:.2f}%")
+col2.metric("Hold Rate", f"{total['Hold Rate (%)']:.2f}%")
+col3.metric("CVR", f"{total['CVR (%)']:.2f}%")
+col4.metric("ROAS Estimado", f"{roas_estimado:.2f}")
+
+# KPIs ponderados no nível escolhido
+st.subheader("Métricas por Nível")
+nivel = st.radio("Nível", list(NIVEIS), horizontal=True, label_visibility="collapsed")
+coluna_nivel, rotulos_nivel = NIVEIS[nivel]
+por_nivel = agregar(df, KPIS_META, por=coluna_nivel, rotulos=rotulos_nivel, casas=2)
+st.dataframe(
+    por_nivel[[*rotulos_nivel, "impressions", "clicks", "spend", "purchase", *KPIS_META]]
+    .sort_values("spend", ascending=False),
+    use_container_width=True
+)
 
-# Tabela com link clicável
+# Tabela com link clicável (anúncio x dia)
 st.subheader("Anúncios")
+anuncios_dia = agregar(
+    df, KPIS_META, por=["date", "ad_id"], medidas=MEDIDAS_VIDEO, rotulos=("ad_name", "campaign_name"), casas=2
+).reset_index()
+anuncios_dia["Ver Anúncio"] = link_anuncio(anuncios_dia["ad_id"])
 show_cols = ["date", "ad_name", "campaign_name", "CTR (%)", "CPC (R$)", "CPA (R$)", "CPP (R$)", "ROAS Real","video_view_3s","video_view_30s","video_p25","video_p50","video_p75","video_p95","video_p100", "Ver Anúncio"]
-st.dataframe(df[show_cols].sort_values("CTR (%)", ascending=False).reset_index(drop=True), use_container_width=True)
+st.dataframe(anuncios_dia[show_cols].sort_values("CTR (%)", ascending=False).reset_index(drop=True), use_container_width=True)
 
 # Funil individual por anúncio (vídeo)
 st.subheader("Funil de Consumo de Vídeo por Anúncio")
 
-# Selecionar anúncio com pelo menos 1 view de vídeo
-anuncios_video = df[df["video_view_3s"] > 0]
-anuncio_sel = st.selectbox(
-    "Selecione um anúncio de vídeo:",
-    options=anuncios_video["ad_name"].unique()
-)
+@st.fragment
+def funil_anuncio(anuncios):
+    # Fragmento: trocar o anúncio redesenha só o funil, sem rodar o resto da página
+    anuncios_video = anuncios[anuncios["video_view_3s"] > 0]
+    if anuncios_video.empty:
+        st.info("Nenhum anúncio de vídeo no período.")
+        return
+    ad_id = st.selectbox(
+        "Selecione um anúncio de vídeo:",
+        options=anuncios_video.index,
+        format_func=lambda i: anuncios_video.at[i, "ad_name"],
+    )
 
-# Dados do anúncio selecionado
-row = anuncios_video[anuncios_video["ad_name"] == anuncio_sel].iloc[0]
-
-# Dados do funil em ordem
-funil = pd.DataFrame({
-    "Etapa": [
-        "Alcance (reach)", 
-        "Impressões (impressions)",
-        "Visualizações 3s (video_view_3s)",
-        "Visualizações 30s (video_view_30s)",
-        "25% assistido (video_p25)", 
-        "50% (video_p50)", 
-        "75% (video_p75)", 
-        "95% (video_p95)", 
-        "100% (video_p100)"
-    ],
-    "Visualizações": [
-        row["reach"],
-        row["impressions"],
-        row["video_view_3s"],
-        row["video_view_30s"],
-        row["video_p25"],
-        row["video_p50"],
-        row["video_p75"],
-        row["video_p95"],
-        row["video_p100"]
-    ]
-})
-
-# Gráfico de funil completo
-fig_funil_ad = px.funnel(
-    funil,
-    y="Etapa", x="Visualizações",
-    title=f"Funil de Engajamento de Vídeo - {row['ad_name']}"
-)
-fig_funil_ad.update_layout(yaxis=dict(autorange="reversed"))
-st.plotly_chart(fig_funil_ad, use_container_width=True)
+    # Totais do anúncio no período
+    row = anuncios_video.loc[ad_id]
+
+    # Dados do funil em ordem
+    funil = pd.DataFrame({
+        "Etapa": [
+            "Alcance (reach)", 
+            "Impressões (impressions)",
+            "Visualizações 3s (video_view_3s)",
+            "Visualizações 30s (video_view_30s)",
+            "25% assistido (video_p25)", 
+            "50% (video_p50)", 
+            "75% (video_p75)", 
+            "95% (video_p95)", 
+            "100% (video_p100)"
+        ],
+        "Visualizações": [
+            row["reach"],
+            row["impressions"],
+            row["video_view_3s"],
+            row["video_view_30s"],
+            row["video_p25"],
+            row["video_p50"],
+            row["video_p75"],
+            row["video_p95"],
+            row["video_p100"]
+        ]
+    })
+
+    # Gráfico de funil completo
+    fig_funil_ad = px.funnel(
+        funil,
+        y="Etapa", x="Visualizações",
+        title=f"Funil de Engajamento de Vídeo - {row['ad_name']}"
+    )
+    fig_funil_ad.update_layout(yaxis=dict(autorange="reversed"))
+    st.plotly_chart(fig_funil_ad, use_container_width=True)
 
-# Mostrar tabela com os dados brutos abaixo do funil
-st.markdown("### Dados de Visualizações")
-st.dataframe(funil, use_container_width=True)
+    # Mostrar tabela com os dados brutos abaixo do funil
+    st.markdown("### Dados de Visualizações")
+    st.dataframe(funil, use_container_width=True)
 
+funil_anuncio(anuncios)
 
 
 # Análise de vídeo: Hook x Hold Rate
 st.subheader("Análise de Vídeo: Hook Rate vs Hold Rate")
 fig_video = px.scatter(
-    df, x="Hook Rate (%)", y="Hold Rate (%)", size="impressions",
+    anuncios, x="Hook Rate (%)", y="Hold Rate (%)", size="impressions",
     hover_data=["ad_name", "campaign_name"], title="Hook vs Hold Rate"
 )
 st.plotly_chart(fig_video, use_container_width=True)
 
 
 st.subheader("Evolução Diária por Campanha")
-daily = df.groupby(["date", "campaign_name"]).agg({
-    "spend": "sum",
-    "clicks": "sum",
-    "purchase": "sum"
-}).reset_index()
-
 fig = px.line(
     daily,
     x="date", y="spend",
@@ -175,7 +214,7 @@ st.plotly_chart(fig, use_container_width=True)
 
 
 st.subheader("Top 10 Anúncios com Maior Custo por Compra")
-top_cpp = df[df["CPP (R$)"] > 0].sort_values("CPP (R$)", ascending=False).head(10)
+top_cpp = anuncios[anuncios["CPP (R$)"] > 0].sort_values("CPP (R$)", ascending=False).head(10)
 fig_cpp = px.bar(
     top_cpp, x="CPP (R$)", y="ad_name", orientation="h",
     text="CPP (R$)", title="Anúncios Mais Caros por Conversão"
@@ -184,7 +223,7 @@ st.plotly_chart(fig_cpp, use_container_width=True)
 
 
 st.subheader("Vídeos com Melhor Hook vs Compras")
-video_df = df[df["video_view_3s"] > 0]
+video_df = anuncios[anuncios["video_view_3s"] > 0]
 fig_video = px.scatter(
     video_df, x="Hook Rate (%)", y="purchase",
     size="impressions", color="campaign_name",
@@ -194,7 +233,7 @@ fig_video = px.scatter(
 st.plotly_chart(fig_video, use_container_width=True)
 
 st.subheader("Top Anúncios por Taxa de Conversão (CVR)")
-top_cvr = df[df["CVR (%)"] > 0].sort_values("CVR (%)", ascending=False).head(10)
+top_cvr = anuncios[anuncios["CVR (%)"] > 0].sort_values("CVR (%)", ascending=False).head(10)
 fig_cvr = px.bar(
     top_cvr, x="CVR (%)", y="ad_name", orientation="h",
     text="CVR (%)", title="Anúncios com Maior Conversão por Clique"
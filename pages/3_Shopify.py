@@ -1,18 +1,21 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-from supabase import create_client
-from dotenv import load_dotenv
-import os
 from auth import login
-
-# Carregando variáveis de ambiente
-load_dotenv()
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
-
-# Inicializando cliente Supabase
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+from agendador import fontes_sidebar
+from cache_compartilhado import compartilhado
+from carga_paralela import carregar_paralelo
+from data_access import Tabela
+from date_filter import fatiar, indexar, periodo_sidebar
+from sku import decodificar_skus
+import demanda
+import estoque
+import sync
+import rollups
+
+# Shopify completo: a tabela inteira é exibida no fim da página
+SHOPIFY = Tabela("Shopify", datas={"date": "%Y-%m-%d"})
+VENDAS = Tabela("vendas", colunas=("Quantidade", "Código do produto"))
 
 if not login():
     st.stop()
@@ -20,32 +23,24 @@ if not login():
 st.title("Dashboard Shopify - All Weather")
 
 # 1) Carrega vendas Shopify
-@st.cache_data(ttl=600)
+@compartilhado(ttl=600, fontes=("Shopify",))
 def carregar_shopify():
-    resp = supabase.table("Shopify").select("*").execute()
-    df = pd.DataFrame(resp.data)
-    df["date"] = pd.to_datetime(df["date"], format="%Y-%m-%d")
-    return df
+    return indexar(sync.carregar(SHOPIFY), "date")
 
-# 2) Carrega estoque atual por SKU
-@st.cache_data(ttl=600)
+# 1b) Receita diária agregada (KPIs e gráficos de receita)
+@compartilhado(ttl=600, fontes=("Shopify",))
+def carregar_receita_diaria():
+    return indexar(rollups.carregar("Shopify"), "date")
+
+# 2) Carrega estoque atual por SKU (tabela de último saldo mantida pelo serviço de estoque)
+@compartilhado(ttl=600, fontes=("estoque",))
 def carregar_estoque():
-    resp = supabase.table("estoque").select("*").execute()
-    df = pd.DataFrame(resp.data)
-    df["timestamp"] = pd.to_datetime(df["timestamp"])
-    df = (
-        df.sort_values("timestamp")
-          .groupby("sku", as_index=False)
-          .last()[["sku","inventory_quantity"]]
-          .rename(columns={"inventory_quantity":"stock"})
-    )
-    return df
+    return estoque.atual()[["sku", "stock"]]
 
 # 3) Carrega vendas totais (tabela vendas)
-@st.cache_data(ttl=600)
+@compartilhado(ttl=600, fontes=("vendas",))
 def carregar_vendas():
-    resp = supabase.table("vendas").select("*").execute()
-    df = pd.DataFrame(resp.data)
+    df = sync.carregar(VENDAS)
     # Limpa e converte Quantidade
     df["Quantidade"] = df["Quantidade"].fillna("0").str.replace(",", ".")
     df["qty_total"] = (
@@ -56,56 +51,62 @@ def carregar_vendas():
     df = df.rename(columns={"Código do produto":"sku"})
     return df
 
-df = carregar_shopify()
-df_stock = carregar_estoque()
-df_vendas = carregar_vendas()
+# As quatro cargas são independentes: em paralelo, a página espera só a mais lenta
+cargas = carregar_paralelo({
+    "Shopify": carregar_shopify,
+    "receita diária": carregar_receita_diaria,
+    "estoque": carregar_estoque,
+    "vendas": carregar_vendas,
+})
+for fonte, erro in cargas.erros.items():
+    st.warning(f"Não foi possível carregar {fonte}: {erro}")
+if "Shopify" in cargas.erros or "receita diária" in cargas.erros:
+    st.stop()
+df = cargas["Shopify"]
+diario = cargas["receita diária"]
+# Sem estoque ou vendas, as seções delas ficam vazias e o resto da página segue
+df_stock = cargas.get("estoque", pd.DataFrame(columns=["sku", "stock"]))
+df_vendas = cargas.get("vendas", pd.DataFrame(columns=["sku", "qty_total"]))
 
 # Filtros de data para Shopify
-start_date = st.sidebar.date_input("Data inicial", df['date'].min())
-end_date   = st.sidebar.date_input("Data final",   df['date'].max())
-filtro     = df[(df['date']>=pd.to_datetime(start_date)) & (df['date']<=pd.to_datetime(end_date))]
-
-# KPIs  
+start_date, end_date = periodo_sidebar(df)
+fontes_sidebar("Shopify", "estoque", "vendas")
+filtro = fatiar(df, start_date, end_date)
+dias   = fatiar(diario, start_date, end_date)
+
+# KPIs (a partir do agregado diário)
+receita = dias['receita'].sum()
+ticket  = receita / dias['itens'].sum() if dias['itens'].sum() > 0 else 0
 col1,col2,col3 = st.columns(3)
-col1.metric("Receita Total", f"R$ {filtro['price'].sum():,.0f}".replace(",", "."))
-col2.metric("Ticket Médio", f"R$ {filtro['price'].mean():,.2f}".replace(".",","))
-col3.metric("Pedidos", f"{filtro['order_number'].nunique():,}".replace(",", "."))
+col1.metric("Receita Total", f"R$ {receita:,.0f}".replace(",", "."))
+col2.metric("Ticket Médio", f"R$ {ticket:,.2f}".replace(".",","))
+col3.metric("Pedidos", f"{dias['pedidos'].sum():,}".replace(",", "."))
 
 st.markdown("### Visão Geral")
 
 # Receita por dia
 st.subheader("Receita por Dia")
-todas_datas = pd.date_range(filtro["date"].min(), filtro["date"].max(), freq="D")
+todas_datas = pd.date_range(dias["date"].min(), dias["date"].max(), freq="D")
 receita_dia = (
-    filtro.groupby("date")["price"]
-           .sum()
-           .reindex(todas_datas, fill_value=0)
+    dias.set_index("date")["receita"]
+        .reindex(todas_datas, fill_value=0)
 )
 st.line_chart(receita_dia)
 
 # Receita por mês
 st.subheader("Receita por Mês")
-filtro["mes"] = filtro["date"].dt.to_period("M").dt.to_timestamp()
-receita_mes = filtro.groupby("mes")["price"].sum().sort_index()
+receita_mes = rollups.por_mes(dias)
 fig = px.bar(
-    receita_mes.reset_index(),
-    x="mes", y="price",
-    labels={"mes":"Mês","price":"Receita"},
+    receita_mes,
+    x="mes", y="receita",
+    labels={"mes":"Mês","receita":"Receita"},
     text_auto=".2s"
 )
 fig.update_layout(xaxis_tickformat="%b/%y")
 st.plotly_chart(fig, use_container_width=True)
 
 # Tratamento dos SKUs para distribuição
-df_sku = filtro[
-    filtro['sku'].notnull() &
-    filtro['sku'].str.match(r'^AW_ES_[A-Z]{2}_[A-Z]{2}_[A-Z0-9]+$')
-].copy()
-df_sku['tipo']       = df_sku['sku'].str.extract(r'^AW_ES_([A-Z]{2})_')
-df_sku['cor']        = df_sku['sku'].str.extract(r'^AW_ES_[A-Z]{2}_([A-Z]{2})_')
-df_sku['tamanho']    = df_sku['sku'].str.extract(r'^AW_ES_[A-Z]{2}_[A-Z]{2}_([A-Z0-9]+)')
-df_sku['compressao'] = df_sku['tipo'].map({'LC':'Com','CC':'Com','LS':'Sem','CS':'Sem'})
-df_sku['comprimento']= df_sku['tipo'].map({'LC':'Longo','LS':'Longo','CC':'Curto','CS':'Curto'})
+df_sku = decodificar_skus(filtro)
 
 # Gráficos de distribuição
 st.subheader("Distribuição por Comprimento")
@@ -180,60 +181,46 @@ st.dataframe(
 # --------------------------------------------------
 # Previsão Demanda 120d e Reorder Qty
 # --------------------------------------------------
-st.subheader("Previsão Demanda 120d e Reorder Qty (32 SKUs)")
+st.subheader(f"Previsão Demanda {demanda.HORIZONTE}d e Reorder Qty")
 
-# Definindo intervalo de datas manualmente
-start_date = pd.to_datetime("2024-04-01")
-end_date   = pd.to_datetime("2024-07-11")
+# Holt por SKU sobre as vendas diárias reais; reajusta só quando a Shopify muda
+@compartilhado(ttl=600, fontes=("Shopify",))
+def carregar_previsao():
+    return demanda.carregar()
 
-# Filtra as vendas pelo intervalo definido
-df_filtrado = df_vendas.copy()
-df_filtrado["data_manual"] = pd.to_datetime(
-    pd.Series([start_date] * len(df_filtrado))
-)
-
-# Para simular o agrupamento diário, distribuímos uniformemente
-# Isso é opcional caso queira agrupar de forma simples sem data real
-df_filtrado = df_filtrado[
-    (df_filtrado["data_manual"] >= start_date) &
-    (df_filtrado["data_manual"] <= end_date)
-]
-
-# Agrupando a quantidade total por SKU
-df_qty = df_filtrado.groupby("sku", as_index=False)["qty_total"].sum()
-
-# Cálculo de média diária por SKU
-dias_intervalo = (end_date - start_date).days + 1
-df_qty["media_diaria"] = df_qty["qty_total"] / dias_intervalo
-df_qty["demanda_120d"] = (df_qty["media_diaria"] * 120).round().astype(int)
-
-# Pega estoque atual
-df_qty["estoque_atual"] = df_qty["sku"].map(
-    df_stock.set_index("sku")["stock"].to_dict()
-).fillna(0).astype(int)
-
-# Calcula reorder
-df_qty["reorder_qty"] = (df_qty["demanda_120d"] - df_qty["estoque_atual"]).clip(lower=0)
+df_reposicao = demanda.reposicao(carregar_previsao(), df_stock)
 
 # Renomeia e exibe
-df_summary = df_qty.rename(columns={
+df_summary = df_reposicao.rename(columns={
     "sku": "SKU",
-    "demanda_120d": "Demanda 120d",
+    "modelo": "Modelo",
+    "demanda": f"Demanda {demanda.HORIZONTE}d",
+    "estoque_seguranca": "Estoque Segurança",
     "estoque_atual": "Estoque Atual",
     "reorder_qty": "Reorder Qty"
 })
+colunas_numero = [f"Demanda {demanda.HORIZONTE}d", "Estoque Segurança", "Estoque Atual", "Reorder Qty"]
 
-st.subheader("Previsão Demanda 120d · usando intervalo manual e tabela vendas")
+st.caption(
+    f"Suavização exponencial (Holt amortecido) por SKU sobre as vendas diárias da Shopify. "
+    f"Estoque de segurança para {demanda.NIVEL_SERVICO:.0%} de nível de serviço "
+    f"e {demanda.PRAZO_ENTREGA} dias de prazo de entrega."
+)
 st.dataframe(
-    df_summary[["SKU", "Demanda 120d", "Estoque Atual", "Reorder Qty"]]
-    .style.format({
-        "Demanda 120d": "{:,}",
-        "Estoque Atual": "{:,}",
-        "Reorder Qty": "{:,}"
-    }),
+    df_summary[["SKU", "Modelo", *colunas_numero]]
+    .style.format({coluna: "{:,}" for coluna in colunas_numero}),
     use_container_width=True
 )
 
+# Estoque histórico: último snapshot de cada SKU até o fim do dia escolhido
+with st.expander("Estoque em uma data"):
+    data_estoque = st.date_input("Data", value=pd.Timestamp.today().date(), key="data_estoque")
+    df_estoque_data = estoque.em(pd.Timestamp(data_estoque) + pd.Timedelta(days=1) - pd.Timedelta(microseconds=1))
+    st.dataframe(
+        df_estoque_data.rename(columns={"sku": "SKU", "stock": "Estoque", "timestamp": "Snapshot"}),
+        hide_index=True,
+        use_container_width=True
+    )
 
 
 # --------------------------------------------------
@@ -1,41 +1,41 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-from dotenv import load_dotenv
-from supabase import create_client
-import os
-from statsmodels.stats.proportion import proportions_ztest
 from auth import login
+from agendador import fontes_sidebar
+from cache_compartilhado import compartilhado
+from carga_paralela import carregar_paralelo
+from data_access import Tabela
+from date_filter import fatiar, indexar, limites, periodo_sidebar
+import sync
+from ztest import comparar_faixas, tabela_faixas, ztest_proporcoes
 
 # Configuração da página
 st.set_page_config(page_title="Clarity Insights", layout="wide")
 st.title("Clarity Insights")
 
-# Conectar ao Supabase
-load_dotenv()
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+SCROLL = Tabela(
+    "scrollData",
+    colunas=("timestamp", "Scroll depth", "No of visitors", "% drop off"),
+    datas={"timestamp": None},
+    numeros=("Scroll depth", "No of visitors", "% drop off"),
+)
+ATENCAO = Tabela(
+    "attentionData",
+    colunas=("timestamp", "Scroll depth", "Avg time spent", "% of session length"),
+    datas={"timestamp": None},
+)
 
 if not login():
     st.stop()
 
-@st.cache_data(ttl=600)
+@compartilhado(ttl=600, fontes=("scrollData",))
 def carregar_dados_scroll():
-    scrolls = supabase.table("scrollData").select("*").execute()
-    df_scroll = pd.DataFrame(scrolls.data or [])
-    df_scroll["timestamp"] = pd.to_datetime(df_scroll["timestamp"], errors="coerce")
+    return indexar(sync.carregar(SCROLL), "timestamp")
 
-    for col in ["Scroll depth", "No of visitors", "% drop off"]:
-        df_scroll[col] = pd.to_numeric(df_scroll[col], errors="coerce")
-
-    return df_scroll
-
-@st.cache_data(ttl=600)
+@compartilhado(ttl=600, fontes=("attentionData",))
 def carregar_dados_atencao():
-    attention = supabase.table("attentionData").select("*").execute()
-    df_attention = pd.DataFrame(attention.data or [])
-    df_attention["timestamp"] = pd.to_datetime(df_attention["timestamp"], errors="coerce")
+    df_attention = sync.carregar(ATENCAO)
 
     # Convertendo 'Avg time spent' de formato de tempo para segundos (numérico)
     # Exemplo: '00:02:22' -> 142 segundos
@@ -57,12 +57,19 @@ def carregar_dados_atencao():
     for col in ["Scroll depth", "Avg time spent", "% of session length"]:
         df_attention[col] = pd.to_numeric(df_attention[col], errors="coerce")
 
-    return df_attention
+    return indexar(df_attention, "timestamp")
 
-df_scroll = carregar_dados_scroll()
-df_attention = carregar_dados_atencao()
+cargas = carregar_paralelo({"scrollData": carregar_dados_scroll, "attentionData": carregar_dados_atencao})
+if cargas.erros:
+    # As análises cruzam as duas tabelas: sem uma delas não há o que mostrar
+    for fonte, erro in cargas.erros.items():
+        st.error(f"Não foi possível carregar {fonte}: {erro}")
+    st.stop()
+df_scroll = cargas["scrollData"]
+df_attention = cargas["attentionData"]
 
 # Filtros
+fontes_sidebar("scrollData", "attentionData")
 st.sidebar.header("Filtro de Períodos")
 ver_tudo = st.sidebar.checkbox("Ver todos os dados", value=False)
 
@@ -72,52 +79,24 @@ if ver_tudo:
     df_combined_attention = df_attention.copy()
     df_combined_attention["Período"] = "Todos os dados"
 else:
-    # Garantir que min_date e max_date sejam calculados apenas se os dataframes não estiverem vazios
-    all_timestamps = pd.Series(dtype='datetime64[ns]')
-    if not df_scroll.empty:
-        all_timestamps = pd.concat([all_timestamps, df_scroll["timestamp"]])
-    if not df_attention.empty:
-        all_timestamps = pd.concat([all_timestamps, df_attention["timestamp"]])
-
-    if not all_timestamps.empty:
-        min_date = all_timestamps.min().date()
-        max_date = all_timestamps.max().date()
-    else:
-        st.warning("Não há dados disponíveis para os períodos selecionados.")
-        st.stop()
+    # Limites comuns às duas tabelas; sem dados, o seletor avisa e interrompe a página
+    min_date, max_date = limites(df_scroll, df_attention) or (None, None)
 
     st.sidebar.markdown("### Período A")
-    periodo_a = st.sidebar.date_input("Data A", [min_date, min_date], min_value=min_date, max_value=max_date, key='periodo_a')
+    periodo_a = periodo_sidebar(df_scroll, df_attention, rotulo="Data A", padrao=[min_date, min_date], key='periodo_a')
 
     st.sidebar.markdown("### Período B")
-    periodo_b = st.sidebar.date_input("Data B", [max_date, max_date], min_value=min_date, max_value=max_date, key='periodo_b')
-
-    if isinstance(periodo_a, tuple) and isinstance(periodo_b, tuple):
-
-        df_a_scroll = df_scroll[
-            (df_scroll["timestamp"].dt.date >= periodo_a[0]) & (df_scroll["timestamp"].dt.date <= periodo_a[1])
-        ].copy()
-        df_b_scroll = df_scroll[
-            (df_scroll["timestamp"].dt.date >= periodo_b[0]) & (df_scroll["timestamp"].dt.date <= periodo_b[1])
-        ].copy()
-
-        df_a_attention = df_attention[
-            (df_attention["timestamp"].dt.date >= periodo_a[0]) & (df_attention["timestamp"].dt.date <= periodo_a[1])
-        ].copy()
-        df_b_attention = df_attention[
-            (df_attention["timestamp"].dt.date >= periodo_b[0]) & (df_attention["timestamp"].dt.date <= periodo_b[1])
-        ].copy()
-
-        df_a_scroll["Período"] = "Período A"
-        df_b_scroll["Período"] = "Período B"
-        df_a_attention["Período"] = "Período A"
-        df_b_attention["Período"] = "Período B"
-
-        df_combined_scroll = pd.concat([df_a_scroll, df_b_scroll])
-        df_combined_attention = pd.concat([df_a_attention, df_b_attention])
-    else:
-        st.error("Selecione ambos os períodos corretamente.")
-        st.stop()
+    periodo_b = periodo_sidebar(df_scroll, df_attention, rotulo="Data B", padrao=[max_date, max_date], key='periodo_b')
+
+    # Cada período é uma fatia do índice por data; o rótulo entra só na concatenação
+    df_combined_scroll = pd.concat([
+        fatiar(df_scroll, *periodo_a).assign(Período="Período A"),
+        fatiar(df_scroll, *periodo_b).assign(Período="Período B"),
+    ])
+    df_combined_attention = pd.concat([
+        fatiar(df_attention, *periodo_a).assign(Período="Período A"),
+        fatiar(df_attention, *periodo_b).assign(Período="Período B"),
+    ])
 
 # ==============================
 # Gráficos básicos - Scroll
@@ -203,47 +182,13 @@ else:
 # ===================================
 st.subheader("Análise de Proporções por Faixas de Scroll (5 em 5%)")
 
-resultados_scroll = []
-if not df_combined_scroll.empty:
-    faixas_scroll = sorted(df_combined_scroll["Scroll depth"].unique())
-    # Considere as faixas em ordem crescente e de 5 em 5%
-    for depth in faixas_scroll:
-        faixa = df_combined_scroll[df_combined_scroll["Scroll depth"] == depth]
-        # total de visitantes = visitantes na menor faixa (topo do funil)
-        total_a = df_combined_scroll[(df_combined_scroll["Período"] == "Período A") & 
-                                    (df_combined_scroll["Scroll depth"] == faixas_scroll[0])]["No of visitors"].sum()
-        total_b = df_combined_scroll[(df_combined_scroll["Período"] == "Período B") & 
-                                    (df_combined_scroll["Scroll depth"] == faixas_scroll[0])]["No of visitors"].sum()
-        faixa_a = faixa[faixa["Período"] == "Período A"]["No of visitors"].sum()
-        faixa_b = faixa[faixa["Período"] == "Período B"]["No of visitors"].sum()
-
-        if total_a > 0 and total_b > 0:
-            prop_a = faixa_a / total_a
-            prop_b = faixa_b / total_b
-
-            count = [faixa_a, faixa_b]
-            nobs = [total_a, total_b]
-
-            if all(n > 0 for n in nobs):
-                stat, pval = proportions_ztest(count, nobs)
-                if pval < 0.05:
-                    if prop_b > prop_a:
-                        status = "✅ Melhorou"
-                    else:
-                        status = "❌ Piorou"
-                else:
-                    status = "⚖️ Inconclusivo"
-                resultados_scroll.append({
-                    "Faixa": f"{depth}%",
-                    "Período A (%)": f"{prop_a:.2%}",
-                    "Período B (%)": f"{prop_b:.2%}",
-                    "Valor-p": round(pval, 4),
-                    "Resultado": status
-                })
-
-if resultados_scroll:
-    # Mostrar resultados em tabela
-    df_resultados_scroll = pd.DataFrame(resultados_scroll)
+# Visitantes por faixa e período, agregados uma vez; todas as faixas testadas numa passada
+tabela_scroll = tabela_faixas(df_combined_scroll, "No of visitors", "sum")
+faixas_scroll = list(tabela_scroll.index)
+df_resultados_scroll = comparar_faixas(tabela_scroll)
+
+if not df_resultados_scroll.empty:
+    # Mostrar resultados em tabela (valor-p ajustado para comparações múltiplas, método de Holm)
     st.dataframe(df_resultados_scroll, use_container_width=True)
 
     # Mostrar resumo
@@ -264,16 +209,9 @@ if not df_combined_scroll.empty and faixas_scroll:
         min_value=int(min(faixas_scroll)), max_value=int(max(faixas_scroll)), value=int(faixas_scroll[0]), step=5, key='scroll_value_scroll'
     )
 
-    # total no topo do funil
-    total_a_scroll = df_combined_scroll[(df_combined_scroll["Período"] == "Período A") & 
-                                (df_combined_scroll["Scroll depth"] == faixas_scroll[0])]["No of visitors"].sum()
-    total_b_scroll = df_combined_scroll[(df_combined_scroll["Período"] == "Período B") & 
-                                (df_combined_scroll["Scroll depth"] == faixas_scroll[0])]["No of visitors"].sum()
-    # visitantes na faixa
-    faixa_a_scroll = df_combined_scroll[(df_combined_scroll["Período"] == "Período A") & 
-                                (df_combined_scroll["Scroll depth"] == scroll_value_scroll)]["No of visitors"].sum()
-    faixa_b_scroll = df_combined_scroll[(df_combined_scroll["Período"] == "Período B") & 
-                                (df_combined_scroll["Scroll depth"] == scroll_value_scroll)]["No of visitors"].sum()
+    # total no topo do funil e visitantes na faixa
+    total_a_scroll, total_b_scroll = tabela_scroll.iloc[0]
+    faixa_a_scroll, faixa_b_scroll = tabela_scroll.reindex([scroll_value_scroll], fill_value=0).iloc[0]
 
     prop_a_scroll = faixa_a_scroll / total_a_scroll if total_a_scroll > 0 else 0
     prop_b_scroll = faixa_b_scroll / total_b_scroll if total_b_scroll > 0 else 0
@@ -285,11 +223,10 @@ if not df_combined_scroll.empty and faixas_scroll:
     - **Período B:** {faixa_b_scroll} de {total_b_scroll} visitantes → **{prop_b_scroll:.2%}**
     """)
 
-    count_scroll = [faixa_a_scroll, faixa_b_scroll]
     nobs_scroll = [total_a_scroll, total_b_scroll]
 
     if all(n > 0 for n in nobs_scroll):
-        stat_scroll, pval_scroll = proportions_ztest(count_scroll, nobs_scroll)
+        stat_scroll, pval_scroll = ztest_proporcoes(faixa_a_scroll, total_a_scroll, faixa_b_scroll, total_b_scroll)
         st.markdown(f"""
         - Estatística z: {stat_scroll:.4f}
         - Valor-p: {pval_scroll:.4f}
@@ -346,51 +283,13 @@ else:
 # ===================================
 st.subheader("Análise de Proporções por Faixas de Atenção (5 em 5%)")
 
-resultados_attention = []
-if not df_combined_attention.empty:
-    faixas_attention = sorted(df_combined_attention["Scroll depth"].unique())
-
-    for depth in faixas_attention:
-        faixa = df_combined_attention[df_combined_attention["Scroll depth"] == depth]
-        
-        # total de sessões na faixa 0% (ou a menor faixa de scroll)
-        # Usar .get(0, 0) para evitar IndexError se a faixa 0% não existir
-        total_sessions_a = df_combined_attention[(df_combined_attention["Período"] == "Período A") & 
-                                                (df_combined_attention["Scroll depth"] == faixas_attention[0])]["Avg time spent"].count()
-        total_sessions_b = df_combined_attention[(df_combined_attention["Período"] == "Período B") & 
-                                                (df_combined_attention["Scroll depth"] == faixas_attention[0])]["Avg time spent"].count()
-
-        # Número de sessões que atingiram a faixa atual com Avg time spent > 0
-        sessions_at_depth_a = faixa[faixa["Período"] == "Período A"]["Avg time spent"].count()
-        sessions_at_depth_b = faixa[faixa["Período"] == "Período B"]["Avg time spent"].count()
-
-        if total_sessions_a > 0 and total_sessions_b > 0:
-            prop_a = sessions_at_depth_a / total_sessions_a
-            prop_b = sessions_at_depth_b / total_sessions_b
-
-            count = [sessions_at_depth_a, sessions_at_depth_b]
-            nobs = [total_sessions_a, total_sessions_b]
-
-            if all(n > 0 for n in nobs):
-                stat, pval = proportions_ztest(count, nobs)
-                if pval < 0.05:
-                    if prop_b > prop_a:
-                        status = "✅ Melhorou"
-                    else:
-                        status = "❌ Piorou"
-                else:
-                    status = "⚖️ Inconclusivo"
-                resultados_attention.append({
-                    "Faixa": f"{depth}%",
-                    "Período A (%)": f"{prop_a:.2%}",
-                    "Período B (%)": f"{prop_b:.2%}",
-                    "Valor-p": round(pval, 4),
-                    "Resultado": status
-                })
-
-if resultados_attention:
-    # Mostrar resultados em tabela
-    df_resultados_attention = pd.DataFrame(resultados_attention)
+# Sessões com tempo de atenção por faixa e período (contagem), agregadas uma vez
+tabela_attention = tabela_faixas(df_combined_attention, "Avg time spent", "count")
+faixas_attention = list(tabela_attention.index)
+df_resultados_attention = comparar_faixas(tabela_attention)
+
+if not df_resultados_attention.empty:
+    # Mostrar resultados em tabela (valor-p ajustado para comparações múltiplas, método de Holm)
     st.dataframe(df_resultados_attention, use_container_width=True)
 
     # Mostrar resumo
@@ -412,17 +311,11 @@ if not df_combined_attention.empty and faixas_attention:
         min_value=int(min(faixas_attention)), max_value=int(max(faixas_attention)), value=int(faixas_attention[0]), step=5, key='attention_value_scroll'
     )
 
-    # total de sessões na faixa 0% (ou a menor faixa de scroll)
-    total_sessions_a_custom = df_combined_attention[(df_combined_attention["Período"] == "Período A") & 
-                                                (df_combined_attention["Scroll depth"] == faixas_attention[0])]["Avg time spent"].count()
-    total_sessions_b_custom = df_combined_attention[(df_combined_attention["Período"] == "Período B") & 
-                                                (df_combined_attention["Scroll depth"] == faixas_attention[0])]["Avg time spent"].count()
-
-    # Número de sessões que atingiram a faixa atual com Avg time spent > 0
-    sessions_at_depth_a_custom = df_combined_attention[(df_combined_attention["Período"] == "Período A") & 
-                                                    (df_combined_attention["Scroll depth"] == attention_value_scroll)]["Avg time spent"].count()
-    sessions_at_depth_b_custom = df_combined_attention[(df_combined_attention["Período"] == "Período B") & 
-                                                    (df_combined_attention["Scroll depth"] == attention_value_scroll)]["Avg time spent"].count()
+    # Sessões na menor faixa (base) e na faixa escolhida com Avg time spent preenchido
+    total_sessions_a_custom, total_sessions_b_custom = tabela_attention.iloc[0]
+    sessions_at_depth_a_custom, sessions_at_depth_b_custom = (
+        tabela_attention.reindex([attention_value_scroll], fill_value=0).iloc[0]
+    )
 
     prop_a_attention_custom = sessions_at_depth_a_custom / total_sessions_a_custom if total_sessions_a_custom > 0 else 0
     prop_b_attention_custom = sessions_at_depth_b_custom / total_sessions_b_custom if total_sessions_b_custom > 0 else 0
@@ -438,7 +331,9 @@ if not df_combined_attention.empty and faixas_attention:
     nobs_attention_custom = [total_sessions_a_custom, total_sessions_b_custom]
 
     if all(n > 0 for n in nobs_attention_custom):
-        stat_attention_custom, pval_attention_custom = proportions_ztest(count_attention_custom, nobs_attention_custom)
+        stat_attention_custom, pval_attention_custom = ztest_proporcoes(
+            count_attention_custom[0], nobs_attention_custom[0], count_attention_custom[1], nobs_attention_custom[1]
+        )
         st.markdown(f"""
         - Estatística z: {stat_attention_custom:.4f}
         - Valor-p: {pval_attention_custom:.4f}
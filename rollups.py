@@ -0,0 +1,176 @@
+import json
+import os
+import threading
+from dataclasses import dataclass
+
+import pandas as pd
+
+import sync
+from data_access import Tabela
+
+PASTA_ROLLUPS = os.path.join(sync.PASTA_DADOS, "rollups")
+
+_travas = {}
+_trava_global = threading.Lock()
+
+
+@dataclass(frozen=True)
+class Rollup:
+    """Agregado diário de uma tabela: dia + ``chaves`` extras, com as ``medidas`` somáveis.
+
+    ``medidas`` mapeia nome -> (coluna, agregação). Só entram medidas aditivas
+    entre dias (somas e contagens), para que qualquer intervalo ou mês seja a
+    soma dos dias e os KPIs de razão possam ser recalculados a partir delas.
+    """
+    tabela: Tabela
+    dia: str
+    medidas: dict
+    chaves: tuple = ()
+
+
+ROLLUPS = {
+    "Shopify": Rollup(
+        Tabela("Shopify", colunas=("date", "price", "order_number"), datas={"date": "%Y-%m-%d"}, numeros=("price",)),
+        dia="date",
+        # Um pedido pertence a um único dia, então pedidos distintos por dia somam certo
+        medidas={"receita": ("price", "sum"), "itens": ("price", "count"), "pedidos": ("order_number", "nunique")},
+    ),
+    # Itens vendidos por SKU e dia (previsão de demanda); cada linha da Shopify é um item
+    "ShopifySku": Rollup(
+        Tabela("Shopify", colunas=("date", "price", "sku"), datas={"date": "%Y-%m-%d"}, numeros=("price",)),
+        dia="date",
+        chaves=("sku",),
+        medidas={"itens": ("price", "size")},
+    ),
+    "googleAnalytics": Rollup(
+        Tabela(
+            "googleAnalytics",
+            colunas=("date", "adCost", "adClicks", "conversoes", "receitaCompras", "adImpressions"),
+            datas={"date": "%Y%m%d"},
+            numeros=("adCost", "adClicks", "conversoes", "receitaCompras", "adImpressions"),
+        ),
+        dia="date",
+        medidas={c: (c, "sum") for c in ("adCost", "adClicks", "conversoes", "receitaCompras", "adImpressions")},
+    ),
+    "metaAds": Rollup(
+        Tabela(
+            "metaAds",
+            colunas=("date_start", "campaign_name", "spend", "clicks", "purchase", "impressions"),
+            datas={"date_start": None},
+            numeros=("spend", "clicks", "purchase", "impressions"),
+        ),
+        dia="date_start",
+        chaves=("campaign_name",),
+        medidas={c: (c, "sum") for c in ("spend", "clicks", "purchase", "impressions")},
+    ),
+    "stories": Rollup(
+        Tabela(
+            "stories",
+            colunas=("date", "reach", "replies", "interactions"),
+            datas={"date": None},
+            numeros=("reach", "replies", "interactions"),
+        ),
+        dia="date",
+        medidas={
+            "reach": ("reach", "sum"), "stories": ("reach", "size"),
+            "replies": ("replies", "sum"), "interactions": ("interactions", "sum"),
+        },
+    ),
+}
+
+
+def _caminho(nome, grao, pasta):
+    return os.path.join(pasta, f"{nome}_{grao}.parquet")
+
+
+def _trava(nome):
+    # Um recálculo por agregado de cada vez: vários loaders (e o agendador) pedem o mesmo rollup juntos
+    with _trava_global:
+        return _travas.setdefault(nome, threading.Lock())
+
+
+def _ler_estado(nome, pasta):
+    caminho = os.path.join(pasta, f"{nome}.json")
+    if not os.path.exists(caminho):
+        return {}
+    with open(caminho, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _agregar(df, rollup):
+    # Todo agregado usa "date" (dia, sem hora) como coluna de tempo; chaves de texto
+    # são normalizadas do mesmo jeito que as páginas fazem (str + strip)
+    df = df.assign(date=df[rollup.dia].dt.normalize())
+    for chave in rollup.chaves:
+        df[chave] = df[chave].astype(str).str.strip()
+    return df.groupby(["date", *rollup.chaves], observed=True).agg(**rollup.medidas).reset_index()
+
+
+def por_mes(diario, chaves=()):
+    """Soma um agregado diário (já filtrado ou não) em meses."""
+    mensal = diario.assign(mes=diario["date"].dt.to_period("M").dt.to_timestamp())
+    return mensal.drop(columns="date").groupby(["mes", *chaves], observed=True).sum(numeric_only=True).reset_index()
+
+
+def atualizar(nome, pasta=PASTA_ROLLUPS, pasta_dados=sync.PASTA_DADOS):
+    """Atualiza os agregados diário e mensal de ``nome`` a partir do armazenamento local.
+
+    Só recalcula os dias a partir do último dia já agregado, lendo do Parquet
+    só essas linhas: a sincronização incremental só traz linhas com marca
+    d'água >= a anterior, então os dias antigos não mudam. Depois de uma
+    recarga completa da tabela, refaz tudo.
+    """
+    rollup = ROLLUPS[nome]
+    with _trava(nome):
+        fonte = sync.estado(rollup.tabela.nome, pasta_dados)
+        estado = _ler_estado(nome, pasta)
+        caminho_diario = _caminho(nome, "diario", pasta)
+
+        if estado.get("versao_fonte") == fonte.get("versao") and os.path.exists(caminho_diario):
+            return False
+
+        incremental = (
+            estado.get("ultimo_dia") is not None
+            and estado.get("versao_fonte", 0) >= fonte.get("carga_completa", 0)
+            and os.path.exists(caminho_diario)
+        )
+
+        if incremental:
+            desde = pd.Timestamp(estado["ultimo_dia"])
+            # O filtro do Parquet só poda a leitura (um dia de folga para fusos); o corte exato é no pandas
+            filtros = sync.filtro_desde(rollup.tabela, rollup.dia, desde - pd.Timedelta(days=1), pasta_dados)
+            bruto = sync.ler(rollup.tabela, pasta_dados, filtros=filtros)
+            anterior = pd.read_parquet(caminho_diario)
+            diario = pd.concat(
+                [anterior[anterior["date"] < desde], _agregar(bruto[bruto[rollup.dia].dt.normalize() >= desde], rollup)],
+                ignore_index=True,
+            )
+        else:
+            diario = _agregar(sync.ler(rollup.tabela, pasta_dados), rollup)
+
+        for grao, tabela in (("diario", diario), ("mensal", por_mes(diario, rollup.chaves))):
+            sync.gravar_atomico(_caminho(nome, grao, pasta), lambda temporario: tabela.to_parquet(temporario, index=False))
+        sync.gravar_json(os.path.join(pasta, f"{nome}.json"), {
+            "versao_fonte": fonte.get("versao"),
+            "ultimo_dia": str(diario["date"].max().date()) if diario["date"].notna().any() else None,
+        })
+        return True
+
+
+def ler(nome, grao="diario", pasta=PASTA_ROLLUPS):
+    return pd.read_parquet(_caminho(nome, grao, pasta))
+
+
+def carregar(nome, grao="diario", cliente=None):
+    """Sincroniza a tabela de origem, atualiza o agregado e devolve o grão pedido.
+
+    ``df.attrs["versao"]`` é a versão da tabela de origem que o agregado lido
+    resume (como em ``sync.ler``).
+    """
+    sync.garantir(ROLLUPS[nome].tabela.nome, cliente=cliente)
+    atualizar(nome)
+    # Estado lido antes do Parquet, que é gravado antes dele: o agregado é desta versão ou de uma mais nova
+    versao = _ler_estado(nome, PASTA_ROLLUPS).get("versao_fonte")
+    df = ler(nome, grao)
+    df.attrs["versao"] = versao
+    return df
@@ -1,19 +1,19 @@
 import streamlit as st
-import pandas as pd
 import plotly.express as px
-from supabase import create_client
-from dotenv import load_dotenv
-import os
 from auth import login
+from agendador import fontes_sidebar
+from cache_compartilhado import compartilhado
+from data_access import Tabela
+from date_filter import fatiar, indexar, periodo_sidebar
+from sku import decodificar_skus
+import sync
+import rollups
 
-load_dotenv()
-
-
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
-
-
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+TABELA_SHOPIFY = Tabela(
+    "Shopify",
+    colunas=("date", "price", "order_number", "sku"),
+    datas={"date": "%Y-%m-%d"},
+)
 
 
 def shopify_page():
@@ -21,47 +21,46 @@ def shopify_page():
         st.stop()
     st.title("Dashboard Shopify - All Weather")
 
-    @st.cache_data(ttl=600)
+    @compartilhado(ttl=600, fontes=("Shopify",))
     def carregar_dados():
-        response = supabase.table("Shopify").select("*").execute()
-        df = pd.DataFrame(response.data)
-        df["date"] = pd.to_datetime(df["date"], format="%Y-%m-%d")
-        return df
+        return indexar(sync.carregar(TABELA_SHOPIFY), "date")
+
+    @compartilhado(ttl=600, fontes=("Shopify",))
+    def carregar_diario():
+        return indexar(rollups.carregar("Shopify"), "date")
 
     df = carregar_dados()
+    diario = carregar_diario()
 
     # Filtros
-    start_date = st.sidebar.date_input("Data inicial", df['date'].min())
-    end_date = st.sidebar.date_input("Data final", df['date'].max())
-    filtro = df[(df['date'] >= pd.to_datetime(start_date)) & (df['date'] <= pd.to_datetime(end_date))]
-
-    # KPIs
+    start_date, end_date = periodo_sidebar(df)
+    fontes_sidebar("Shopify")
+    filtro = fatiar(df, start_date, end_date)
+    dias = fatiar(diario, start_date, end_date)
+
+    # KPIs (a partir do agregado diário)
+    receita = dias['receita'].sum()
+    ticket = receita / dias['itens'].sum() if dias['itens'].sum() > 0 else 0
     col1, col2, col3, col4 = st.columns(4)
-    col1.metric("Receita Total", f"R$ {filtro['price'].sum():,.0f}".replace(",", "."))
-    col2.metric("Ticket Médio", f"R$ {filtro['price'].mean():,.2f}".replace(",", "X").replace(".", ",").replace("X", "."))
-    col3.metric("Pedidos", f"{filtro['order_number'].nunique():,}".replace(",", "."))
+    col1.metric("Receita Total", f"R$ {receita:,.0f}".replace(",", "."))
+    col2.metric("Ticket Médio", f"R$ {ticket:,.2f}".replace(",", "X").replace(".", ",").replace("X", "."))
+    col3.metric("Pedidos", f"{dias['pedidos'].sum():,}".replace(",", "."))
     # col4.metric("Descontos", f"R$ {filtro['discount'].sum():,.2f}".replace(",", "X").replace(".", ",").replace("X", "."))
 
     st.markdown("### Visão Geral")
 
     # Receita por dia
     st.subheader("Receita por Dia")
-    receita_dia = filtro.groupby("date")["price"].sum()
+    receita_dia = dias.set_index("date")["receita"]
     st.line_chart(receita_dia)
 
     # Receita por mês
     st.subheader("Receita por Mês")
-    filtro["mes"] = filtro["date"].dt.strftime("%b/%y")
-    receita_mes = filtro.groupby("mes")["price"].sum().sort_index()
+    receita_mes = rollups.por_mes(dias).set_index("mes")["receita"]
     st.bar_chart(receita_mes)
 
     # Tratamento SKU
-    df_sku = filtro[filtro['sku'].notnull() & filtro['sku'].str.match(r'^AW_ES_[A-Z]{2}_[A-Z]{2}_[A-Z0-9]+$')].copy()
-    df_sku['tipo'] = df_sku['sku'].str.extract(r'^AW_ES_([A-Z]{2})_')
-    df_sku['cor'] = df_sku['sku'].str.extract(r'^AW_ES_[A-Z]{2}_([A-Z]{2})_')
-    df_sku['tamanho'] = df_sku['sku'].str.extract(r'^AW_ES_[A-Z]{2}_[A-Z]{2}_([A-Z0-9]+)')
-    df_sku['compressao'] = df_sku['tipo'].map({'LC': 'Com', 'CC': 'Com', 'LS': 'Sem', 'CS': 'Sem'})
-    df_sku['comprimento'] = df_sku['tipo'].map({'LC': 'Longo', 'LS': 'Longo', 'CC': 'Curto', 'CS': 'Curto'})
+    df_sku = decodificar_skus(filtro)
 
     # Gráficos
     st.subheader("Distribuição por Comprimento")
@@ -81,7 +80,7 @@ def shopify_page():
     st.plotly_chart(fig)
 
     st.subheader("Top 10 SKUs - Percentual")
-    sku_counts = df_sku['sku'].value_counts(normalize=True).head(10).reset_index()
+    sku_counts = df_sku['sku'].value_counts(normalize=True).loc[lambda s: s > 0].head(10).reset_index()
     sku_counts.columns = ['sku', 'percentage']
     sku_counts['percentage'] = sku_counts['percentage'] * 100
 
@@ -0,0 +1,56 @@
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# AW_ES_<tipo>_<cor>_<tamanho>, ex.: AW_ES_LC_PR_M
+PADRAO_SKU = r'^AW_ES_([A-Z]{2})_([A-Z]{2})_([A-Z0-9]+)$'
+
+COMPRESSAO = {'LC': 'Com', 'CC': 'Com', 'LS': 'Sem', 'CS': 'Sem'}
+COMPRIMENTO = {'LC': 'Longo', 'LS': 'Longo', 'CC': 'Curto', 'CS': 'Curto'}
+
+ATRIBUTOS = ['tipo', 'cor', 'tamanho', 'compressao', 'comprimento']
+
+
+@lru_cache(maxsize=16)
+def _dimensao(skus):
+    serie = pd.Series(skus, dtype=object)
+    partes = serie.str.extract(PADRAO_SKU)
+    partes.columns = ['tipo', 'cor', 'tamanho']
+    partes.index = pd.Index(skus, name='sku')
+    partes = partes.dropna()
+    partes['compressao'] = partes['tipo'].map(COMPRESSAO)
+    partes['comprimento'] = partes['tipo'].map(COMPRIMENTO)
+    return partes.astype('category')
+
+
+def dimensao_sku(skus):
+    """Tabela de dimensão (uma linha por SKU válido) com tipo, cor, tamanho, compressão e comprimento.
+
+    Cada SKU distinto passa pelo regex uma única vez; o resultado fica em cache
+    para o mesmo conjunto de SKUs.
+    """
+    distintos = pd.unique(pd.Series(skus).dropna().astype(str))
+    return _dimensao(tuple(sorted(distintos)))
+
+
+def decodificar_skus(df, coluna='sku', apenas_validos=True):
+    """Anexa os atributos do SKU a cada linha, juntando pelo código categórico do SKU.
+
+    O custo por linha é só um lookup de código; o parsing depende do número de
+    SKUs distintos. Com ``apenas_validos=False`` linhas com SKU fora do padrão
+    são mantidas, com atributos ausentes.
+    """
+    dimensao = dimensao_sku(df[coluna])
+    codigos = pd.Categorical(df[coluna], categories=dimensao.index).codes
+    if apenas_validos:
+        validos = codigos >= 0
+        df = df[validos]
+        codigos = codigos[validos]
+    df = df.copy()
+    for atributo in ATRIBUTOS:
+        coluna_dim = dimensao[atributo]
+        # O -1 no fim faz o código -1 (SKU inválido) cair em "ausente"
+        mapa = np.append(coluna_dim.cat.codes.to_numpy(), -1)
+        df[atributo] = pd.Categorical.from_codes(mapa[codigos], categories=coluna_dim.cat.categories)
+    return df
@@ -0,0 +1,74 @@
+import os
+import threading
+
+import httpx
+import streamlit as st
+from dotenv import load_dotenv
+from supabase import ClientOptions, create_client
+
+load_dotenv()
+
+SUPABASE_URL = os.getenv("SUPABASE_URL")
+SUPABASE_KEY = os.getenv("SUPABASE_KEY")
+
+# Contadores do processo: quantas requisições saíram e quantas abriram socket novo
+_contadores = {"requisicoes": 0, "conexoes_novas": 0}
+_trava = threading.Lock()
+
+
+def _rastrear(evento, info):
+    # Callback de trace do httpcore; só dispara o connect quando o pool não tinha conexão livre
+    if evento == "connection.connect_tcp.complete":
+        with _trava:
+            _contadores["conexoes_novas"] += 1
+
+
+def _marcar_requisicao(request):
+    request.extensions["trace"] = _rastrear
+    with _trava:
+        _contadores["requisicoes"] += 1
+
+
+def criar_http():
+    """Cliente HTTP com keep-alive e pool de conexões, compartilhado por todo o processo."""
+    return httpx.Client(
+        limits=httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=120),
+        timeout=httpx.Timeout(60.0, connect=10.0),
+        event_hooks={"request": [_marcar_requisicao]},
+    )
+
+
+@st.cache_resource(show_spinner=False)
+def _http():
+    # Um pool por processo, dividido entre o cliente de dados e os clientes de login das sessões
+    return criar_http()
+
+
+def _criar_cliente():
+    return create_client(SUPABASE_URL, SUPABASE_KEY, options=ClientOptions(httpx_client=_http()))
+
+
+@st.cache_resource(show_spinner=False)
+def obter_cliente():
+    """Cliente de dados do processo (loaders, sync e agendador), sempre com a chave anônima.
+
+    Nunca faz login: o supabase-py troca o Authorization do cliente que entra
+    ou sai, e isso valeria para as consultas de todas as sessões. O login fica
+    em ``cliente_sessao``; os dois dividem só o pool HTTP.
+    """
+    return _criar_cliente()
+
+
+def cliente_sessao():
+    """Cliente Supabase da sessão do Streamlit, usado só para login e logout."""
+    if "supabase" not in st.session_state:
+        st.session_state["supabase"] = _criar_cliente()
+    return st.session_state["supabase"]
+
+
+def estatisticas_conexao():
+    """Requisições feitas, sockets abertos e quantas requisições reaproveitaram conexão."""
+    with _trava:
+        estatisticas = dict(_contadores)
+    estatisticas["reutilizadas"] = estatisticas["requisicoes"] - estatisticas["conexoes_novas"]
+    return estatisticas
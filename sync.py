@@ -0,0 +1,275 @@
+import json
+import os
+import tempfile
+import threading
+import time
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+import esquemas
+from data_access import Tabela, buscar_arrow, para_pandas, tipar
+from supabase_client import obter_cliente
+
+# Armazenamento local colunar (um Parquet por tabela + um JSON com a marca d'água)
+PASTA_DADOS = os.getenv("DADOS_DIR", os.path.join(".cache", "dados"))
+
+# Coluna usada como marca d'água de cada tabela. None = sem coluna temporal,
+# a tabela é baixada inteira a cada sincronização.
+MARCAS_DAGUA = {
+    "Shopify": "date",
+    "Posts": "timestamp",
+    "stories": "timestamp",
+    "metaAds": "date_start",
+    "googleAnalytics": "date",
+    "scrollData": "timestamp",
+    "attentionData": "timestamp",
+    "estoque": "timestamp",
+    "vendas": None,
+}
+
+# Quem acabou de sincronizar (agendador ou outra página) poupa a ida ao Supabase dos demais por RECENTE segundos
+RECENTE = 60
+
+_travas = {}
+_trava_global = threading.Lock()
+_sincronizadas = {}
+
+
+def _trava(nome):
+    # Uma sincronização por tabela de cada vez dentro do processo (reentrante: ``garantir`` a segura antes)
+    with _trava_global:
+        return _travas.setdefault(nome, threading.RLock())
+
+
+def _caminhos(nome, pasta):
+    return os.path.join(pasta, f"{nome}.parquet"), os.path.join(pasta, f"{nome}.json")
+
+
+def _ler_estado(nome, pasta=PASTA_DADOS):
+    _, caminho_estado = _caminhos(nome, pasta)
+    if not os.path.exists(caminho_estado):
+        return {}
+    with open(caminho_estado, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def gravar_atomico(caminho, gravar):
+    """Grava ``caminho`` por ``gravar(temporario)`` num arquivo de nome único na mesma pasta e troca de uma vez.
+
+    Quem lê nunca vê o arquivo pela metade, e gravações simultâneas não
+    disputam o mesmo temporário.
+    """
+    pasta = os.path.dirname(caminho) or "."
+    os.makedirs(pasta, exist_ok=True)
+    with tempfile.NamedTemporaryFile(dir=pasta, prefix=os.path.basename(caminho), suffix=".tmp", delete=False) as f:
+        temporario = f.name
+    try:
+        gravar(temporario)
+        os.replace(temporario, caminho)
+    except BaseException:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        raise
+
+
+def gravar_json(caminho, dados):
+    def gravar(temporario):
+        with open(temporario, "w", encoding="utf-8") as f:
+            json.dump(dados, f)
+    gravar_atomico(caminho, gravar)
+
+
+def _gravar(nome, dados, estado, pasta):
+    caminho_dados, caminho_estado = _caminhos(nome, pasta)
+    gravar_atomico(caminho_dados, lambda temporario: pq.write_table(dados, temporario))
+    gravar_json(caminho_estado, estado)
+
+
+def _conformar(delta, esquema):
+    """Converte as colunas de ``delta`` para os tipos de ``esquema`` (o Parquet gravado), quando der.
+
+    Evita que o concat vire ``object`` (página só com nulos, Parquet antigo
+    gravado com texto) e que datas mudem de tipo ao voltar do pandas.
+    """
+    colunas = []
+    for campo in delta.schema:
+        coluna = delta.column(campo.name)
+        if campo.name in esquema.names and esquema.field(campo.name).type != campo.type:
+            try:
+                coluna = coluna.cast(esquema.field(campo.name).type)
+            except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+                pass
+        colunas.append(coluna)
+    return pa.table(colunas, names=delta.column_names)
+
+
+def _tipo_arrow(tipo):
+    # Tipo Arrow equivalente a um tipo de ``esquemas.ESQUEMAS`` (categoria é gravada como texto)
+    if tipo == "category":
+        return pa.string()
+    if tipo.startswith("datetime64"):
+        return pa.timestamp("us", tz="UTC")
+    return pa.from_numpy_dtype(tipo)
+
+
+def _vazia(nome, chave, coluna_marca):
+    """Tabela sem linhas com as colunas conhecidas localmente: chave, marca d'água e as de ``esquemas.ESQUEMAS``.
+
+    Serve quando a carga completa não trouxe linhas nem o esquema do banco
+    (OpenAPI fora do ar, ``SupabaseLocal``): o Parquet gravado ainda atende
+    leituras projetadas nessas colunas.
+    """
+    campos = {chave: pa.int64()}
+    if coluna_marca is not None:
+        campos[coluna_marca] = pa.string()
+    for coluna, tipo in esquemas.ESQUEMAS.get(nome, {}).items():
+        campos[coluna] = _tipo_arrow(tipo)
+    return pa.schema(list(campos.items())).empty_table()
+
+
+def _marca(dados, coluna):
+    # Maior valor da coluna em formato que vai no JSON de estado e no filtro ``gte`` do PostgREST
+    valor = pc.max(dados.column(coluna)).as_py()
+    return valor.isoformat() if hasattr(valor, "isoformat") else valor
+
+
+def sincronizar(nome, cliente=None, completo=False, chave="id", pasta=PASTA_DADOS, particoes=4):
+    """Traz para o armazenamento local as linhas novas de ``nome`` e devolve quantas vieram.
+
+    Busca só ``marca_dagua >= último valor visto`` (o ``>=`` recupera linhas do
+    último dia/instante que ainda estavam sendo gravadas) e faz upsert pela
+    ``chave``. ``completo=True`` rebaixa a tabela inteira, útil se linhas antigas
+    foram alteradas na origem.
+    """
+    cliente = cliente or obter_cliente()
+    coluna_marca = MARCAS_DAGUA.get(nome)
+    tabela = Tabela(nome, chave=chave)
+
+    with _trava(nome):
+        estado = _ler_estado(nome, pasta)
+        caminho_dados, _ = _caminhos(nome, pasta)
+        incremental = (
+            not completo and coluna_marca is not None
+            and estado.get("marca") is not None and os.path.exists(caminho_dados)
+        )
+
+        if incremental:
+            delta = buscar_arrow(cliente, tabela, desde=(coluna_marca, estado["marca"]))
+            gravado = pq.read_table(caminho_dados)
+            atual = para_pandas(gravado)
+            df = atual
+            if delta.num_rows:
+                df = (
+                    pd.concat([atual, para_pandas(_conformar(delta, gravado.schema))], ignore_index=True)
+                      .drop_duplicates(subset=chave, keep="last")
+                      .sort_values(chave)
+                      .reset_index(drop=True)
+                )
+            # O delta sempre repete o último dia; só grava (e muda a versão) se algo mudou
+            mudou = not df.equals(atual)
+            dados = _conformar(pa.Table.from_pandas(df, preserve_index=False), gravado.schema) if mudou else None
+        else:
+            # Carga completa: as páginas CSV viram Arrow e vão direto para o Parquet, sem pandas
+            delta = dados = buscar_arrow(cliente, tabela, particoes=particoes)
+            if dados.num_columns == 0:
+                dados = _vazia(nome, chave, coluna_marca)
+            mudou = True
+
+        if mudou:
+            marca = None
+            if coluna_marca is not None and coluna_marca in dados.column_names:
+                marca = _marca(dados, coluna_marca)
+            versao_nova = estado.get("versao", 0) + 1
+            _gravar(nome, dados, {
+                "marca": marca,
+                "versao": versao_nova,
+                "linhas": dados.num_rows,
+                # Quem deriva dados desta tabela (rollups) precisa saber se houve recarga completa
+                "carga_completa": estado.get("carga_completa", 0) if incremental else versao_nova,
+            }, pasta)
+
+        _sincronizadas[(pasta, nome)] = time.time()
+        return len(delta)
+
+
+def garantir(nome, cliente=None, chave="id", pasta=PASTA_DADOS):
+    """Sincroniza ``nome``, a menos que isso tenha acontecido há menos de ``RECENTE`` segundos neste processo."""
+    if time.time() - _sincronizadas.get((pasta, nome), 0) < RECENTE:
+        return 0
+    with _trava(nome):
+        # Quem esperava a trava (cargas em paralelo da mesma tabela) aproveita a sincronização que acabou
+        if time.time() - _sincronizadas.get((pasta, nome), 0) < RECENTE:
+            return 0
+        return sincronizar(nome, cliente=cliente, chave=chave, pasta=pasta)
+
+
+def sincronizado_em(nome, pasta=PASTA_DADOS):
+    """Horário (epoch) da última sincronização neste processo ou, na falta, da última gravação local; None se nunca."""
+    if (pasta, nome) in _sincronizadas:
+        return _sincronizadas[(pasta, nome)]
+    _, caminho_estado = _caminhos(nome, pasta)
+    return os.path.getmtime(caminho_estado) if os.path.exists(caminho_estado) else None
+
+
+def estado(nome, pasta=PASTA_DADOS):
+    """Marca d'água, versão e número de linhas da tabela no armazenamento local."""
+    return _ler_estado(nome, pasta)
+
+
+def versao(nome, pasta=PASTA_DADOS):
+    """Contador que muda a cada sincronização que alterou os dados da tabela."""
+    return _ler_estado(nome, pasta).get("versao", 0)
+
+
+def filtro_desde(tabela, coluna, momento, pasta=PASTA_DADOS):
+    """Filtro pyarrow ``coluna >= momento`` no tipo em que ``coluna`` está gravada no Parquet local.
+
+    Serve para ler só o fim de uma tabela (``ler(..., filtros=...)``). Colunas
+    de texto são comparadas no formato declarado na Tabela (ISO ou
+    ``%Y%m%d``, que ordenam como datas). Devolve None se a coluna não der
+    para comparar assim; aí a leitura é inteira.
+    """
+    caminho_dados, _ = _caminhos(tabela.nome, pasta)
+    tipo = pq.read_schema(caminho_dados).field(coluna).type
+    momento = pd.Timestamp(momento)
+    if pa.types.is_timestamp(tipo):
+        if tipo.tz is not None and momento.tz is None:
+            momento = momento.tz_localize(tipo.tz)
+        elif tipo.tz is None and momento.tz is not None:
+            momento = momento.tz_localize(None)
+        valor = momento.to_pydatetime()
+    elif pa.types.is_date(tipo):
+        valor = momento.date()
+    elif pa.types.is_string(tipo) or pa.types.is_large_string(tipo):
+        formato = tabela.datas.get(coluna)
+        valor = momento.strftime(formato) if formato else momento.date().isoformat()
+    else:
+        return None
+    return [(coluna, ">=", valor)]
+
+
+def ler(tabela, pasta=PASTA_DADOS, filtros=None):
+    """Lê do armazenamento local só as colunas da Tabela, já tipadas.
+
+    ``filtros`` (formato do pyarrow, ver ``filtro_desde``) descarta linhas na
+    leitura do Parquet, antes de virarem DataFrame. ``df.attrs["versao"]`` é a
+    versão dos dados lidos: quem memoiza algo derivado deles usa esta, não
+    ``versao()``, que pode já ter avançado desde a leitura.
+    """
+    caminho_dados, _ = _caminhos(tabela.nome, pasta)
+    # Lida antes dos dados: o Parquet é gravado antes do JSON, então os dados são desta versão ou de uma mais nova
+    versao_lida = versao(tabela.nome, pasta)
+    df = tipar(para_pandas(pq.read_table(caminho_dados, columns=list(tabela.colunas) or None, filters=filtros)), tabela)
+    df.attrs["versao"] = versao_lida
+    if filtros is None:
+        esquemas.registrar(tabela.nome, df)
+    return df
+
+
+def carregar(tabela, cliente=None, pasta=PASTA_DADOS):
+    """Sincroniza a tabela (delta, se não foi recém-sincronizada) e devolve a leitura local projetada e tipada."""
+    garantir(tabela.nome, cliente=cliente, chave=tabela.chave, pasta=pasta)
+    return ler(tabela, pasta)
@@ -0,0 +1,101 @@
+import pandas as pd
+from langchain_core.documents import Document
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+from chat_cache import CacheRespostas, chave_resposta
+from chat_llm import Cronometro, criar_llm, nome_llm, transmitir
+from chat_resumos import resumos_sku
+from chat_retriever import IndiceMetadados, extrair_filtro
+from sku import decodificar_skus
+
+
+class Relogio:
+    def __init__(self):
+        self.agora = 0.0
+
+    def __call__(self):
+        return self.agora
+
+
+class RetrieverFalso:
+    def __init__(self, documentos):
+        self.documentos = documentos
+        self.perguntas = []
+
+    def invoke(self, pergunta):
+        self.perguntas.append(pergunta)
+        return self.documentos
+
+
+def test_chave_normaliza_pergunta():
+    assert chave_resposta("  Qual a RECEITA de março?? ", 3, "gpt-4") == chave_resposta("qual a receita de marco", 3, "gpt-4")
+    assert chave_resposta("receita", 3, "gpt-4") != chave_resposta("receita", 4, "gpt-4")
+    assert chave_resposta("receita", 3, "gpt-4") != chave_resposta("receita", 3, "outro")
+
+
+def test_cache_expira_pelo_ttl():
+    relogio = Relogio()
+    cache = CacheRespostas(ttl=60, relogio=relogio)
+    cache.guardar("a", "resposta")
+
+    relogio.agora = 59.9
+    assert cache.obter("a") == "resposta"
+    relogio.agora = 60.0
+    assert cache.obter("a") is None
+    assert len(cache) == 0
+    assert (cache.acertos, cache.faltas) == (1, 1)
+
+
+def test_cache_descarta_o_usado_ha_mais_tempo():
+    cache = CacheRespostas(capacidade=2, relogio=Relogio())
+    cache.guardar("a", 1)
+    cache.guardar("b", 2)
+    assert cache.obter("a") == 1  # "a" passa a ser o mais recente
+
+    cache.guardar("c", 3)
+
+    assert cache.obter("b") is None
+    assert (cache.obter("a"), cache.obter("c")) == (1, 3)
+    assert len(cache) == 2
+
+
+def test_transmitir_marca_etapas():
+    llm = FakeListChatModel(responses=["Receita de 1.200 reais."])
+    retriever = RetrieverFalso([Document(page_content="Receita do dia 2024-03-01: 1200")])
+    cronometro = Cronometro()
+
+    pedacos = list(transmitir(llm, retriever, "Responda em português.", "Qual a receita?", cronometro))
+
+    assert "".join(pedacos) == "Receita de 1.200 reais."
+    assert len(pedacos) > 1
+    # Só a pergunta vai para o retriever; as instruções ficam no prompt
+    assert retriever.perguntas == ["Qual a receita?"]
+    etapas = cronometro.etapas
+    assert list(etapas) == ["recuperação", "primeiro token", "total"]
+    assert 0 <= etapas["recuperação"] <= etapas["primeiro token"] <= etapas["total"]
+
+
+def test_criar_llm_falso(monkeypatch):
+    monkeypatch.setenv("CHAT_LLM", "falso")
+    llm = criar_llm()
+    assert isinstance(llm, FakeListChatModel)
+    assert nome_llm(llm) == "FakeListChatModel"
+    assert llm.invoke("oi").content.startswith("Resposta de teste")
+
+
+def test_resumos_de_sku_passam_no_filtro_de_atributos():
+    vendas = decodificar_skus(pd.DataFrame({
+        "sku": ["AW_ES_LC_PR_M", "AW_ES_LC_PR_M", "AW_ES_CS_AZ_M", "AW_ES_LC_PR_G"],
+        "price": [100.0, 120.0, 90.0, 110.0],
+    }))
+    docs = list(resumos_sku(vendas))
+    metadados = IndiceMetadados(d.metadata for d in docs)
+
+    mascara = metadados.mascara(extrair_filtro("vendas de shorts pretos tamanho M"))
+
+    ids = {d.metadata["id"] for d, passou in zip(docs, mascara) if passou}
+    # O SKU e os valores citados entram; os outros SKUs e valores ficam de fora
+    assert {"resumo:sku:AW_ES_LC_PR_M", "resumo:sku:cor:PR", "resumo:sku:tamanho:M"} <= ids
+    assert not ids & {"resumo:sku:AW_ES_CS_AZ_M", "resumo:sku:AW_ES_LC_PR_G", "resumo:sku:cor:AZ", "resumo:sku:tamanho:G"}
+    por_id = {d.metadata["id"]: d.metadata for d in docs}
+    assert por_id["resumo:sku:AW_ES_LC_PR_M"]["compressao"] == "Com"
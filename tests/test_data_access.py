@@ -0,0 +1,67 @@
+import time
+
+import httpx
+import pyarrow as pa
+import pytest
+
+from data_access import _SessaoPostgrest, _tipos, _tipos_postgrest, ler_csv
+
+OPENAPI = {"definitions": {"Shopify": {"properties": {"id": {"format": "bigint"}, "sku": {"format": "text"}}}}}
+
+
+class SessaoFalsa:
+    """Sessão do PostgREST que devolve (ou levanta) as ``respostas`` em ordem."""
+
+    def __init__(self, *respostas):
+        self.respostas = list(respostas)
+        self.pedidos = 0
+
+    def get(self, caminho, params=None, headers=None):
+        self.pedidos += 1
+        resposta = self.respostas.pop(0)
+        if isinstance(resposta, Exception):
+            raise resposta
+        return httpx.Response(resposta, json=OPENAPI, request=httpx.Request("GET", "http://postgrest/"))
+
+
+def test_tipos_guardam_so_a_leitura_que_deu_certo():
+    sessao = SessaoFalsa(httpx.ConnectError("sem rede"), 503, 200, 200)
+
+    assert _tipos_postgrest(sessao) == {}
+    assert _tipos_postgrest(sessao) == {}
+    assert _tipos_postgrest(sessao) == {"Shopify": {"id": pa.int64(), "sku": pa.string()}}
+    # Depois de uma leitura boa, o OpenAPI não é pedido de novo
+    assert _tipos_postgrest(sessao)["Shopify"]["id"] == pa.int64()
+    assert sessao.pedidos == 3
+
+
+def test_prazo_esgotado_sobe_e_nao_fica_guardado():
+    with httpx.Client() as http:
+        # Prazo já vencido: a sessão desiste antes de abrir conexão
+        sessao = _SessaoPostgrest(http, "http://127.0.0.1:9", (), prazo=time.monotonic() - 1)
+
+        with pytest.raises(TimeoutError):
+            _tipos_postgrest(sessao)
+
+    assert sessao not in _tipos
+
+
+def test_timeout_depois_de_falha_nao_impede_nova_leitura():
+    sessao = SessaoFalsa(TimeoutError("prazo da carga esgotado"), 200)
+
+    with pytest.raises(TimeoutError):
+        _tipos_postgrest(sessao)
+    assert _tipos_postgrest(sessao)["Shopify"]["sku"] == pa.string()
+
+
+@pytest.mark.parametrize("conteudo", [b"id,sku", b"id,sku\n", b"id,sku\r\n"])
+def test_csv_so_com_cabecalho(conteudo):
+    # Sem linhas o corpo pode terminar no cabeçalho, sem quebra de linha
+    tabela = ler_csv(conteudo, {"id": pa.int64()})
+    assert tabela.num_rows == 0
+    assert tabela.schema == pa.schema([("id", pa.int64()), ("sku", pa.string())])
+
+
+def test_csv_linha_sem_quebra_no_fim():
+    tabela = ler_csv(b"id,sku\n1,AW_A", {"id": pa.int64()})
+    assert tabela.to_pylist() == [{"id": 1, "sku": "AW_A"}]
@@ -0,0 +1,48 @@
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+import demanda
+
+
+@pytest.fixture
+def series():
+    rng = np.random.default_rng(0)
+    return {f"SKU{i:02d}": rng.poisson(rng.uniform(0.5, 4), 120).astype("float64") for i in range(8)}
+
+
+def test_pool_da_o_mesmo_resultado_que_em_serie(series, monkeypatch):
+    monkeypatch.setattr(demanda, "MINIMO_SKUS_POOL", 4)
+
+    em_serie = demanda.prever(series, processos=1)
+    no_pool = demanda.prever(series, processos=2)
+
+    assert 2 in demanda._pools
+    assert no_pool.equals(em_serie)
+
+
+def test_pool_e_reaproveitado(series, monkeypatch):
+    monkeypatch.setattr(demanda, "MINIMO_SKUS_POOL", 4)
+
+    demanda.prever(series, processos=2)
+    pool = demanda._pools[2]
+    demanda.prever(series, processos=2)
+
+    assert demanda._pools[2] is pool
+
+
+def test_poucos_skus_ajustam_em_serie(series):
+    demanda.prever(series, processos=3)
+
+    assert 3 not in demanda._pools
+
+
+def test_modulo_do_ajuste_nao_importa_o_app():
+    # É o que cada processo do pool importa: nada de Streamlit nem de cliente do Supabase
+    codigo = "import sys, demanda_ajuste; print(sorted({'streamlit', 'supabase', 'demanda'} & set(sys.modules)))"
+    saida = subprocess.run([sys.executable, "-c", codigo], capture_output=True, text=True, check=True,
+                           cwd=os.path.dirname(demanda.__file__))
+    assert saida.stdout.strip() == "[]"
@@ -0,0 +1,98 @@
+import hashlib
+
+import httpx
+import numpy as np
+import pytest
+
+from embedding_pipeline import ConfigPipeline, EmbeddingsHTTP, embed_com_checkpoint, servidor_falso
+
+
+def _textos(quantidade):
+    return {hashlib.sha256(str(i).encode()).hexdigest(): f"documento {i} " * (1 + i % 3) for i in range(quantidade)}
+
+
+@pytest.fixture
+def servidores():
+    abertos = []
+
+    def subir(**opcoes):
+        servidor = servidor_falso(latencia=0.01, latencia_por_texto=0, **opcoes)
+        abertos.append(servidor)
+        return servidor
+
+    yield subir
+    for servidor in abertos:
+        servidor.shutdown()
+
+
+def test_embeda_todos_os_textos_em_lotes(servidores, tmp_path):
+    servidor = servidores()
+    textos = _textos(23)
+    contadores = {}
+
+    vetores = embed_com_checkpoint(
+        textos, EmbeddingsHTTP(servidor.url), str(tmp_path), "falso", ConfigPipeline(tamanho_lote=5, concorrencia=2),
+        contadores,
+    )
+
+    assert list(vetores) == list(textos)
+    for h, texto in textos.items():
+        np.testing.assert_allclose(vetores[h], servidor.vetor(texto), rtol=1e-6)
+    assert contadores["lotes"] == servidor.requisicoes == 5
+
+
+def test_espera_e_tenta_de_novo_em_429(servidores, tmp_path):
+    # Uma requisição por vez no servidor e quatro lotes simultâneos: as demais levam 429 com Retry-After
+    servidor = servidores(limite_simultaneas=1)
+    textos = _textos(40)
+    contadores = {}
+
+    vetores = embed_com_checkpoint(
+        textos, EmbeddingsHTTP(servidor.url), str(tmp_path), "falso",
+        ConfigPipeline(tamanho_lote=5, concorrencia=4, espera_inicial=0.01), contadores,
+    )
+
+    assert len(vetores) == 40
+    assert contadores["limite_taxa"] == servidor.recusadas > 0
+    assert contadores["lotes"] == 8
+
+
+def test_desiste_depois_das_tentativas(servidores, tmp_path):
+    servidor = servidores(limite_simultaneas=0)
+
+    with pytest.raises(httpx.HTTPStatusError) as erro:
+        embed_com_checkpoint(
+            _textos(3), EmbeddingsHTTP(servidor.url), str(tmp_path), "falso",
+            ConfigPipeline(tentativas=3, espera_inicial=0.01),
+        )
+
+    assert erro.value.response.status_code == 429
+    assert servidor.requisicoes == 3
+
+
+def test_retoma_dos_checkpoints_depois_de_falha(servidores, tmp_path):
+    textos = _textos(20)
+    config = ConfigPipeline(tamanho_lote=5, concorrencia=1)
+    # O servidor cai depois de dois lotes
+    with pytest.raises(httpx.HTTPStatusError):
+        embed_com_checkpoint(textos, EmbeddingsHTTP(servidores(falhar_apos=2).url), str(tmp_path), "falso", config)
+
+    servidor = servidores()
+    contadores = {}
+    vetores = embed_com_checkpoint(textos, EmbeddingsHTTP(servidor.url), str(tmp_path), "falso", config, contadores)
+
+    assert contadores["reaproveitados"] == 10
+    assert servidor.requisicoes == contadores["lotes"] == 2
+    assert list(vetores) == list(textos)
+
+
+def test_checkpoints_de_outro_modelo_sao_descartados(servidores, tmp_path):
+    textos = _textos(10)
+    config = ConfigPipeline(tamanho_lote=5)
+    embed_com_checkpoint(textos, EmbeddingsHTTP(servidores().url), str(tmp_path), "modelo-a", config)
+
+    contadores = {}
+    embed_com_checkpoint(textos, EmbeddingsHTTP(servidores().url), str(tmp_path), "modelo-b", config, contadores)
+
+    assert contadores["reaproveitados"] == 0
+    assert contadores["lotes"] == 2
@@ -0,0 +1,121 @@
+import pandas as pd
+import pytest
+from supabase import create_client
+
+import sync
+from data_access import SupabaseLocal, Tabela, servidor_postgrest_falso
+
+SHOPIFY = Tabela("Shopify", colunas=("date", "sku", "price"), datas={"date": "%Y-%m-%d"}, numeros=("price",))
+
+
+@pytest.fixture
+def cliente():
+    # Como o PostgREST devolve: datas em texto ISO
+    return SupabaseLocal({"Shopify": pd.DataFrame({
+        "id": [1, 2, 3, 4],
+        "date": ["2024-03-01", "2024-03-01", "2024-03-02", "2024-03-03"],
+        "sku": ["AW_A", "AW_B", "AW_A", "AW_C"],
+        "price": [10.0, 20.0, 30.0, 40.0],
+    })})
+
+
+@pytest.fixture
+def pasta(tmp_path):
+    return str(tmp_path)
+
+
+def _acrescentar(cliente, **linha):
+    cliente.tabelas["Shopify"] = pd.concat([cliente.tabelas["Shopify"], pd.DataFrame([linha])], ignore_index=True)
+
+
+def test_carga_completa(cliente, pasta):
+    assert sync.sincronizar("Shopify", cliente=cliente, pasta=pasta) == 4
+
+    estado = sync.estado("Shopify", pasta)
+    assert estado["versao"] == 1 and estado["carga_completa"] == 1
+    assert estado["linhas"] == 4
+    assert estado["marca"].startswith("2024-03-03")
+    df = sync.ler(SHOPIFY, pasta)
+    assert df["price"].tolist() == [10.0, 20.0, 30.0, 40.0]
+    assert df["date"].max() == pd.Timestamp("2024-03-03")
+
+
+def test_incremental_sem_mudanca_nao_muda_versao(cliente, pasta):
+    sync.sincronizar("Shopify", cliente=cliente, pasta=pasta)
+    antes = sync.estado("Shopify", pasta)
+
+    # O delta repete as linhas do dia da marca d'água, mas nada mudou
+    assert sync.sincronizar("Shopify", cliente=cliente, pasta=pasta) == 1
+    assert sync.estado("Shopify", pasta) == antes
+
+
+def test_incremental_linha_nova(cliente, pasta):
+    sync.sincronizar("Shopify", cliente=cliente, pasta=pasta)
+    _acrescentar(cliente, id=5, date="2024-03-04", sku="AW_B", price=50.0)
+
+    assert sync.sincronizar("Shopify", cliente=cliente, pasta=pasta) == 2
+    estado = sync.estado("Shopify", pasta)
+    assert estado["versao"] == 2 and estado["carga_completa"] == 1
+    assert estado["linhas"] == 5
+    assert estado["marca"].startswith("2024-03-04")
+    assert sync.ler(SHOPIFY, pasta)["price"].tolist() == [10.0, 20.0, 30.0, 40.0, 50.0]
+
+
+def test_incremental_atualiza_linha_do_dia_da_marca(cliente, pasta):
+    sync.sincronizar("Shopify", cliente=cliente, pasta=pasta)
+    # Linha do último dia alterada na origem: volta no delta e substitui a gravada (upsert por id)
+    cliente.tabelas["Shopify"].loc[cliente.tabelas["Shopify"]["id"] == 4, "price"] = 45.0
+
+    sync.sincronizar("Shopify", cliente=cliente, pasta=pasta)
+    estado = sync.estado("Shopify", pasta)
+    assert estado["versao"] == 2 and estado["linhas"] == 4
+    df = sync.ler(Tabela("Shopify", colunas=("id", "price")), pasta)
+    assert df.set_index("id")["price"].to_dict() == {1: 10.0, 2: 20.0, 3: 30.0, 4: 45.0}
+
+
+def test_completo_marca_carga_completa(cliente, pasta):
+    sync.sincronizar("Shopify", cliente=cliente, pasta=pasta)
+    _acrescentar(cliente, id=5, date="2024-03-04", sku="AW_B", price=50.0)
+    sync.sincronizar("Shopify", cliente=cliente, pasta=pasta)
+
+    assert sync.sincronizar("Shopify", cliente=cliente, pasta=pasta, completo=True) == 5
+    estado = sync.estado("Shopify", pasta)
+    assert estado["versao"] == 3 and estado["carga_completa"] == 3
+
+
+def test_garantir_poupa_sincronizacao_recente(cliente, pasta):
+    sync.garantir("Shopify", cliente=cliente, pasta=pasta)
+    requisicoes = cliente.requisicoes
+    _acrescentar(cliente, id=5, date="2024-03-04", sku="AW_B", price=50.0)
+
+    assert sync.garantir("Shopify", cliente=cliente, pasta=pasta) == 0
+    assert cliente.requisicoes == requisicoes
+    assert sync.versao("Shopify", pasta) == 1
+
+
+def _sincronizar_vazia(pasta, tipos):
+    vazia = pd.DataFrame({"id": [], "date": [], "sku": [], "price": []})
+    servidor = servidor_postgrest_falso({"Shopify": vazia}, tipos)
+    try:
+        cliente = create_client(servidor.url, "eyJhbGciOiJIUzI1NiJ9.e30.falsa")
+        return sync.sincronizar("Shopify", cliente=cliente, pasta=pasta)
+    finally:
+        servidor.shutdown()
+
+
+def test_carga_completa_vazia_grava_colunas_do_banco(pasta):
+    # Tabela ainda sem linhas: o Parquet sai com as colunas do OpenAPI e a leitura projetada funciona
+    tipos = {"id": "bigint", "date": "date", "sku": "text", "price": "numeric"}
+    assert _sincronizar_vazia(pasta, {"Shopify": tipos}) == 0
+
+    assert sync.estado("Shopify", pasta)["linhas"] == 0
+    df = sync.ler(SHOPIFY, pasta)
+    assert df.empty and list(df.columns) == ["date", "sku", "price"]
+
+
+def test_carga_completa_vazia_sem_esquema_do_banco(pasta):
+    # Sem a tabela no OpenAPI: grava a chave, a marca d'água e as colunas de esquemas.ESQUEMAS
+    assert _sincronizar_vazia(pasta, {}) == 0
+
+    df = sync.ler(Tabela("Shopify", colunas=("id", "date", "sku")), pasta)
+    assert df.empty and list(df.columns) == ["id", "date", "sku"]
@@ -0,0 +1,127 @@
+import os
+
+import numpy as np
+import pytest
+from langchain_core.documents import Document
+
+from embedding_pipeline import ConfigPipeline
+from vector_index import (
+    EmbeddingFalso, IndiceVazio, carregar_ou_construir_indice, criar_indice_faiss, dimensao_embeddings,
+    hash_documento,
+)
+
+CONFIG = ConfigPipeline(tamanho_lote=2, concorrencia=2)
+
+
+class EmbeddingContado(EmbeddingFalso):
+    """EmbeddingFalso que guarda os textos enviados para embedding."""
+
+    def __init__(self):
+        super().__init__(dimensao=32)
+        self.enviados = []
+
+    def embed_documents(self, texts):
+        self.enviados.extend(texts)
+        return super().embed_documents(texts)
+
+
+def _documentos(*textos):
+    return [Document(page_content=texto, metadata={"tema": "shopify", "n": i}) for i, texto in enumerate(textos)]
+
+
+def test_primeira_construcao_embeda_tudo(tmp_path):
+    embeddings = EmbeddingContado()
+    docs = _documentos("venda de camiseta azul", "venda de calça preta", "post com 300 curtidas")
+
+    indice = carregar_ou_construir_indice(docs, embeddings, pasta=str(tmp_path / "indice"), config=CONFIG)
+
+    assert sorted(embeddings.enviados) == sorted(d.page_content for d in docs)
+    assert indice.index.ntotal == 3
+    assert indice.similarity_search("camiseta azul", k=1)[0].page_content == "venda de camiseta azul"
+    # Os lotes intermediários somem depois que o índice é salvo
+    assert not os.path.exists(str(tmp_path / "indice") + ".lotes")
+
+
+def test_mesmos_documentos_so_carregam(tmp_path):
+    pasta = str(tmp_path / "indice")
+    docs = _documentos("venda de camiseta azul", "venda de calça preta")
+    carregar_ou_construir_indice(docs, EmbeddingContado(), pasta=pasta, config=CONFIG)
+
+    embeddings = EmbeddingContado()
+    indice = carregar_ou_construir_indice(iter(docs), embeddings, pasta=pasta, config=CONFIG)
+
+    assert embeddings.enviados == []
+    assert indice.index.ntotal == 2
+
+
+def test_so_documentos_alterados_sao_embedados(tmp_path):
+    pasta = str(tmp_path / "indice")
+    docs = _documentos("venda de camiseta azul", "venda de calça preta", "post com 300 curtidas")
+    carregar_ou_construir_indice(docs, EmbeddingContado(), pasta=pasta, config=CONFIG)
+
+    alterado = Document(page_content="venda de calça preta", metadata={"tema": "shopify", "n": 99})
+    novos = [docs[0], alterado, docs[2], Document(page_content="story com 12 respostas", metadata={"tema": "stories"})]
+    assert hash_documento(alterado) != hash_documento(docs[1])
+    embeddings = EmbeddingContado()
+    indice = carregar_ou_construir_indice(novos, embeddings, pasta=pasta, config=CONFIG)
+
+    # Metadado diferente conta como documento alterado; os outros dois vêm do cache de vetores
+    assert sorted(embeddings.enviados) == ["story com 12 respostas", "venda de calça preta"]
+    assert indice.index.ntotal == 4
+    assert indice.similarity_search("respostas story", k=1)[0].metadata == {"tema": "stories"}
+
+
+def test_trocar_tipo_nao_embeda_de_novo(tmp_path):
+    pasta = str(tmp_path / "indice")
+    docs = _documentos("venda de camiseta azul", "venda de calça preta")
+    carregar_ou_construir_indice(docs, EmbeddingContado(), pasta=pasta, config=CONFIG)
+
+    embeddings = EmbeddingContado()
+    indice = carregar_ou_construir_indice(docs, embeddings, pasta=pasta, config=CONFIG, tipo="sq8")
+
+    assert embeddings.enviados == []
+    assert indice.index.ntotal == 2
+
+
+def test_reconstruir_embeda_tudo(tmp_path):
+    pasta = str(tmp_path / "indice")
+    docs = _documentos("venda de camiseta azul", "venda de calça preta")
+    carregar_ou_construir_indice(docs, EmbeddingContado(), pasta=pasta, config=CONFIG)
+
+    embeddings = EmbeddingContado()
+    carregar_ou_construir_indice(docs, embeddings, pasta=pasta, config=CONFIG, reconstruir=True)
+
+    assert sorted(embeddings.enviados) == sorted(d.page_content for d in docs)
+
+
+def test_sem_documentos_nao_monta_indice(tmp_path):
+    pasta = str(tmp_path / "indice")
+    embeddings = EmbeddingContado()
+
+    with pytest.raises(IndiceVazio):
+        carregar_ou_construir_indice(iter([]), embeddings, pasta=pasta, config=CONFIG)
+
+    assert embeddings.enviados == []
+    assert not os.path.exists(pasta)
+
+
+def test_dimensao_vem_do_modelo():
+    assert dimensao_embeddings(EmbeddingFalso(dimensao=48)) == 48
+    with pytest.raises(ValueError, match="48 dimensões"):
+        criar_indice_faiss(np.zeros((3, 32), "float32"), "Flat", 48)
+
+
+@pytest.mark.skipif(not os.path.exists("/proc/self/maps"), reason="usa os mapeamentos do /proc do Linux")
+@pytest.mark.parametrize("tipo", ["flat", "sq8"])
+def test_indice_salvo_abre_mapeado(tmp_path, tipo):
+    pasta = str(tmp_path / "indice")
+    docs = _documentos("venda de camiseta azul", "venda de calça preta")
+    carregar_ou_construir_indice(docs, EmbeddingContado(), pasta=pasta, config=CONFIG, tipo=tipo)
+
+    indice = carregar_ou_construir_indice(docs, EmbeddingContado(), pasta=pasta, config=CONFIG, tipo=tipo)
+
+    # Lido para a memória, o arquivo é fechado depois da leitura; mapeado, continua nos mapeamentos do processo
+    with open("/proc/self/maps") as f:
+        mapeamentos = f.read()
+    assert os.path.realpath(os.path.join(pasta, "faiss", "index.faiss")) in mapeamentos
+    assert indice.similarity_search("camiseta azul", k=1)[0].page_content == "venda de camiseta azul"
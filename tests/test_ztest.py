@@ -0,0 +1,99 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+import pytest
+from statsmodels.stats.multitest import multipletests
+from statsmodels.stats.proportion import proportions_ztest
+
+from ztest import PERIODOS, comparar_faixas, ztest_proporcoes
+
+TOLERANCIA = 1e-9
+
+
+def _statsmodels(sucessos_a, total_a, sucessos_b, total_b):
+    with warnings.catch_warnings():
+        # 0 ou 100% nos dois períodos: o statsmodels avisa da divisão por zero e devolve nan
+        warnings.simplefilter("ignore", RuntimeWarning)
+        return np.array([
+            proportions_ztest([sa, sb], [ta, tb])
+            for sa, ta, sb, tb in np.broadcast(sucessos_a, total_a, sucessos_b, total_b)
+        ]).reshape(-1, 2).T
+
+
+def _conferir(z, pval, esperado_z, esperado_p):
+    assert np.array_equal(np.isnan(z), np.isnan(esperado_z))
+    np.testing.assert_allclose(z, esperado_z, rtol=0, atol=TOLERANCIA, equal_nan=True)
+    np.testing.assert_allclose(pval, esperado_p, rtol=0, atol=TOLERANCIA, equal_nan=True)
+
+
+@pytest.mark.parametrize("semente", [0, 1, 2, 3])
+@pytest.mark.parametrize("teto", [5, 50_000])
+def test_ztest_igual_ao_statsmodels(semente, teto):
+    # Bases pequenas (teto 5) caem nos extremos: 0 ou 100% nos dois períodos
+    rng = np.random.default_rng(semente)
+    total_a = rng.integers(1, teto, 500)
+    total_b = rng.integers(1, teto, 500)
+    sucessos_a = rng.integers(0, total_a + 1)
+    sucessos_b = rng.integers(0, total_b + 1)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z, pval = ztest_proporcoes(sucessos_a, total_a, sucessos_b, total_b)
+    _conferir(z, pval, *_statsmodels(sucessos_a, total_a, sucessos_b, total_b))
+
+
+@pytest.mark.parametrize(
+    "sucessos_a, total_a, sucessos_b, total_b",
+    [
+        (0, 100, 0, 200),      # nenhum sucesso nos dois: indefinido
+        (0, 100, 7, 200),      # nenhum sucesso de um lado
+        (100, 100, 200, 200),  # 100% nos dois: indefinido
+        (30, 100, 60, 200),    # proporções idênticas
+        (1, 1, 0, 1),          # bases de uma sessão
+    ],
+)
+def test_ztest_casos_extremos(sucessos_a, total_a, sucessos_b, total_b):
+    z, pval = ztest_proporcoes([sucessos_a], [total_a], [sucessos_b], [total_b])
+    _conferir(z, pval, *_statsmodels(sucessos_a, total_a, sucessos_b, total_b))
+
+
+def test_proporcoes_identicas_dao_z_zero():
+    z, pval = ztest_proporcoes([30, 5], [100, 10], [60, 10], [200, 20])
+    np.testing.assert_array_equal(z, [0, 0])
+    np.testing.assert_array_equal(pval, [1, 1])
+
+
+def _tabela(linhas):
+    return pd.DataFrame(linhas, columns=list(PERIODOS), index=pd.Index([0, 25, 50, 75, 100][: len(linhas)], name="Scroll depth"))
+
+
+def test_comparar_faixas_holm_igual_ao_statsmodels():
+    tabela = _tabela([(1000, 1200), (800, 1000), (500, 700), (0, 0), (120, 90)])
+    resultado = comparar_faixas(tabela)
+
+    total_a, total_b = tabela.iloc[0]
+    esperado_z, esperado_p = _statsmodels(tabela.iloc[:, 0], total_a, tabela.iloc[:, 1], total_b)
+    # A base (faixa 0) e a faixa sem visitantes dão p indefinido e ficam fora da correção
+    validos = np.isfinite(esperado_p)
+    assert validos.tolist() == [False, True, True, False, True]
+    rejeita, ajustado, _, _ = multipletests(esperado_p[validos], alpha=0.05, method="holm")
+
+    np.testing.assert_array_equal(resultado["Estatística z"], np.round(esperado_z, 4))
+    np.testing.assert_array_equal(resultado["Valor-p"], np.round(esperado_p, 4))
+    np.testing.assert_array_equal(resultado["Valor-p ajustado"][validos], np.round(ajustado, 4))
+    assert resultado["Valor-p ajustado"][~validos].isna().all()
+    assert (resultado["Resultado"][validos] != "⚖️ Inconclusivo").tolist() == rejeita.tolist()
+    assert (resultado["Resultado"][~validos] == "⚖️ Inconclusivo").all()
+
+
+def test_comparar_faixas_uma_faixa():
+    # Só a base: A e B em 100%, nada a testar
+    resultado = comparar_faixas(_tabela([(40, 60)]))
+    assert len(resultado) == 1
+    assert np.isnan(resultado["Valor-p"].iloc[0]) and np.isnan(resultado["Valor-p ajustado"].iloc[0])
+    assert resultado["Resultado"].iloc[0] == "⚖️ Inconclusivo"
+
+
+def test_comparar_faixas_sem_base():
+    assert comparar_faixas(_tabela([(0, 60), (0, 30)])).empty
+    assert comparar_faixas(_tabela([])).empty
@@ -0,0 +1,254 @@
+import hashlib
+import json
+import os
+import re
+import shutil
+import sys
+
+import faiss
+import numpy as np
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+from langchain_core.embeddings import Embeddings
+
+from embedding_pipeline import ConfigPipeline, embed_com_checkpoint, limpar_checkpoints
+
+# Pasta onde ficam os vetores já calculados e o último índice FAISS salvo
+PASTA_INDICE = os.getenv("CHAT_INDEX_DIR", os.path.join(".cache", "chat_index"))
+
+# Lotes do pipeline de embedding: textos por chamada e chamadas simultâneas
+CONFIG_EMBEDDING = ConfigPipeline(
+    tamanho_lote=int(os.getenv("CHAT_EMBED_LOTE", "256")),
+    concorrencia=int(os.getenv("CHAT_EMBED_CONCORRENCIA", "4")),
+)
+
+# Tipo do índice FAISS: flat (exato, float32), sq8 (exato, 1 byte por dimensão),
+# ivf e ivfpq (aproximados, busca só em parte das listas; ivfpq comprime os vetores)
+TIPOS_INDICE = ("flat", "sq8", "ivf", "ivfpq")
+TIPO_INDICE = os.getenv("CHAT_INDEX_TIPO", "flat")
+
+# Listas do IVF visitadas por busca: mais listas, mais recall e mais latência
+NPROBE = int(os.getenv("CHAT_INDEX_NPROBE", "16"))
+
+# Abaixo disto não há vetores suficientes para treinar o IVF: ivf vira flat e ivfpq vira sq8
+MINIMO_IVF = 10_000
+
+# Abre o índice salvo mapeando o arquivo inteiro: os vetores (flat, sq8) e as listas
+# invertidas (ivf) ficam no arquivo e só as páginas tocadas pela busca vão para a memória.
+# Só IO_FLAG_MMAP mapearia apenas as listas do IVF e leria flat e sq8 inteiros para a RAM
+FLAGS_LEITURA = faiss.IO_FLAG_MMAP_IFC
+
+
+def hash_documento(doc):
+    """Hash estável do conteúdo (texto + metadados) de um Document."""
+    conteudo = json.dumps(
+        {"texto": doc.page_content, "metadata": doc.metadata},
+        sort_keys=True, default=str, ensure_ascii=False,
+    )
+    return hashlib.sha256(conteudo.encode("utf-8")).hexdigest()
+
+
+def nome_modelo(embeddings):
+    """Identifica o modelo de embedding; vetores de modelos diferentes não se misturam."""
+    modelo = getattr(embeddings, "model", None) or getattr(embeddings, "dimensao", None)
+    return f"{type(embeddings).__name__}:{modelo}"
+
+
+class EmbeddingFalso(Embeddings):
+    """Embedder local e determinístico (bag-of-words com hashing), sem chamadas de rede.
+
+    Serve para rodar o chat e o índice offline: textos com palavras em comum
+    ficam próximos, então a busca continua fazendo sentido nos testes.
+    """
+
+    def __init__(self, dimensao=256):
+        self.dimensao = dimensao
+
+    def _vetor(self, texto):
+        vetor = np.zeros(self.dimensao, dtype="float32")
+        for palavra in re.findall(r"\w+", texto.lower()):
+            posicao = int.from_bytes(hashlib.md5(palavra.encode("utf-8")).digest()[:4], "little")
+            vetor[posicao % self.dimensao] += 1.0
+        norma = np.linalg.norm(vetor)
+        return (vetor / norma if norma > 0 else vetor).tolist()
+
+    def embed_documents(self, texts):
+        return [self._vetor(t) for t in texts]
+
+    def embed_query(self, text):
+        return self._vetor(text)
+
+
+class IndiceVazio(ValueError):
+    """Não há documentos para indexar (por exemplo, num deploy novo antes da primeira sincronização)."""
+
+
+def dimensao_embeddings(embeddings):
+    """Dimensão dos vetores do modelo: a declarada (``dimensao``, ``dimensions``) ou a de um embedding de teste."""
+    dimensao = getattr(embeddings, "dimensao", None) or getattr(embeddings, "dimensions", None)
+    return dimensao or len(embeddings.embed_query("dimensão"))
+
+
+def criar_embeddings(api_key=None):
+    """OpenAIEmbeddings por padrão; CHAT_EMBEDDINGS=falso usa o embedder local."""
+    if os.getenv("CHAT_EMBEDDINGS", "").lower() == "falso":
+        return EmbeddingFalso()
+    from langchain_openai import OpenAIEmbeddings
+    return OpenAIEmbeddings(api_key=api_key)
+
+
+def especificacao_indice(tipo, quantidade, dimensao):
+    """Texto do ``faiss.index_factory`` para ``tipo`` com ``quantidade`` vetores de ``dimensao``."""
+    if tipo not in TIPOS_INDICE:
+        raise ValueError(f"Tipo de índice desconhecido: {tipo!r} (use um de {', '.join(TIPOS_INDICE)})")
+    if tipo in ("ivf", "ivfpq") and quantidade < MINIMO_IVF:
+        tipo = "flat" if tipo == "ivf" else "sq8"
+    if tipo == "flat":
+        return "Flat"
+    if tipo == "sq8":
+        return "SQ8"
+    # ~4·√n listas, com pelo menos 39 vetores de treino por lista
+    listas = min(int(4 * np.sqrt(quantidade)), quantidade // 39)
+    if tipo == "ivf":
+        return f"IVF{listas},Flat"
+    # Subvetores de ~16 dimensões com 8 bits cada: 1536 dimensões viram 96 bytes por vetor
+    subvetores = next(m for m in range(max(1, dimensao // 16), 0, -1) if dimensao % m == 0)
+    return f"IVF{listas},PQ{subvetores}x8"
+
+
+def _ajustar_nprobe(indice, nprobe=NPROBE):
+    ivf = faiss.try_extract_index_ivf(indice)
+    if ivf is not None:
+        ivf.nprobe = min(nprobe, ivf.nlist)
+    return indice
+
+
+def criar_indice_faiss(vetores, especificacao, dimensao):
+    """Índice FAISS vazio da ``especificacao`` para vetores de ``dimensao``, já treinado com ``vetores`` quando precisa."""
+    if vetores.ndim != 2 or vetores.shape[1] != dimensao:
+        raise ValueError(f"Vetores com formato {vetores.shape}, mas o modelo gera {dimensao} dimensões")
+    indice = faiss.index_factory(dimensao, especificacao)
+    if not indice.is_trained:
+        indice.train(vetores)
+    return _ajustar_nprobe(indice)
+
+
+def assinatura(hashes):
+    """Resumo do conjunto de documentos; muda se qualquer documento mudar."""
+    return hashlib.sha256("\n".join(hashes).encode("utf-8")).hexdigest()
+
+
+def _ler_manifesto(pasta):
+    caminho = os.path.join(pasta, "manifesto.json")
+    if not os.path.exists(caminho):
+        return {}
+    with open(caminho, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _ler_cache_vetores(pasta, modelo):
+    """Carrega o mapa hash -> vetor salvo na última construção (se for do mesmo modelo)."""
+    manifesto = _ler_manifesto(pasta)
+    caminho_vetores = os.path.join(pasta, "vetores.npy")
+    if manifesto.get("modelo") != modelo or not os.path.exists(caminho_vetores):
+        return {}
+    vetores = np.load(caminho_vetores)
+    return dict(zip(manifesto["hashes_vetores"], vetores))
+
+
+def _salvar(pasta, vectorstore, modelo, assinatura_docs, tipo, especificacao, hashes_vetores, vetores):
+    # Escreve numa pasta temporária e troca no final, para nunca deixar um índice pela metade
+    temporaria = pasta + ".tmp"
+    shutil.rmtree(temporaria, ignore_errors=True)
+    os.makedirs(temporaria)
+    vectorstore.save_local(os.path.join(temporaria, "faiss"))
+    np.save(os.path.join(temporaria, "vetores.npy"), vetores)
+    with open(os.path.join(temporaria, "manifesto.json"), "w", encoding="utf-8") as f:
+        json.dump({
+            "modelo": modelo,
+            "assinatura": assinatura_docs,
+            "tipo": tipo,
+            "indice": especificacao,
+            "hashes_vetores": hashes_vetores,
+        }, f)
+    shutil.rmtree(pasta, ignore_errors=True)
+    os.replace(temporaria, pasta)
+
+
+def carregar_ou_construir_indice(documentos, embeddings, pasta=PASTA_INDICE, reconstruir=False,
+                                 config=CONFIG_EMBEDDING, tipo=TIPO_INDICE):
+    """Devolve um FAISS para os documentos, reaproveitando o que já está em disco.
+
+    ``documentos`` pode ser qualquer iterável e é lido inteiro antes de
+    qualquer embedding: a assinatura do conjunto decide se o índice salvo
+    serve, e o índice novo precisa de todos os textos e metadados. Do Document
+    só ficam o hash, o texto e os metadados.
+
+    - Se os documentos são os mesmos da última execução, apenas carrega o índice salvo.
+    - Caso contrário, calcula embedding só dos documentos novos ou alterados
+      (chaveados pelo hash do conteúdo) e reaproveita os vetores dos demais.
+    - ``reconstruir=True`` ignora o cache e recalcula tudo.
+
+    Os embeddings saem em lotes concorrentes (``config``) com checkpoint em
+    ``<pasta>.lotes``: uma construção interrompida retoma de onde parou.
+
+    ``tipo`` escolhe o índice (veja ``TIPOS_INDICE``). O índice salvo é aberto
+    com ``FLAGS_LEITURA``: qualquer tipo é lido do arquivo mapeado, sem copiar
+    os vetores para a memória do processo, e as páginas ficam no cache do
+    sistema. Trocar o tipo reconstrói o índice a partir dos vetores em cache,
+    sem novos embeddings.
+
+    Sem nenhum documento levanta ``IndiceVazio``: não há índice a montar.
+    """
+    modelo = nome_modelo(embeddings)
+    hashes, textos, metadados = [], [], []
+    for doc in documentos:
+        hashes.append(hash_documento(doc))
+        textos.append(doc.page_content)
+        metadados.append(doc.metadata)
+    if not hashes:
+        raise IndiceVazio("Nenhum documento para indexar: sincronize os dados antes de montar o índice do chat")
+    assinatura_docs = assinatura(hashes)
+
+    if not reconstruir:
+        manifesto = _ler_manifesto(pasta)
+        if (manifesto.get("modelo") == modelo and manifesto.get("assinatura") == assinatura_docs
+                and manifesto.get("tipo", "flat") == tipo):
+            vectorstore = FAISS.load_local(
+                os.path.join(pasta, "faiss"), embeddings,
+                allow_dangerous_deserialization=True, io_flags=FLAGS_LEITURA,
+            )
+            _ajustar_nprobe(vectorstore.index)
+            return vectorstore
+
+    cache = {} if reconstruir else _ler_cache_vetores(pasta, modelo)
+
+    # Documentos idênticos recebem um único embedding
+    texto_por_hash = dict(zip(hashes, textos))
+    faltantes = {h: texto for h, texto in texto_por_hash.items() if h not in cache}
+    pasta_lotes = pasta + ".lotes"
+    if reconstruir:
+        limpar_checkpoints(pasta_lotes)
+    cache.update(embed_com_checkpoint(faltantes, embeddings, pasta_lotes, modelo, config))
+
+    # Só guarda os vetores dos documentos atuais, para o cache não crescer indefinidamente
+    hashes_vetores = list(texto_por_hash)
+    vetores = np.vstack([cache[h] for h in hashes_vetores])
+
+    dimensao = dimensao_embeddings(embeddings)
+    especificacao = especificacao_indice(tipo, len(hashes_vetores), dimensao)
+    vectorstore = FAISS(embeddings, criar_indice_faiss(vetores, especificacao, dimensao), InMemoryDocstore(), {})
+    vectorstore.add_embeddings([(texto, cache[h]) for h, texto in zip(hashes, textos)], metadatas=metadados)
+
+    _salvar(pasta, vectorstore, modelo, assinatura_docs, tipo, especificacao, hashes_vetores, vetores)
+    # Os vetores já estão no índice salvo; os lotes intermediários não servem mais
+    limpar_checkpoints(pasta_lotes)
+    return vectorstore
+
+
+if __name__ == "__main__":
+    if "--reconstruir" not in sys.argv:
+        print("Uso: python vector_index.py --reconstruir")
+        sys.exit(1)
+    from chat_allweather import reconstruir_indice
+    reconstruir_indice()
@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+from scipy.stats import norm
+from statsmodels.stats.multitest import multipletests
+
+PERIODOS = ("Período A", "Período B")
+
+
+def ztest_proporcoes(sucessos_a, total_a, sucessos_b, total_b):
+    """z e valor-p (bicaudal) do teste de duas proporções, para vários pares de uma vez.
+
+    Mesma conta do ``proportions_ztest`` do statsmodels (variância agrupada,
+    diferença A - B), só que em arrays: cada posição é um teste independente.
+    """
+    sucessos_a, total_a, sucessos_b, total_b = (
+        np.asarray(x, dtype="float64") for x in (sucessos_a, total_a, sucessos_b, total_b)
+    )
+    agrupada = (sucessos_a + sucessos_b) / (total_a + total_b)
+    erro = np.sqrt(agrupada * (1 - agrupada) * (1 / total_a + 1 / total_b))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z = (sucessos_a / total_a - sucessos_b / total_b) / erro
+    return z, 2 * norm.sf(np.abs(z))
+
+
+def tabela_faixas(df, valores, agregacao="sum", faixa="Scroll depth", periodo="Período"):
+    """Uma linha por faixa (ordenada) e uma coluna por período, agregando ``valores`` uma vez só."""
+    tabela = df.groupby([faixa, periodo])[valores].agg(agregacao).unstack(fill_value=0)
+    return tabela.reindex(columns=list(PERIODOS), fill_value=0).sort_index()
+
+
+def comparar_faixas(tabela, alfa=0.05, metodo="holm"):
+    """Testa A contra B em todas as faixas de ``tabela_faixas`` numa passada.
+
+    A base de cada período é a menor faixa (topo do funil). Os valores-p são
+    corrigidos para comparações múltiplas (``metodo`` do ``multipletests``) e a
+    decisão usa o valor corrigido. Sem base nos dois períodos, devolve vazio.
+    """
+    if tabela.empty or (tabela.iloc[0] <= 0).any():
+        return pd.DataFrame()
+
+    periodo_a, periodo_b = PERIODOS
+    total_a, total_b = tabela.iloc[0]
+    prop_a = tabela[periodo_a].to_numpy() / total_a
+    prop_b = tabela[periodo_b].to_numpy() / total_b
+    z, pval = ztest_proporcoes(tabela[periodo_a], total_a, tabela[periodo_b], total_b)
+
+    # Faixas sem nenhum sucesso nos dois períodos dão p indefinido: ficam fora da correção
+    ajustado = np.full_like(pval, np.nan)
+    significativo = np.zeros(len(pval), dtype=bool)
+    validos = np.isfinite(pval)
+    if validos.any():
+        significativo[validos], ajustado[validos], _, _ = multipletests(pval[validos], alpha=alfa, method=metodo)
+
+    return pd.DataFrame({
+        "Faixa": [f"{faixa}%" for faixa in tabela.index],
+        "Período A (%)": [f"{p:.2%}" for p in prop_a],
+        "Período B (%)": [f"{p:.2%}" for p in prop_b],
+        "Estatística z": np.round(z, 4),
+        "Valor-p": np.round(pval, 4),
+        "Valor-p ajustado": np.round(ajustado, 4),
+        "Resultado": np.select(
+            [significativo & (prop_b > prop_a), significativo],
+            ["✅ Melhorou", "❌ Piorou"],
+            "⚖️ Inconclusivo",
+        ),
+    })
+